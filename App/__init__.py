@@ -1,6 +1,4 @@
-from .views import *
-from .controllers import *
-from .main import *
+import importlib
 
 from flask import Flask
 from .extensions import db
@@ -17,3 +15,16 @@ def create_app(config_object="App.config.Config"):
 
     return app
 
+# Names used to be pulled in eagerly with `from .views/.controllers/.main import *`,
+# which imported every blueprint (and reportlab, Flask-Admin, ...) on any `import App.x`.
+# They now resolve on first access instead.
+_LAZY_SUBMODULES = ("controllers", "views", "main")
+
+def __getattr__(name):
+    if name.startswith("__"):
+        raise AttributeError(name)
+    for submodule in _LAZY_SUBMODULES:
+        module = importlib.import_module(f"{__name__}.{submodule}")
+        if hasattr(module, name):
+            return getattr(module, name)
+    raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
@@ -1,12 +1,17 @@
 # App/api.py
-from flask import Blueprint, request, jsonify
+from flask import Blueprint, current_app, request, jsonify
 from flask_jwt_extended import jwt_required, get_jwt_identity
 from datetime import date, datetime, time as dtime
 from App.controllers import (
-    schedule_shift, schedule_week, get_roster,
-    clock_in, clock_out, weekly_report
+    schedule_shift_with_check, schedule_week, get_roster,
+    clock_in, clock_out, weekly_report,
+    admin_required,
+    parse_fields, SHIFT_FIELDS,
+    get_changes, is_admin_token,
+    WeeklyHoursExceeded, get_coverage, clone_shifts, delete_shifts_in_range,
 )
-from App.controllers.user import get_user  
+from App.idempotency import idempotent
+from App.batch import parse_batch, run_batch
 
 api = Blueprint('api', __name__, url_prefix='/api')
 
@@ -14,46 +19,85 @@ def parse_date(s): return date.fromisoformat(s)
 def parse_datetime(s): return datetime.fromisoformat(s)
 
 
-def is_admin():
-    """Check if current JWT user is admin."""
-    user_id = get_jwt_identity()
-    user = get_user(user_id)
-    return user.isAdmin if user else False
-
-
 # --- Admin: create one shift ---
 @api.route('/admin/shifts', methods=['POST'])
-@jwt_required() 
+@idempotent
+@admin_required()
 def api_create_shift():
-    if not is_admin():
-        return jsonify({"message": "Admin Access Required"}), 403
     data = request.get_json() or {}
-    shift = schedule_shift(
-        user_id=int(data['user_id']),
-        work_date=parse_date(data['date']),
-        start=_to_time(data['start']),
-        end=_to_time(data['end']),
-        role=data.get('role'),
-        location=data.get('location'),
-    )
-    return jsonify(shift.get_json()), 201
+    try:
+        shift, check = schedule_shift_with_check(
+            user_id=int(data['user_id']),
+            work_date=parse_date(data['date']),
+            start=_to_time(data['start']),
+            end=_to_time(data['end']),
+            role=data.get('role'),
+            location=data.get('location'),
+        )
+    except WeeklyHoursExceeded as e:
+        return jsonify({"error": str(e), "weekly_hours": e.check}), 409
+    body = shift.get_json()
+    if check and check['over']:
+        body['weekly_hours_warning'] = check
+    return jsonify(body), 201
 
 # --- Admin: create a week's schedule for a user ---
 @api.route('/admin/shifts/bulk', methods=['POST'])
-@jwt_required()
+@idempotent
+@admin_required()
 def api_create_week():
-    if not is_admin():
-        return jsonify({"messsage": "Admin Access Required"}), 403
-
     data = request.get_json() or {}
-    created = schedule_week(
+    result = schedule_week(
         user_id=int(data['user_id']),
         week_start=parse_date(data['week_start']),
         daily_windows=data['daily_windows'],
         role=data.get('role'),
         location=data.get('location'),
     )
-    return jsonify([s.get_json() for s in created]), 201
+    return jsonify(result), 201
+
+# --- Admin: copy a range of shifts forward (e.g. last week into the next four) ---
+@api.route('/admin/shifts/clone', methods=['POST'])
+@idempotent
+@admin_required()
+def api_clone_shifts():
+    data = request.get_json() or {}
+    try:
+        result = clone_shifts(
+            source_start=parse_date(data['source_start']),
+            source_end=parse_date(data['source_end']),
+            target_start=parse_date(data['target_start']),
+            copies=int(data.get('copies', 1)),
+            location=data.get('location'),
+            role=data.get('role'),
+        )
+    except KeyError as e:
+        return jsonify({"message": f"Missing field: {e}"}), 400
+    except WeeklyHoursExceeded as e:
+        return jsonify({"message": str(e), "weekly_hours": e.check}), 409
+    except ValueError as e:
+        return jsonify({"message": str(e)}), 400
+    return jsonify(result), 201
+
+# --- Admin: delete every shift (and its attendance) in a range ---
+@api.route('/admin/shifts/delete-range', methods=['POST'])
+@idempotent
+@admin_required()
+def api_delete_shift_range():
+    data = request.get_json() or {}
+    try:
+        result = delete_shifts_in_range(
+            start=parse_date(data['start']),
+            end=parse_date(data['end']),
+            user_id=int(data['user_id']) if data.get('user_id') is not None else None,
+            location=data.get('location'),
+            dry_run=bool(data.get('dry_run', False)),
+        )
+    except KeyError as e:
+        return jsonify({"message": f"Missing field: {e}"}), 400
+    except ValueError as e:
+        return jsonify({"message": str(e)}), 400
+    return jsonify(result), 200
 
 # --- Staff: combined roster ---
 @api.route('/roster', methods=['GET'])
@@ -61,10 +105,15 @@ def api_create_week():
 def api_roster():
     start = parse_date(request.args.get('start'))
     end = parse_date(request.args.get('end'))
-    return jsonify(get_roster(start, end)), 200
+    try:
+        fields = parse_fields(request.args.get('fields'), SHIFT_FIELDS)
+    except ValueError as e:
+        return jsonify({"message": str(e)}), 400
+    return jsonify(get_roster(start, end, fields=fields)), 200
 
 # --- Staff: time in/out ---
 @api.route('/attendance/clock-in', methods=['POST'])
+@idempotent
 @jwt_required() 
 def api_clock_in():
     user_id = get_jwt_identity()
@@ -75,6 +124,7 @@ def api_clock_in():
     return jsonify(att.get_json()), 200
 
 @api.route('/attendance/clock-out', methods=['POST'])
+@idempotent
 @jwt_required() 
 def api_clock_out():
     user_id = get_jwt_identity()
@@ -86,13 +136,50 @@ def api_clock_out():
 
 # --- Admin: weekly report ---
 @api.route('/admin/reports/weekly', methods=['GET'])
-@jwt_required() 
+@admin_required()
 def api_weekly_report():
-    if not is_admin():
-        return jsonify({"message": "Admin access required"}), 403
     week_start = parse_date(request.args.get('week_start'))
     return jsonify(weekly_report(week_start)), 200
 
+# --- Admin: staffing coverage heatmap ---
+@api.route('/admin/coverage', methods=['GET'])
+@admin_required()
+def api_coverage():
+    try:
+        coverage = get_coverage(
+            parse_date(request.args['start']),
+            parse_date(request.args['end']),
+            slot_minutes=request.args.get('slot', 15, type=int),
+            location=request.args.get('location'),
+        )
+    except KeyError as e:
+        return jsonify({"message": f"Missing query parameter: {e}"}), 400
+    except ValueError as e:
+        return jsonify({"message": str(e)}), 400
+    return jsonify(coverage), 200
+
+# --- Staff: delta sync for offline clients ---
+@api.route('/sync', methods=['GET'])
+@jwt_required()
+def api_sync():
+    since = request.args.get('since', type=int)
+    if request.args.get('since') and since is None:
+        return jsonify({"message": "since must be a cursor returned by /api/sync"}), 400
+    # staff only sync their own attendance; the roster is shared
+    user_id = None if is_admin_token() else int(get_jwt_identity())
+    return jsonify(get_changes(since, user_id=user_id)), 200
+
+# --- Batch: many API calls in one round trip (see App/batch.py) ---
+@api.route('/batch', methods=['POST'])
+@jwt_required()
+def api_batch():
+    data = request.get_json() or {}
+    try:
+        subrequests = parse_batch(data, current_app.config.get('BATCH_MAX_REQUESTS', 20))
+    except ValueError as e:
+        return jsonify({"message": str(e)}), 400
+    return jsonify({"responses": run_batch(subrequests, bool(data.get('concurrent_reads')))}), 200
+
 # helpers
 def _to_time(s: str) -> dtime:
     return dtime.fromisoformat(s)
@@ -0,0 +1,145 @@
+"""
+Several API calls in one HTTP round trip (POST /api/batch):
+
+    {"requests": [
+        {"id": "roster", "method": "GET", "path": "/api/roster?start=2025-03-03&end=2025-03-09"},
+        {"id": "in", "method": "POST", "path": "/api/attendance/clock-in", "body": {"shift_id": 10},
+         "headers": {"Idempotency-Key": "in-2025-03-03"}}
+     ],
+     "concurrent_reads": false}
+
+Sub-requests are dispatched to the views of the api, attendance_views and
+shift_views blueprints, in order, with the caller's credentials. They run
+inside the batch's app context, so they share its DB session and its JWT user
+resolution (the per-request user memo is kept across them). Each still goes
+through the app's before/after_request hooks (metrics, Idempotency-Key
+handling, query inspection); the batch's own request state in `g` is put back
+after every sub-request. A sub-request may set only the headers in
+SUB_REQUEST_HEADERS. A sub-request that ends in a non-2xx response has the
+shared session rolled back, so its uncommitted work never reaches the next one.
+
+With concurrent_reads, each run of consecutive GET sub-requests is executed in
+parallel (greenlets under gevent). A session can't be shared between them, so
+each of those reads gets its own app context, session and user lookup. Writes
+still run one at a time in order, so a read listed after a write sees it.
+
+    BATCH_MAX_REQUESTS = 20
+    BATCH_MAX_CONCURRENCY = 4
+"""
+import sys
+from concurrent.futures import ThreadPoolExecutor
+
+from flask import current_app, g, jsonify, request
+from werkzeug.test import EnvironBuilder
+
+from App.database import db
+
+BATCH_BLUEPRINTS = {"api", "attendance_views", "shift_views"}
+BATCH_ENDPOINT = "api.api_batch"
+READ_METHODS = {"GET", "HEAD"}
+# the caller's credentials, forwarded to every sub-request
+FORWARDED_HEADERS = ("Authorization", "Cookie")
+# headers a sub-request may set for itself
+SUB_REQUEST_HEADERS = {"Idempotency-Key"}
+# set in a sub-request's WSGI environ
+SUB_REQUEST_ENVIRON_KEY = "shiftmate.batch_subrequest"
+
+
+def parse_batch(payload, max_requests):
+    """Validate the batch body; raises ValueError with a client-facing message."""
+    subrequests = payload.get("requests")
+    if not isinstance(subrequests, list) or not subrequests:
+        raise ValueError("requests must be a non-empty list")
+    if len(subrequests) > max_requests:
+        raise ValueError(f"at most {max_requests} requests per batch")
+    parsed = []
+    for index, sub in enumerate(subrequests):
+        if not isinstance(sub, dict) or not isinstance(sub.get("path"), str) or not sub["path"].startswith("/"):
+            raise ValueError(f"requests[{index}] needs an absolute path")
+        headers = sub.get("headers") or {}
+        if not isinstance(headers, dict) or not set(headers) <= SUB_REQUEST_HEADERS or not all(
+            isinstance(value, str) for value in headers.values()
+        ):
+            raise ValueError(f"requests[{index}] may only set headers: {', '.join(sorted(SUB_REQUEST_HEADERS))}")
+        parsed.append({
+            "id": sub.get("id", index),
+            "method": str(sub.get("method", "GET")).upper(),
+            "path": sub["path"],
+            "body": sub.get("body"),
+            "headers": headers,
+        })
+    return parsed
+
+
+def _environ(sub):
+    headers = {name: request.headers[name] for name in FORWARDED_HEADERS if name in request.headers}
+    headers.update(sub["headers"])
+    builder = EnvironBuilder(
+        path=sub["path"], method=sub["method"], json=sub["body"], headers=headers,
+        base_url=request.host_url,
+        environ_base={"REMOTE_ADDR": request.remote_addr, SUB_REQUEST_ENVIRON_KEY: True},
+    )
+    try:
+        return builder.get_environ()
+    finally:
+        builder.close()
+
+
+def _result(response):
+    body = response.get_json(silent=True) if response.is_json else response.get_data(as_text=True)
+    headers = {name: value for name, value in response.headers.items() if name.lower() != "content-length"}
+    return {"status": response.status_code, "headers": headers, "body": body}
+
+
+def _dispatch(app, environ):
+    # the hooks below write their per-request state (metrics timer, query shapes,
+    # idempotency claim) to the batch's g; keep the batch's own copy
+    saved = dict(vars(g))
+    try:
+        with app.request_context(environ):
+            if request.routing_exception is None and (
+                request.blueprint not in BATCH_BLUEPRINTS or request.endpoint == BATCH_ENDPOINT
+            ):
+                return _result(app.make_response((jsonify(message="Route not available in a batch"), 404)))
+            try:
+                # before_request hooks, the view, error handlers and after_request hooks
+                response = app.full_dispatch_request()
+            except Exception:
+                app.log_exception(sys.exc_info())
+                response = app.make_response((jsonify(message="Internal server error"), 500))
+            if not 200 <= response.status_code < 300:
+                # a rejected or failed sub-request leaves nothing behind
+                db.session.rollback()
+            return _result(response)
+    finally:
+        vars(g).clear()
+        vars(g).update(saved)
+
+
+def _dispatch_isolated(app, environ):
+    with app.app_context():
+        return _dispatch(app, environ)
+
+
+def run_batch(subrequests, concurrent_reads=False):
+    app = current_app._get_current_object()
+    environs = [_environ(sub) for sub in subrequests]
+    results = [None] * len(subrequests)
+
+    i = 0
+    while i < len(subrequests):
+        j = i + 1
+        if concurrent_reads and subrequests[i]["method"] in READ_METHODS:
+            while j < len(subrequests) and subrequests[j]["method"] in READ_METHODS:
+                j += 1
+        if j - i > 1:
+            workers = min(j - i, app.config.get("BATCH_MAX_CONCURRENCY", 4))
+            with ThreadPoolExecutor(max_workers=workers) as pool:
+                results[i:j] = pool.map(lambda environ: _dispatch_isolated(app, environ), environs[i:j])
+        else:
+            results[i] = _dispatch(app, environs[i])
+        i = j
+
+    for sub, result in zip(subrequests, results):
+        result["id"] = sub["id"]
+    return results
@@ -0,0 +1,72 @@
+"""
+Negotiated response compression (brotli when available, else gzip) for
+responses at or above COMPRESS_MIN_SIZE bytes.
+
+    COMPRESS_ENABLED = True
+    COMPRESS_MIN_SIZE = 1024          # bytes; small bodies aren't worth the CPU
+    COMPRESS_GZIP_LEVEL = 6
+    COMPRESS_BROTLI_QUALITY = 4       # 4-5 is the usual speed/size sweet spot for dynamic content
+"""
+import gzip
+
+from flask import request
+
+try:
+    import brotli
+except ImportError:  # pragma: no cover - optional dependency
+    brotli = None
+
+COMPRESSIBLE_MIMETYPES = {
+    "application/json",
+    "application/javascript",
+    "text/html",
+    "text/css",
+    "text/csv",
+    "text/plain",
+    "text/javascript",
+}
+
+
+def choose_encoding(accept_encodings):
+    """Best encoding the client accepts, preferring brotli; None when neither is acceptable."""
+    candidates = (["br"] if brotli is not None else []) + ["gzip"]
+    best, best_quality = None, 0
+    for encoding in candidates:
+        quality = accept_encodings.quality(encoding)
+        if quality > best_quality:
+            best, best_quality = encoding, quality
+    return best
+
+
+def compress(body: bytes, encoding: str, config) -> bytes:
+    if encoding == "br":
+        return brotli.compress(body, quality=config.get("COMPRESS_BROTLI_QUALITY", 4))
+    return gzip.compress(body, compresslevel=config.get("COMPRESS_GZIP_LEVEL", 6))
+
+
+def init_compression(app):
+    if not app.config.get("COMPRESS_ENABLED", True):
+        return
+
+    @app.after_request
+    def compress_response(response):
+        response.vary.add("Accept-Encoding")
+        if (
+            response.direct_passthrough
+            or response.is_streamed
+            or response.status_code < 200
+            or response.status_code in (204, 206, 304)
+            or "Content-Encoding" in response.headers
+            or response.mimetype not in COMPRESSIBLE_MIMETYPES
+        ):
+            return response
+        length = response.content_length
+        if length is None or length < app.config.get("COMPRESS_MIN_SIZE", 1024):
+            return response
+        encoding = choose_encoding(request.accept_encodings)
+        if encoding is None:
+            return response
+
+        response.set_data(compress(response.get_data(), encoding, app.config))
+        response.headers["Content-Encoding"] = encoding
+        return response
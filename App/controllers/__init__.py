@@ -1,12 +1,19 @@
 from .user import *
 from .auth import *
-from App.controllers import initialize
 from .attendance_controller import *
 from .shift_controller import *
 from .report_controller import *
+from .backfill_controller import *
+from .seed_controller import *
+from .fieldsets import *
+from .sync_controller import *
+from .outbox_controller import *
+from .hours_controller import *
+from .maintenance_controller import *
+from .coverage_controller import *
 
 # JWT setup & auth context
-from .auth import setup_jwt, add_auth_context
+from .auth import setup_jwt, setup_login, add_auth_context
 
 from App.database import db
 from .user import create_user
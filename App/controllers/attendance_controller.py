@@ -1,10 +1,11 @@
 from __future__ import annotations
 
-from datetime import datetime
+from datetime import datetime, timedelta
 from typing import Optional, List
 
-from App.database import db
+from App.database import db, read_replica, retry_on_busy
 from App.models import Attendance, Shift, User
+from .fieldsets import ATTENDANCE_FIELDS, project_rows
 
 
 # ---------- helpers ----------
@@ -33,6 +34,7 @@ def _require_attendance(user_id: int, shift_id: int) -> Attendance:
 
 # ---------- CRUD / queries ----------
 
+@retry_on_busy
 def ensure_attendance_record(user_id: int, shift_id: int, *, approved: Optional[bool] = None) -> Attendance:
     """
     Idempotently create (or update) the Attendance record for a user+shift.
@@ -56,14 +58,29 @@ def ensure_attendance_record(user_id: int, shift_id: int, *, approved: Optional[
 def get_attendance(attendance_id: int) -> Optional[Attendance]:
     return db.session.get(Attendance, attendance_id)
 
+@read_replica
 def get_attendance_for_user(user_id: int) -> List[Attendance]:
     _require_user(user_id)
     return Attendance.query.filter_by(user_id=user_id).all()
 
+@read_replica
 def get_attendance_for_shift(shift_id: int) -> List[Attendance]:
     _require_shift(shift_id)
     return Attendance.query.filter_by(shift_id=shift_id).all()
 
+@read_replica
+def get_attendance_fields(fields: List[str], *, user_id: Optional[int] = None, shift_id: Optional[int] = None) -> List[dict]:
+    """Sparse-fieldset variant of get_attendance_for_user/shift: only `fields` are selected."""
+    criteria = []
+    if user_id is not None:
+        _require_user(user_id)
+        criteria.append(Attendance.user_id == user_id)
+    if shift_id is not None:
+        _require_shift(shift_id)
+        criteria.append(Attendance.shift_id == shift_id)
+    return project_rows(ATTENDANCE_FIELDS, Attendance, fields, *criteria, order_by=(Attendance.id,))
+
+@retry_on_busy
 def delete_attendance(attendance_id: int) -> bool:
     att = get_attendance(attendance_id)
     if not att:
@@ -75,6 +92,7 @@ def delete_attendance(attendance_id: int) -> bool:
 
 # ---------- clock actions ----------
 
+@retry_on_busy
 def clock_in(user_id: int, shift_id: int, when: Optional[datetime] = None) -> Attendance:
     """
     Set time_in if not already set. Returns Attendance (idempotent).
@@ -92,6 +110,7 @@ def clock_in(user_id: int, shift_id: int, when: Optional[datetime] = None) -> At
     db.session.commit()
     return att
 
+@retry_on_busy
 def clock_out(user_id: int, shift_id: int, when: Optional[datetime] = None) -> Attendance:
     """
     Set time_out if time_in exists and time_out not set. Returns Attendance.
@@ -113,15 +132,39 @@ def clock_out(user_id: int, shift_id: int, when: Optional[datetime] = None) -> A
     db.session.commit()
     return att
 
+@retry_on_busy
+def close_open_attendance(grace_hours: float = 4.0, now: Optional[datetime] = None) -> int:
+    """
+    Clock out attendance left open more than `grace_hours` past the shift's
+    scheduled end, at that end time. Left unapproved for a manager to check.
+    """
+    now = now or datetime.now()
+    cutoff = now - timedelta(hours=grace_hours)
+    rows = (
+        db.session.query(Attendance, Shift)
+        .join(Shift, Attendance.shift_id == Shift.id)
+        .filter(Attendance.time_in.isnot(None), Attendance.time_out.is_(None), Shift.work_date <= cutoff.date())
+    )
+    closed = 0
+    for att, shift in rows:
+        scheduled_end = datetime.combine(shift.work_date, shift.end_time)
+        if scheduled_end <= cutoff:
+            att.time_out = max(scheduled_end, att.time_in)
+            closed += 1
+    db.session.commit()
+    return closed
+
 
 # ---------- approval workflow (optional but useful for reports) ----------
 
+@retry_on_busy
 def approve_attendance(user_id: int, shift_id: int) -> Attendance:
     att = _require_attendance(user_id, shift_id)
     att.approved = True
     db.session.commit()
     return att
 
+@retry_on_busy
 def unapprove_attendance(user_id: int, shift_id: int) -> Attendance:
     att = _require_attendance(user_id, shift_id)
     att.approved = False
@@ -1,17 +1,171 @@
-from flask_jwt_extended import create_access_token, jwt_required, JWTManager, get_jwt_identity, verify_jwt_in_request
+import pickle
+from functools import wraps
 
+from flask import g, has_request_context, jsonify, request
+from flask_jwt_extended import create_access_token, jwt_required, JWTManager, get_jwt, get_jwt_identity, verify_jwt_in_request
+from sqlalchemy import event, inspect
+
+from App.batch import SUB_REQUEST_ENVIRON_KEY
+from App.cache import TTLCache
+from App.passwords import hash_password
 from App.models import User
 from App.database import db
 
+# Detached snapshots of recently seen users, shared by every request in this process.
+# invalidate_user only reaches this process: other workers keep a snapshot for up
+# to USER_CACHE_TTL seconds. Role and password changes bump token_version, and a
+# snapshot is only served to tokens of its own version, so those show up sooner.
+user_cache = TTLCache(maxsize=1024, ttl=60)
+# user id -> current token_version, consulted on every protected request (admin
+# routes included) by the blocklist check. A revocation reaches this process at
+# once; other workers honour it within TOKEN_VERSION_CACHE_TTL seconds.
+token_version_cache = TTLCache(maxsize=4096, ttl=30)
+
+def create_user_token(user):
+  """Access token carrying the role claims that admin checks authorize from."""
+  return create_access_token(
+    identity=str(user.id),
+    additional_claims={"is_admin": bool(user.isAdmin), "ver": user.token_version or 0},
+  )
+
 def login(username, password):
   result = db.session.execute(db.select(User).filter_by(username=username))
   user = result.scalar_one_or_none()
   if user and user.check_password(password):
-    return create_access_token(identity=str(user.id))
+    if user.password_needs_rehash():
+      # upgrade to the configured algorithm/cost while we still hold the plaintext;
+      # a bulk UPDATE skips the mapper hooks, so the rehash doesn't revoke tokens
+      db.session.execute(
+        db.update(User).where(User.id == user.id).values(password=hash_password(password))
+      )
+      db.session.commit()
+      invalidate_user(user.id)
+    return create_user_token(user)
   return None
 
+def is_admin_token():
+  return bool(get_jwt().get("is_admin"))
+
+def admin_required():
+  """Like jwt_required(), but also rejects tokens without the admin claim."""
+  def wrapper(fn):
+    @wraps(fn)
+    @jwt_required()
+    def decorator(*args, **kwargs):
+      if not is_admin_token():
+        return jsonify(message="Admin access required"), 403
+      return fn(*args, **kwargs)
+    return decorator
+  return wrapper
+
+def get_token_version(user_id):
+  version = token_version_cache.get(user_id)
+  if version is None:
+    version = db.session.execute(
+      db.select(User.token_version).filter_by(id=user_id)
+    ).scalar_one_or_none()
+    if version is None:
+      return None
+    token_version_cache.set(user_id, version)
+  return version
+
+def revoke_tokens(user):
+  """Invalidate every outstanding token of a user (e.g. on logout-everywhere)."""
+  user.token_version = (user.token_version or 0) + 1
+  db.session.commit()
+
+def _request_memo():
+  if not has_request_context():
+    return None
+  if "_user_memo" not in g:
+    g._user_memo = {}
+  return g._user_memo
+
+def load_user(user_id, token_version=None):
+  """
+  Resolve a user by id at most once per request, and without a query at all
+  while a fresh snapshot sits in user_cache. With `token_version` (the token's
+  "ver" claim) a snapshot of another version counts as a miss.
+  """
+  memo = _request_memo()
+  if memo is not None and user_id in memo:
+    return memo[user_id]
+
+  snapshot = user_cache.get(user_id)
+  if snapshot is not None and token_version is not None and (snapshot.token_version or 0) != token_version:
+    snapshot = None
+  if snapshot is not None:
+    user = db.session.merge(snapshot, load=False)
+  else:
+    user = db.session.get(User, user_id)
+    if user is not None and user not in db.session.dirty:
+      # a pickled round trip yields a detached copy that later commits won't expire
+      user_cache.set(user_id, pickle.loads(pickle.dumps(user)))
+
+  if memo is not None:
+    memo[user_id] = user
+  return user
+
+def invalidate_user(user_id):
+  user_cache.pop(user_id)
+  token_version_cache.pop(user_id)
+  memo = _request_memo()
+  if memo is not None:
+    memo.pop(user_id, None)
+
+@event.listens_for(User, "before_update")
+def _bump_token_version(_mapper, _connection, target):
+  # role claims live in the token, so changing them (or the password) must revoke it
+  state = inspect(target)
+  if state.attrs.isAdmin.history.has_changes() or state.attrs.password.history.has_changes():
+    if not state.attrs.token_version.history.has_changes():
+      target.token_version = (target.token_version or 0) + 1
+
+@event.listens_for(User, "after_update")
+@event.listens_for(User, "after_delete")
+def _invalidate_cached_user(_mapper, _connection, target):
+  invalidate_user(target.id)
+
+def get_current_user():
+  """Current JWT user or None, without raising when no valid token is present."""
+  if has_request_context() and "_current_user" in g:
+    return g._current_user
+  try:
+    verify_jwt_in_request(optional=True)
+    identity = get_jwt_identity()
+    user = load_user(int(identity), get_jwt().get("ver", 0)) if identity is not None else None
+  except Exception as e:
+    print(e)
+    user = None
+  if has_request_context():
+    g._current_user = user
+  return user
+
 def setup_jwt(app):
   jwt = JWTManager(app)
+  user_cache.configure(
+    maxsize=app.config.get("USER_CACHE_SIZE", 1024),
+    ttl=app.config.get("USER_CACHE_TTL", 60),
+  )
+  token_version_cache.configure(ttl=app.config.get("TOKEN_VERSION_CACHE_TTL", 30))
+
+  @app.before_request
+  def reset_user_memo():
+    if request.environ.get(SUB_REQUEST_ENVIRON_KEY):
+      return  # batch sub-requests share the batch's user resolution
+    # the app context (and so g) outlives a single request in CLI and test runs
+    g.pop("_user_memo", None)
+    g.pop("_current_user", None)
+    g.pop("_login_user", None)  # flask_login's per-request user
+
+  @jwt.token_in_blocklist_loader
+  def token_version_check(_jwt_header, jwt_data):
+    try:
+      user_id = int(jwt_data["sub"])
+    except (TypeError, ValueError):
+      return True
+    version = get_token_version(user_id)
+    return version is None or jwt_data.get("ver", 0) != version
 
   @jwt.user_identity_loader
   def user_identity_lookup(identity):
@@ -26,21 +180,22 @@ def setup_jwt(app):
       user_id = int(identity)
     except (TypeError, ValueError):
       return None
-    return db.session.get(User, user_id)
+    return load_user(user_id, jwt_data.get("ver", 0))
 
   return jwt
 
+def setup_login(app):
+  """
+  flask_login for the server-rendered pages (shift_views), resolved from the
+  same JWT cookie/header as every other route.
+  """
+  from flask_login import LoginManager
+  login_manager = LoginManager(app)
+  login_manager.request_loader(lambda _request: get_current_user())
+  return login_manager
+
 def add_auth_context(app):
   @app.context_processor
   def inject_user():
-      try:
-          verify_jwt_in_request()
-          identity = get_jwt_identity()
-          user_id = int(identity) if identity is not None else None
-          current_user = db.session.get(User, user_id) if user_id is not None else None
-          is_authenticated = current_user is not None
-      except Exception as e:
-          print(e)
-          is_authenticated = False
-          current_user = None
-      return dict(is_authenticated=is_authenticated, current_user=current_user)
\ No newline at end of file
+      current_user = get_current_user()
+      return dict(is_authenticated=current_user is not None, current_user=current_user)
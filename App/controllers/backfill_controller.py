@@ -0,0 +1,171 @@
+"""
+Historical Report rows for every week (and optionally every location) in a
+range, computed in a process pool:
+
+    flask report backfill --from 2023-01-02 --to 2024-12-29 --by location
+
+Weeks still to do are split into runs of at most `chunk_weeks` consecutive
+weeks (never across a checkpointed week). Each worker process builds its
+own app, so each has its own engine and reads from the replica when one is
+configured. A worker only reads and summarises its chunk. The parent writes
+each finished chunk's reports and its checkpoint rows in one commit. Reports
+are keyed on (start_date, end_date, scope), and checkpointed weeks are skipped,
+so an interrupted backfill can simply be run again.
+"""
+from __future__ import annotations
+
+import os
+from concurrent.futures import ProcessPoolExecutor, as_completed
+from datetime import date, datetime, timedelta
+from multiprocessing import get_context
+from typing import Callable, Optional
+
+from flask import current_app
+from sqlalchemy import insert, select
+
+from App.database import db
+from App.models import ReportBackfillCheckpoint, REPORT_SCOPE_ALL
+from .report_controller import _UPSERT_DIALECTS, get_report_rows, save_reports, summarize_by_scope
+
+# config copied into each worker's app
+_WORKER_CONFIG_PREFIXES = ("SQLALCHEMY_", "SQLITE_", "REPLICA_", "REPORT_")
+
+_worker_app = None
+
+
+def _init_worker(config: dict):
+    global _worker_app
+    from App.main import create_app
+    _worker_app = create_app(config, mode="cli")
+
+def _compute_chunk(weeks: list, by: Optional[str], overtime_after: float) -> list:
+    """Report rows for consecutive `weeks` (Mondays): one query, summarised per week and scope."""
+    rows = get_report_rows(weeks[0], weeks[-1] + timedelta(days=6))
+    by_week = {week: [] for week in weeks}
+    for row in rows:
+        by_week[row.work_date - timedelta(days=row.work_date.weekday())].append(row)
+    now = datetime.utcnow()
+    reports = []
+    for week, week_rows in by_week.items():
+        for scope, figures in summarize_by_scope(week_rows, by, overtime_after).items():
+            reports.append({
+                "start_date": week, "end_date": week + timedelta(days=6), "scope": scope,
+                "generated_at": now, "generated_by": None, **figures,
+            })
+    return reports
+
+def _compute_chunk_in_worker(weeks, by, overtime_after):
+    with _worker_app.app_context():
+        try:
+            return _compute_chunk(weeks, by, overtime_after)
+        finally:
+            db.session.remove()
+
+
+def _mondays(start: date, end: date) -> list:
+    week = start - timedelta(days=start.weekday())
+    weeks = []
+    while week <= end:
+        weeks.append(week)
+        week += timedelta(weeks=1)
+    return weeks
+
+def _chunks(weeks: list, chunk_weeks: int) -> list:
+    """
+    Split `weeks` into chunks of at most `chunk_weeks` consecutive weeks. A chunk
+    never spans a gap (a checkpointed week), since its query covers the whole span.
+    """
+    chunks = []
+    for week in weeks:
+        if chunks and len(chunks[-1]) < chunk_weeks and week - chunks[-1][-1] == timedelta(weeks=1):
+            chunks[-1].append(week)
+        else:
+            chunks.append([week])
+    return chunks
+
+def _completed_weeks(by_key: str, weeks: list) -> set:
+    stmt = select(ReportBackfillCheckpoint.week_start).where(
+        ReportBackfillCheckpoint.by == by_key,
+        ReportBackfillCheckpoint.week_start >= weeks[0],
+        ReportBackfillCheckpoint.week_start <= weeks[-1],
+    )
+    return set(db.session.scalars(stmt))
+
+def _save_chunk(by_key: str, weeks: list, reports: list, replace: bool):
+    save_reports(reports, replace=replace)
+    now = datetime.utcnow()
+    rows = [{"by": by_key, "week_start": week, "completed_at": now} for week in weeks]
+    connection = db.session.connection()
+    dialect_insert = _UPSERT_DIALECTS.get(connection.dialect.name)
+    if dialect_insert is not None:
+        connection.execute(dialect_insert(ReportBackfillCheckpoint.__table__).on_conflict_do_nothing(), rows)
+    else:
+        done = _completed_weeks(by_key, weeks)
+        fresh = [row for row in rows if row["week_start"] not in done]
+        if fresh:
+            connection.execute(insert(ReportBackfillCheckpoint.__table__), fresh)
+    # reports and checkpoint commit together: a crash never marks a week done without its rows
+    db.session.commit()
+
+def _worker_config(app) -> dict:
+    return {key: value for key, value in app.config.items() if key.startswith(_WORKER_CONFIG_PREFIXES)}
+
+
+def backfill_reports(
+    start: date,
+    end: date,
+    by: Optional[str] = None,
+    workers: Optional[int] = None,
+    chunk_weeks: int = 4,
+    force: bool = False,
+    progress: Optional[Callable[[list, int], None]] = None,
+) -> dict:
+    """
+    Write weekly Report rows for every week touching [start, end].
+
+    by:       None for all-staff reports only, 'location' to add one per location
+    workers:  worker processes (default: CPU count); 0 or 1 computes in this process
+    force:    recompute checkpointed weeks and overwrite their reports
+    progress: called with (weeks, report_count) after each chunk is saved
+    """
+    if end < start:
+        raise ValueError("end must not be before start")
+    if chunk_weeks < 1:
+        raise ValueError("chunk_weeks must be at least 1")
+    by_key = by or REPORT_SCOPE_ALL
+    weeks = _mondays(start, end)
+    done = set() if force else _completed_weeks(by_key, weeks)
+    todo = [week for week in weeks if week not in done]
+    chunks = _chunks(todo, chunk_weeks)
+    overtime_after = current_app.config.get("REPORT_OVERTIME_AFTER_HOURS", 40.0)
+    workers = (os.cpu_count() or 1) if workers is None else workers
+    computed = 0
+
+    def finish(chunk, reports):
+        nonlocal computed
+        _save_chunk(by_key, chunk, reports, replace=force)
+        computed += len(reports)
+        if progress:
+            progress(chunk, len(reports))
+
+    if workers <= 1 or len(chunks) <= 1:
+        for chunk in chunks:
+            finish(chunk, _compute_chunk(chunk, by, overtime_after))
+    else:
+        # spawn, not fork: a forked child would share this process's pooled connections
+        with ProcessPoolExecutor(
+            max_workers=min(workers, len(chunks)),
+            mp_context=get_context("spawn"),
+            initializer=_init_worker,
+            initargs=(_worker_config(current_app),),
+        ) as pool:
+            futures = {pool.submit(_compute_chunk_in_worker, chunk, by, overtime_after): chunk for chunk in chunks}
+            for future in as_completed(futures):
+                finish(futures[future], future.result())
+
+    return {
+        "weeks": len(weeks),
+        "skipped_weeks": len(weeks) - len(todo),
+        "chunks": len(chunks),
+        "reports": computed,
+    }
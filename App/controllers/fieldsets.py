@@ -0,0 +1,93 @@
+from typing import Callable, NamedTuple, Optional
+
+from sqlalchemy import select
+
+from App.database import db
+from App.models import Attendance, Shift, User
+
+
+# ---------- field specs ----------
+
+class Field(NamedTuple):
+    columns: tuple          # SQL columns the field is built from
+    render: Callable        # column values (same order) -> JSON value
+    join: object = None     # relationship to outer-join, only when the field is asked for
+
+
+def _value(value):
+    return value
+
+def _iso(value):
+    return value.isoformat() if value else None
+
+def _hhmm(value):
+    return value.strftime('%H:%M') if value else None
+
+def _hours(time_in, time_out):
+    if time_in and time_out:
+        return round(max((time_out - time_in).total_seconds() / 3600.0, 0.0), 2)
+    return 0.0
+
+
+# same names and formats as Shift.get_json / attendance_to_json
+SHIFT_FIELDS = {
+    'id': Field((Shift.id,), _value),
+    'user_id': Field((Shift.user_id,), _value),
+    'username': Field((User.username,), _value, join=Shift.user),
+    'date': Field((Shift.work_date,), _iso),
+    'start': Field((Shift.start_time,), _hhmm),
+    'end': Field((Shift.end_time,), _hhmm),
+    'role': Field((Shift.role,), _value),
+    'location': Field((Shift.location,), _value),
+}
+
+ATTENDANCE_FIELDS = {
+    'id': Field((Attendance.id,), _value),
+    'user_id': Field((Attendance.user_id,), _value),
+    'shift_id': Field((Attendance.shift_id,), _value),
+    'time_in': Field((Attendance.time_in,), _iso),
+    'time_out': Field((Attendance.time_out,), _iso),
+    'approved': Field((Attendance.approved,), bool),
+    'hours_worked': Field((Attendance.time_in, Attendance.time_out), _hours),
+}
+
+
+# ---------- parsing / projection ----------
+
+def parse_fields(raw: Optional[str], spec: dict):
+    """
+    'id,start,end' -> ['id', 'start', 'end'] (in the spec's order); None means
+    every field. Unknown names raise ValueError, listing what is available.
+    """
+    if not raw:
+        return None
+    names = {name.strip() for name in raw.split(',') if name.strip()}
+    unknown = names - spec.keys()
+    if unknown:
+        raise ValueError(f"Unknown fields: {', '.join(sorted(unknown))}. Available: {', '.join(spec)}")
+    return [name for name in spec if name in names]
+
+def select_fields(spec: dict, base, fields: list):
+    """SELECT of just the columns behind `fields`, joining only what they need."""
+    columns, joins = [], []
+    for name in fields:
+        field = spec[name]
+        columns.extend(c for c in field.columns if not any(c is seen for seen in columns))
+        if field.join is not None and field.join not in joins:
+            joins.append(field.join)
+    stmt = select(*columns).select_from(base)
+    for relationship in joins:
+        stmt = stmt.outerjoin(relationship)
+    return stmt, columns
+
+def project_rows(spec: dict, base, fields: list, *criteria, order_by=()):
+    stmt, columns = select_fields(spec, base, fields)
+    stmt = stmt.where(*criteria).order_by(*order_by)
+    plan = [
+        (name, spec[name].render, [next(i for i, c in enumerate(columns) if c is col) for col in spec[name].columns])
+        for name in fields
+    ]
+    return [
+        {name: render(*(row[i] for i in positions)) for name, render, positions in plan}
+        for row in db.session.execute(stmt)
+    ]
@@ -0,0 +1,113 @@
+from __future__ import annotations
+
+from datetime import date, time as dtime
+from typing import Optional
+
+from flask import current_app
+from sqlalchemy import delete, insert, select
+from sqlalchemy.exc import IntegrityError
+
+from App.database import db
+from App.models import Shift, WeeklyHours, add_weekly_hours, iso_week, shift_hours
+from App.models.weekly_hours import _UPSERT_DIALECTS
+
+HOURS_CAP_MODES = ("warn", "reject")
+
+
+class WeeklyHoursExceeded(ValueError):
+    """Raised by the scheduling guard when WEEKLY_HOURS_CAP_MODE is 'reject'."""
+
+    def __init__(self, check: dict):
+        self.check = check
+        super().__init__(
+            f"Shift would bring user {check['user_id']} to {check['hours_after']}h in "
+            f"{check['iso_year']}-W{check['iso_week']:02d} (cap {check['cap']}h)."
+        )
+
+
+def get_weekly_hours(user_id: int, work_date: date) -> float:
+    row = db.session.get(WeeklyHours, (user_id, *iso_week(work_date)))
+    return row.scheduled_hours if row else 0.0
+
+def lock_weekly_hours(user_id: int, work_date: date) -> float:
+    """
+    Scheduled hours for the week, holding its counter row until the transaction
+    ends so two schedulers can't both squeeze under the cap. The row is upserted
+    first: FOR UPDATE can't lock a row that doesn't exist yet, and on SQLite the
+    write itself takes the database's write lock. The plain Core select never
+    answers from the identity map.
+    """
+    year, week = iso_week(work_date)
+    table = WeeklyHours.__table__
+    key = {"user_id": user_id, "iso_year": year, "iso_week": week}
+    connection = db.session.connection()
+    dialect_insert = _UPSERT_DIALECTS.get(connection.dialect.name)
+    if dialect_insert is not None:
+        connection.execute(dialect_insert(table).values(**key, scheduled_hours=0.0).on_conflict_do_nothing())
+    else:
+        try:
+            with connection.begin_nested():
+                connection.execute(insert(table).values(**key, scheduled_hours=0.0))
+        except IntegrityError:
+            pass
+    stmt = select(table.c.scheduled_hours).filter_by(**key).with_for_update()
+    return connection.execute(stmt).scalar_one()
+
+def check_weekly_hours(user_id: int, work_date: date, start: dtime, end: dtime,
+                       replacing: Optional[Shift] = None) -> Optional[dict]:
+    """
+    Where a new shift would leave the user's ISO week against WEEKLY_HOURS_CAP
+    (default 40; None disables the check). One indexed lookup, however many
+    shifts the user already has. `replacing` is an existing shift being moved
+    or resized; its current hours are taken off first. Pass it before
+    changing its attributes.
+    """
+    cap = current_app.config.get("WEEKLY_HOURS_CAP", 40.0)
+    if cap is None:
+        return None
+    mode = current_app.config.get("WEEKLY_HOURS_CAP_MODE", "warn")
+    if mode not in HOURS_CAP_MODES:
+        raise ValueError(f"WEEKLY_HOURS_CAP_MODE must be one of {', '.join(HOURS_CAP_MODES)}")
+    year, week = iso_week(work_date)
+    scheduled = lock_weekly_hours(user_id, work_date)
+    if replacing is not None and replacing.user_id == user_id and iso_week(replacing.work_date) == (year, week):
+        scheduled -= shift_hours(replacing.work_date, replacing.start_time, replacing.end_time)
+    after = scheduled + shift_hours(work_date, start, end)
+    return {
+        "user_id": user_id,
+        "date": work_date.isoformat(),
+        "iso_year": year,
+        "iso_week": week,
+        "hours_before": round(scheduled, 2),
+        "hours_after": round(after, 2),
+        "cap": cap,
+        "over": after > cap + 1e-9,
+        "mode": mode,
+    }
+
+def guard_weekly_hours(user_id: int, work_date: date, start: dtime, end: dtime,
+                       replacing: Optional[Shift] = None) -> Optional[dict]:
+    """
+    check_weekly_hours, raising WeeklyHoursExceeded when over the cap in reject
+    mode. The transaction is rolled back first, releasing the counter row.
+    """
+    check = check_weekly_hours(user_id, work_date, start, end, replacing=replacing)
+    if check and check["over"] and check["mode"] == "reject":
+        db.session.rollback()
+        raise WeeklyHoursExceeded(check)
+    return check
+
+def rebuild_weekly_hours() -> int:
+    """
+    Recompute every counter from the shifts table (after bulk loads, or for
+    databases created before the counters existed). Returns the number of weeks.
+    """
+    totals = {}
+    rows = db.session.execute(select(Shift.user_id, Shift.work_date, Shift.start_time, Shift.end_time))
+    for user_id, work_date, start, end in rows:
+        key = (user_id, *iso_week(work_date))
+        totals[key] = totals.get(key, 0.0) + shift_hours(work_date, start, end)
+    db.session.execute(delete(WeeklyHours))
+    add_weekly_hours(db.session.connection(), totals)
+    db.session.commit()
+    return len(totals)
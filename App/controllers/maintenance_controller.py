@@ -0,0 +1,38 @@
+from datetime import date, timedelta
+from typing import Optional
+
+from sqlalchemy import func, select
+
+from App.database import db
+from App.models import JobRun
+from App.roster_cache import get_roster_cache
+from .backfill_controller import backfill_reports
+
+
+def get_job_runs(job: Optional[str] = None, limit: int = 50) -> list:
+    q = JobRun.query
+    if job is not None:
+        q = q.filter(JobRun.job == job)
+    return [run.get_json() for run in q.order_by(JobRun.started_at.desc(), JobRun.id.desc()).limit(limit)]
+
+def get_latest_job_runs() -> dict:
+    """The most recent run of each job, by job name."""
+    latest = select(JobRun.job, func.max(JobRun.id).label("id")).group_by(JobRun.job).subquery()
+    runs = JobRun.query.join(latest, JobRun.id == latest.c.id)
+    return {run.job: run.get_json() for run in runs}
+
+
+# ---------- maintenance tasks (see App/maintenance.py) ----------
+
+def rollup_recent_reports(weeks: int = 2, by: Optional[str] = "location") -> dict:
+    """Recompute the stored weekly reports for the last `weeks` weeks; late clock-outs change them."""
+    today = date.today()
+    return backfill_reports(today - timedelta(weeks=weeks), today, by=by, workers=0, force=True)
+
+def warm_roster_cache() -> dict:
+    """Load the roster window in this process ahead of the morning rush."""
+    cache = get_roster_cache()
+    if cache is None:
+        return {"enabled": False}
+    cache.refresh(force=True)
+    return cache.footprint()
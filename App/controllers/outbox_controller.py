@@ -0,0 +1,26 @@
+from datetime import datetime, timedelta
+
+from sqlalchemy import delete, func, select
+
+from App.database import db
+from App.models import OutboxEvent
+from App.models.outbox import DEAD, PENDING, SENT
+
+
+def get_outbox_stats() -> dict:
+    """Undelivered/dead event counts and the age of the oldest undelivered event."""
+    pending, oldest = db.session.execute(
+        select(func.count(OutboxEvent.id), func.min(OutboxEvent.created_at)).where(OutboxEvent.status == PENDING)
+    ).one()
+    dead = db.session.scalar(select(func.count(OutboxEvent.id)).where(OutboxEvent.status == DEAD))
+    lag = (datetime.utcnow() - oldest).total_seconds() if oldest else 0.0
+    return {"pending": pending, "dead": dead, "lag_seconds": round(lag, 3)}
+
+def purge_dispatched_outbox(older_than_days: int = 7) -> int:
+    """Delete delivered events older than `older_than_days`; dead ones are kept."""
+    cutoff = datetime.utcnow() - timedelta(days=older_than_days)
+    purged = db.session.execute(
+        delete(OutboxEvent).where(OutboxEvent.status == SENT, OutboxEvent.dispatched_at < cutoff)
+    ).rowcount
+    db.session.commit()
+    return purged
@@ -1,13 +1,23 @@
 
-from datetime import date, timedelta
+from datetime import date, datetime, timedelta
 
-from App.models import User, Shift, Attendance
-from App.database import db
-from sqlalchemy import and_
+from flask import current_app
+from App.models import User, Shift, Attendance, Report, REPORT_SCOPE_ALL
+from App.database import db, read_replica
+from sqlalchemy import and_, insert, select
+from sqlalchemy.dialects import postgresql, sqlite
+from sqlalchemy.orm import joinedload
 
+@read_replica
 def weekly_report(week_start: date):
     week_end = week_start + timedelta(days=6)
-    shifts = Shift.query.filter(and_(Shift.work_date >= week_start, Shift.work_date <= week_end)).all()
+    in_week = and_(Shift.work_date >= week_start, Shift.work_date <= week_end)
+    shifts = Shift.query.options(joinedload(Shift.user)).filter(in_week).all()
+    # one query for the whole week instead of one per shift
+    attendance = {
+        (a.shift_id, a.user_id): a
+        for a in Attendance.query.join(Shift, Attendance.shift_id == Shift.id).filter(in_week)
+    }
 
     report = {
         'week_start': week_start.isoformat(),
@@ -26,7 +36,7 @@ def weekly_report(week_start: date):
 
     for s in shifts:
         scheduled = s.duration_hours()
-        att = Attendance.query.filter_by(shift_id=s.id, user_id=s.user_id).first()
+        att = attendance.get((s.id, s.user_id))
         worked = att.hours_worked() if att else 0.0
 
         init_user(s.user)
@@ -45,4 +55,109 @@ def weekly_report(week_start: date):
         u['scheduled_hours'] = round(u['scheduled_hours'], 2)
         u['worked_hours'] = round(u['worked_hours'], 2)
 
-    return report
\ No newline at end of file
+    return report
+
+# ---------- stored Report rows ----------
+
+REPORT_BREAKDOWNS = ("location",)
+_STAT_COLUMNS = ("total_shifts", "total_hours", "attendance_rate", "overtime_hours")
+
+def location_scope(location) -> str:
+    return f"location:{location or 'unassigned'}"
+
+@read_replica
+def get_report_rows(start_date: date, end_date: date):
+    """One row per shift in the range: (user_id, work_date, location, time_in, time_out)."""
+    stmt = (
+        select(Shift.user_id, Shift.work_date, Shift.location, Attendance.time_in, Attendance.time_out)
+        .outerjoin(Attendance, and_(Attendance.shift_id == Shift.id, Attendance.user_id == Shift.user_id))
+        .where(Shift.work_date >= start_date, Shift.work_date <= end_date)
+    )
+    return db.session.execute(stmt).all()
+
+def summarize_report_rows(rows, overtime_after: float = 40.0) -> dict:
+    """
+    Report figures for a set of get_report_rows rows. Overtime is each user's
+    worked hours beyond `overtime_after` over the whole set.
+    """
+    attended = 0
+    worked = {}
+    for row in rows:
+        if row.time_in:
+            attended += 1
+        if row.time_in and row.time_out:
+            hours = max((row.time_out - row.time_in).total_seconds() / 3600.0, 0.0)
+            worked[row.user_id] = worked.get(row.user_id, 0.0) + hours
+    return {
+        "total_shifts": len(rows),
+        "total_hours": round(sum(worked.values()), 2),
+        "attendance_rate": round(100.0 * attended / len(rows), 2) if rows else 0.0,
+        "overtime_hours": round(sum(max(h - overtime_after, 0.0) for h in worked.values()), 2),
+    }
+
+def summarize_by_scope(rows, by=None, overtime_after: float = 40.0) -> dict:
+    """{scope: figures}; "all" is always present, `by='location'` adds one per location seen."""
+    summaries = {REPORT_SCOPE_ALL: summarize_report_rows(rows, overtime_after)}
+    if by == "location":
+        groups = {}
+        for row in rows:
+            groups.setdefault(location_scope(row.location), []).append(row)
+        for scope, group in groups.items():
+            summaries[scope] = summarize_report_rows(group, overtime_after)
+    elif by is not None:
+        raise ValueError(f"unknown report breakdown {by!r}; expected one of {', '.join(REPORT_BREAKDOWNS)}")
+    return summaries
+
+_UPSERT_DIALECTS = {"sqlite": sqlite.insert, "postgresql": postgresql.insert}
+
+def save_reports(rows: list, replace: bool = False):
+    """
+    Bulk-write Report rows keyed on (start_date, end_date, scope). Existing
+    reports are left alone unless `replace`, so re-running a backfill is safe.
+    Does not commit.
+    """
+    if not rows:
+        return
+    table = Report.__table__
+    connection = db.session.connection()
+    dialect_insert = _UPSERT_DIALECTS.get(connection.dialect.name)
+    if dialect_insert is not None:
+        stmt = dialect_insert(table)
+        key = [table.c.start_date, table.c.end_date, table.c.scope]
+        if replace:
+            stmt = stmt.on_conflict_do_update(
+                index_elements=key,
+                set_={name: stmt.excluded[name] for name in (*_STAT_COLUMNS, "generated_at", "generated_by")},
+            )
+        else:
+            stmt = stmt.on_conflict_do_nothing(index_elements=key)
+        connection.execute(stmt, rows)
+        return
+    for row in rows:
+        existing = Report.query.filter_by(
+            start_date=row["start_date"], end_date=row["end_date"], scope=row["scope"]
+        ).first()
+        if existing is None:
+            connection.execute(insert(table), row)
+        elif replace:
+            for name, value in row.items():
+                setattr(existing, name, value)
+
+def generate_weekly_report(start_date: date, end_date: date, generated_by=None):
+    """Compute and store the all-staff report for [start_date, end_date], replacing an earlier one."""
+    figures = summarize_report_rows(
+        get_report_rows(start_date, end_date),
+        current_app.config.get("REPORT_OVERTIME_AFTER_HOURS", 40.0),
+    )
+    save_reports([{
+        "start_date": start_date, "end_date": end_date, "scope": REPORT_SCOPE_ALL,
+        "generated_at": datetime.utcnow(), "generated_by": generated_by, **figures,
+    }], replace=True)
+    db.session.commit()
+    return Report.query.filter_by(start_date=start_date, end_date=end_date, scope=REPORT_SCOPE_ALL).first()
+
+def get_all_reports(scope=REPORT_SCOPE_ALL):
+    return Report.query.filter_by(scope=scope).order_by(Report.generated_at.desc()).all()
+
+def get_report_by_id(report_id: int):
+    return db.session.get(Report, report_id)
@@ -0,0 +1,127 @@
+from __future__ import annotations
+
+import random
+from datetime import date, datetime, time as dtime, timedelta
+from typing import Optional
+
+from sqlalchemy import insert
+
+from App.database import db
+from App.models import User, Shift, Attendance, next_change_seq, add_weekly_hours, iso_week, shift_hours
+from App.passwords import hash_password
+
+
+SEED_ROLES = ("cashier", "cook", "server", "supervisor", "cleaner")
+SEED_LOCATIONS = ("downtown", "uptown", "airport", "harbour")
+SEED_WINDOWS = (
+    (dtime(6, 0), dtime(14, 0)),
+    (dtime(9, 0), dtime(17, 0)),
+    (dtime(10, 0), dtime(16, 0)),
+    (dtime(14, 0), dtime(22, 0)),
+)
+
+
+def _jitter(rng: random.Random, moment: datetime, minutes: int) -> datetime:
+    return moment + timedelta(seconds=int(rng.gauss(0, minutes * 60)))
+
+
+def seed_bench_data(
+    users: int = 100,
+    weeks: int = 4,
+    *,
+    start: Optional[date] = None,
+    seed: int = 42,
+    shifts_per_week: int = 5,
+    attendance_rate: float = 0.92,
+    password: str = "benchpass",
+) -> dict:
+    """
+    Fill users, shifts and attendance at realistic densities for benchmarks.
+
+    Each user works `shifts_per_week` days a week at a stable role/location.
+    Past shifts are clocked in/out around the scheduled times (a few are left
+    open), future ones only get the empty Attendance placeholder that
+    schedule_shift would create. Weeks are written with bulk INSERTs, one
+    commit per week. The same `seed` always produces the same data.
+    """
+    rng = random.Random(seed)
+    today = date.today()
+    if start is None:
+        # half the range in the past (with attendance), half in the future
+        start = today - timedelta(days=today.weekday()) - timedelta(weeks=weeks // 2)
+
+    # one hash shared by every seeded user; hashing thousands would dominate seeding
+    pwhash = hash_password(password)
+    offset = User.query.filter(User.username.startswith("bench")).count()
+    user_rows = [
+        {
+            "username": f"bench{offset + n:06d}",
+            "password": pwhash,
+            "isAdmin": offset + n == 0,
+            "token_version": 0,
+        }
+        for n in range(users)
+    ]
+    user_ids = db.session.scalars(
+        insert(User).returning(User.id, sort_by_parameter_order=True), user_rows
+    ).all()
+    profiles = {
+        uid: (rng.choice(SEED_ROLES), rng.choice(SEED_LOCATIONS), rng.choice(SEED_WINDOWS))
+        for uid in user_ids
+    }
+    db.session.commit()
+
+    shift_count = attendance_count = 0
+    for week in range(weeks):
+        week_start = start + timedelta(weeks=week)
+        # bulk INSERTs skip the flush hooks, so stamp the week's change number
+        # and keep the weekly hours counters in step here
+        seq = next_change_seq(db.session.connection())
+        shift_rows = []
+        for uid, (role, location, window) in profiles.items():
+            for day in sorted(rng.sample(range(7), min(shifts_per_week, 7))):
+                # most people keep their usual window, some swap for the day
+                shift_start, shift_end = window if rng.random() < 0.8 else rng.choice(SEED_WINDOWS)
+                shift_rows.append({
+                    "user_id": uid,
+                    "work_date": week_start + timedelta(days=day),
+                    "start_time": shift_start,
+                    "end_time": shift_end,
+                    "role": role,
+                    "location": location if rng.random() < 0.9 else rng.choice(SEED_LOCATIONS),
+                    "change_seq": seq,
+                })
+        if not shift_rows:
+            continue
+        shift_ids = db.session.scalars(
+            insert(Shift).returning(Shift.id, sort_by_parameter_order=True), shift_rows
+        ).all()
+
+        attendance_rows = []
+        for shift_id, row in zip(shift_ids, shift_rows):
+            att = {"shift_id": shift_id, "user_id": row["user_id"], "time_in": None, "time_out": None,
+                   "approved": False, "change_seq": seq}
+            if row["work_date"] < today and rng.random() < attendance_rate:
+                att["time_in"] = _jitter(rng, datetime.combine(row["work_date"], row["start_time"]), 6)
+                if rng.random() < 0.97:
+                    att["time_out"] = max(att["time_in"], _jitter(rng, datetime.combine(row["work_date"], row["end_time"]), 10))
+                att["approved"] = rng.random() < 0.7
+            attendance_rows.append(att)
+        db.session.execute(insert(Attendance), attendance_rows)
+        hours = {}
+        for row in shift_rows:
+            key = (row["user_id"], *iso_week(row["work_date"]))
+            hours[key] = hours.get(key, 0.0) + shift_hours(row["work_date"], row["start_time"], row["end_time"])
+        add_weekly_hours(db.session.connection(), hours)
+        db.session.commit()
+
+        shift_count += len(shift_rows)
+        attendance_count += len(attendance_rows)
+
+    return {
+        "users": len(user_ids),
+        "shifts": shift_count,
+        "attendance": attendance_count,
+        "start": start.isoformat(),
+        "end": (start + timedelta(weeks=weeks, days=-1)).isoformat(),
+    }
@@ -1,10 +1,28 @@
 from datetime import datetime, date, timedelta, time as dtime
+from typing import Optional
 
-from App.models import Shift, Attendance
-from App.database import db 
+from flask import current_app
+from sqlalchemy import Integer, String, cast, delete, func, insert, literal, select, true, union_all
+from sqlalchemy.dialects import postgresql, sqlite
 
+from App.models import (
+    Shift, Attendance, Tombstone, WeeklyHours, SYNCED_MODELS,
+    next_change_seq, add_weekly_hours, iso_week, shift_hours,
+)
+from App.models.outbox import write_outbox_rows
+from App.database import db, retry_on_busy
+from App.roster_cache import get_roster_cache
+from .hours_controller import WeeklyHoursExceeded, guard_weekly_hours
 
-def schedule_shift(user_id: int, work_date: date, start: dtime, end: dtime, role=None, location=None):
+
+@retry_on_busy
+def schedule_shift_with_check(user_id: int, work_date: date, start: dtime, end: dtime, role=None, location=None):
+    """
+    Create a shift and its attendance placeholder, or update the role/location
+    of the identical shift if it already exists. Returns (shift, check): the
+    weekly hours check for a new shift, None for an existing one or with the
+    cap disabled. Raises WeeklyHoursExceeded in reject mode.
+    """
     existing = Shift.query.filter_by(
         user_id=user_id,
         work_date=work_date,
@@ -17,8 +35,9 @@ def schedule_shift(user_id: int, work_date: date, start: dtime, end: dtime, role
         if location is not None:
             existing.location = location
         db.session.commit()
-        return existing
+        return existing, None
 
+    check = guard_weekly_hours(user_id, work_date, start, end)
     shift = Shift(
         user_id=user_id,
         work_date=work_date,
@@ -28,11 +47,223 @@ def schedule_shift(user_id: int, work_date: date, start: dtime, end: dtime, role
         location=location
     )
     db.session.add(shift)
+    db.session.flush()
+    # one commit for both: a retry after a busy error must never find the shift without its attendance
+    db.session.add(Attendance(shift_id=shift.id, user_id=user_id))
     db.session.commit()
+    return shift, check
 
-    att = Attendance.query.filter_by(shift_id=shift.id, user_id=user_id).first()
-    if not att:
-        db.session.add(Attendance(shift_id=shift.id, user_id=user_id))
-        db.session.commit()
+def schedule_shift(user_id: int, work_date: date, start: dtime, end: dtime, role=None, location=None):
+    """schedule_shift_with_check, for callers that only want the shift."""
+    return schedule_shift_with_check(user_id, work_date, start, end, role, location)[0]
+
+SHIFT_EDITABLE = ("work_date", "start_time", "end_time", "role", "location")
+
+@retry_on_busy
+def update_shift(shift_id: int, changes: dict):
+    """
+    Apply `changes` (keys from SHIFT_EDITABLE) to a shift. Moving or resizing
+    it goes through the weekly hours guard, like scheduling a new one.
+    Returns (shift, check), or (None, None) when the shift doesn't exist.
+    """
+    unknown = set(changes) - set(SHIFT_EDITABLE)
+    if unknown:
+        raise ValueError(f"Can't change {', '.join(sorted(unknown))} on a shift")
+    shift = db.session.get(Shift, shift_id)
+    if shift is None:
+        return None, None
+    check = None
+    window = [changes.get(name, getattr(shift, name)) for name in ("work_date", "start_time", "end_time")]
+    if window != [shift.work_date, shift.start_time, shift.end_time]:
+        check = guard_weekly_hours(shift.user_id, *window, replacing=shift)
+    for name, value in changes.items():
+        setattr(shift, name, value)
+    db.session.commit()
+    return shift, check
+
+@retry_on_busy
+def delete_shift(shift_id: int) -> bool:
+    """Delete a shift and its attendance rows; both leave tombstones for /api/sync."""
+    shift = db.session.get(Shift, shift_id)
+    if not shift:
+        return False
+    for att in Attendance.query.filter_by(shift_id=shift_id):
+        db.session.delete(att)
+    db.session.delete(shift)
+    db.session.commit()
+    return True
+
+
+@retry_on_busy
+def delete_shifts_in_range(start: date, end: date, user_id: Optional[int] = None,
+                           location: Optional[str] = None, dry_run: bool = False) -> dict:
+    """
+    Delete the shifts in [start, end] (optionally one user's or one
+    location's) and their attendance, in one transaction of set-based
+    statements. `dry_run` only counts. "clocked_in" counts the attendance
+    being deleted that has a time_in, i.e. real worked time.
+
+    Like delete_shift it leaves tombstones, outbox events and weekly hours
+    deltas; here they are written in bulk, since Core deletes skip the flush hooks.
+    """
+    if end < start:
+        raise ValueError("end must not be before start")
+    shifts, attendance = Shift.__table__, Attendance.__table__
+    criteria = [shifts.c.work_date >= start, shifts.c.work_date <= end]
+    if user_id is not None:
+        criteria.append(shifts.c.user_id == user_id)
+    if location is not None:
+        criteria.append(shifts.c.location == location)
+    in_range = attendance.c.shift_id.in_(select(shifts.c.id).where(*criteria))
+
+    connection = db.session.connection()
+    # the rows are needed for outbox payloads and hours; FOR UPDATE (Postgres) holds them until the delete
+    shift_rows = connection.execute(select(shifts).where(*criteria).with_for_update()).mappings().all()
+    attendance_rows = connection.execute(select(attendance).where(in_range)).mappings().all()
+    result = {
+        "dry_run": dry_run,
+        "shifts": len(shift_rows),
+        "attendance": len(attendance_rows),
+        "clocked_in": sum(1 for row in attendance_rows if row["time_in"] is not None),
+    }
+    if dry_run or not shift_rows:
+        db.session.rollback()
+        return result
+
+    seq = next_change_seq(connection)
+    now = datetime.utcnow()
+    tombstone_columns = ["entity", "entity_id", "user_id", "change_seq", "deleted_at"]
+    connection.execute(insert(Tombstone.__table__).from_select(tombstone_columns, select(
+        literal(SYNCED_MODELS[Attendance]), attendance.c.id, attendance.c.user_id, literal(seq), literal(now)).where(in_range)))
+    connection.execute(insert(Tombstone.__table__).from_select(tombstone_columns, select(
+        literal(SYNCED_MODELS[Shift]), shifts.c.id, shifts.c.user_id, literal(seq), literal(now)).where(*criteria)))
+    write_outbox_rows(connection, Attendance, "deleted", attendance_rows)
+    write_outbox_rows(connection, Shift, "deleted", shift_rows)
+    hours = {}
+    for row in shift_rows:
+        key = (row["user_id"], *iso_week(row["work_date"]))
+        hours[key] = hours.get(key, 0.0) - shift_hours(row["work_date"], row["start_time"], row["end_time"])
+    add_weekly_hours(connection, hours)
+
+    # attendance first: its shift_id is NOT NULL and references the shift
+    connection.execute(delete(attendance).where(in_range))
+    connection.execute(delete(shifts).where(*criteria))
+    db.session.commit()
+    cache = get_roster_cache()
+    if cache is not None:
+        cache.invalidate()
+    return result
+
+
+# ---------- cloning ----------
+
+# dialect -> (insert with ON CONFLICT, date column + integer days column)
+_CLONE_DIALECTS = {
+    "sqlite": (sqlite.insert, lambda column, days: func.date(column, literal("+") + cast(days, String) + " days")),
+    "postgresql": (postgresql.insert, lambda column, days: column + days),
+}
+
+def _over_cap(keys: set) -> list:
+    cap = current_app.config.get("WEEKLY_HOURS_CAP", 40.0)
+    if cap is None or not keys:
+        return []
+    rows = WeeklyHours.query.filter(
+        WeeklyHours.user_id.in_({user_id for user_id, _, _ in keys}),
+        WeeklyHours.scheduled_hours > cap + 1e-9,
+    )
+    return [
+        {"user_id": row.user_id, "iso_year": row.iso_year, "iso_week": row.iso_week,
+         "hours_after": round(row.scheduled_hours, 2), "cap": cap,
+         "mode": current_app.config.get("WEEKLY_HOURS_CAP_MODE", "warn"), "over": True}
+        for row in rows if (row.user_id, row.iso_year, row.iso_week) in keys
+    ]
+
+@retry_on_busy
+def clone_shifts(source_start: date, source_end: date, target_start: date, copies: int = 1,
+                 location: Optional[str] = None, role: Optional[str] = None) -> dict:
+    """
+    Copy the shifts in [source_start, source_end] (optionally one location or
+    role) to `target_start`, `copies` times back to back, each copy one
+    source period (whole weeks) after the previous one.
+
+    One INSERT ... SELECT writes every copy; shifts already in a target
+    window (uq_user_shift_window) are skipped. A second INSERT ... SELECT adds
+    their attendance placeholders. Both are in the same transaction as the
+    change number, outbox events and weekly hours they need, since these
+    statements bypass the ORM flush hooks. In WEEKLY_HOURS_CAP_MODE 'reject'
+    the clone is rolled back if it takes anyone over the cap.
+    """
+    if source_end < source_start:
+        raise ValueError("source_end must not be before source_start")
+    if target_start <= source_end:
+        raise ValueError("target_start must be after the source range")
+    if (target_start - source_start).days % 7:
+        raise ValueError("target_start must fall on the same weekday as source_start")
+    if copies < 1:
+        raise ValueError("copies must be at least 1")
+    connection = db.session.connection()
+    if connection.dialect.name not in _CLONE_DIALECTS:
+        raise ValueError(f"cloning needs SQLite or PostgreSQL, not {connection.dialect.name}")
+    dialect_insert, plus_days = _CLONE_DIALECTS[connection.dialect.name]
+
+    period = ((source_end - source_start).days // 7 + 1) * 7
+    first = (target_start - source_start).days
+    offsets = union_all(*(
+        select(literal(first + copy * period, Integer).label("days")) for copy in range(copies)
+    )).subquery("offsets")
+
+    shifts, attendance = Shift.__table__, Attendance.__table__
+    criteria = [shifts.c.work_date >= source_start, shifts.c.work_date <= source_end]
+    if location is not None:
+        criteria.append(shifts.c.location == location)
+    if role is not None:
+        criteria.append(shifts.c.role == role)
+    source_count = db.session.scalar(select(func.count()).select_from(shifts).where(*criteria))
+
+    seq = next_change_seq(connection)
+    columns = ["user_id", "work_date", "start_time", "end_time", "role", "location", "change_seq"]
+    copied = select(
+        shifts.c.user_id, plus_days(shifts.c.work_date, offsets.c.days), shifts.c.start_time,
+        shifts.c.end_time, shifts.c.role, shifts.c.location, literal(seq),
+    ).select_from(shifts.join(offsets, true())).where(*criteria)
+    connection.execute(
+        dialect_insert(shifts).from_select(columns, copied)
+        .on_conflict_do_nothing(index_elements=[shifts.c.user_id, shifts.c.work_date,
+                                                shifts.c.start_time, shifts.c.end_time])
+    )
+    # this transaction's change number marks exactly the rows that went in
+    connection.execute(
+        insert(attendance).from_select(
+            ["shift_id", "user_id", "approved", "change_seq"],
+            select(shifts.c.id, shifts.c.user_id, literal(False), literal(seq)).where(shifts.c.change_seq == seq),
+        )
+    )
+
+    created = connection.execute(select(shifts).where(shifts.c.change_seq == seq)).mappings().all()
+    placeholders = connection.execute(select(attendance).where(attendance.c.change_seq == seq)).mappings().all()
+    write_outbox_rows(connection, Shift, "created", created)
+    write_outbox_rows(connection, Attendance, "created", placeholders)
+    hours = {}
+    for row in created:
+        key = (row["user_id"], *iso_week(row["work_date"]))
+        hours[key] = hours.get(key, 0.0) + shift_hours(row["work_date"], row["start_time"], row["end_time"])
+    add_weekly_hours(connection, hours)
+
+    over_cap = _over_cap(set(hours))
+    if over_cap and over_cap[0]["mode"] == "reject":
+        db.session.rollback()
+        raise WeeklyHoursExceeded(over_cap[0])
+    db.session.commit()
+    cache = get_roster_cache()
+    if cache is not None:
+        cache.invalidate()
 
-    return shift
\ No newline at end of file
+    return {
+        "source_shifts": source_count,
+        "copies": copies,
+        "targets": [(source_start + timedelta(days=first + copy * period)) for copy in range(copies)],
+        "created": len(created),
+        "skipped": source_count * copies - len(created),
+        "attendance_created": len(placeholders),
+        "over_cap": over_cap,
+    }
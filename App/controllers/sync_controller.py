@@ -0,0 +1,66 @@
+from __future__ import annotations
+
+from datetime import datetime, timedelta
+from typing import Optional
+
+from sqlalchemy import delete, func, or_, select
+from sqlalchemy.orm import joinedload
+
+from App.database import db, read_replica
+from App.models import Attendance, Shift, SyncCounter, Tombstone, SYNCED_MODELS
+
+
+@read_replica
+def get_changes(since: Optional[int] = None, user_id: Optional[int] = None) -> dict:
+    """
+    Shifts and attendance written after cursor `since`, plus ids deleted since
+    then; apply `deleted` before the upserts. Without a cursor, or one older
+    than the purged tombstones, everything is returned with full=True and the
+    client should replace its copy. `user_id` limits attendance, and attendance
+    deletions, to one user.
+
+    The cursor is read before the rows: a change committed in between shows
+    up again on the next sync rather than being skipped.
+    """
+    counter = db.session.get(SyncCounter, 1)
+    cursor, floor = counter.value, counter.tombstone_floor
+    full = not since or since < floor
+
+    shifts = Shift.query.options(joinedload(Shift.user))
+    attendance = Attendance.query
+    if user_id is not None:
+        attendance = attendance.filter(Attendance.user_id == user_id)
+    deleted = {"shifts": [], "attendance": []}
+    if not full:
+        shifts = shifts.filter(Shift.change_seq > since)
+        attendance = attendance.filter(Attendance.change_seq > since)
+        tombstones = select(Tombstone.entity, Tombstone.entity_id).where(Tombstone.change_seq > since)
+        if user_id is not None:
+            tombstones = tombstones.where(or_(
+                Tombstone.entity != SYNCED_MODELS[Attendance], Tombstone.user_id == user_id,
+            ))
+        for entity, entity_id in db.session.execute(tombstones.order_by(Tombstone.change_seq)):
+            deleted[entity].append(entity_id)
+
+    return {
+        "cursor": str(max(cursor, since or 0)),
+        "full": full,
+        "shifts": [s.get_json() for s in shifts.order_by(Shift.change_seq, Shift.id)],
+        "attendance": [a.get_json() for a in attendance.order_by(Attendance.change_seq, Attendance.id)],
+        "deleted": deleted,
+    }
+
+def purge_tombstones(older_than_days: int = 30) -> int:
+    """
+    Drop old tombstones. Cursors at or below the newest purged one can no
+    longer be served incrementally and get a full resync instead.
+    """
+    cutoff = datetime.utcnow() - timedelta(days=older_than_days)
+    newest = db.session.scalar(select(func.max(Tombstone.change_seq)).where(Tombstone.deleted_at < cutoff))
+    if newest is None:
+        return 0
+    purged = db.session.execute(delete(Tombstone).where(Tombstone.change_seq <= newest)).rowcount
+    counter = db.session.get(SyncCounter, 1)
+    counter.tombstone_floor = max(counter.tombstone_floor, newest)
+    db.session.commit()
+    return purged
@@ -1,8 +1,10 @@
 from App.models import User
-from App.database import db
+from App.database import db, read_replica, retry_on_busy
 from datetime import datetime, date, timedelta, time as dtime
 from sqlalchemy import and_, or_
+from sqlalchemy.orm import joinedload
 
+@retry_on_busy
 def create_user(username, password, isAdmin=False):
     newuser = User(username=username, password=password, isAdmin=isAdmin)
     db.session.add(newuser)
@@ -18,6 +20,7 @@ def get_user(id):
 def get_all_users():
     return User.query.all()
 
+@read_replica
 def get_all_users_json():
     users = User.query.all()
     if not users:
@@ -25,6 +28,30 @@ def get_all_users_json():
     users = [user.get_json() for user in users]
     return users
 
+def _username_prefix_filter(stmt, q):
+    # LIKE 'q%' is served by ix_users_username_prefix (text_pattern_ops on Postgres)
+    if q:
+        stmt = stmt.where(User.username.startswith(q, autoescape=True))
+    return stmt
+
+@read_replica
+def get_users_page(page=1, per_page=50, q=None):
+    """One page of users ordered by username, optionally limited to a username prefix."""
+    stmt = _username_prefix_filter(db.select(User).order_by(User.username), q)
+    return db.paginate(stmt, page=page, per_page=per_page, max_per_page=200, error_out=False)
+
+@read_replica
+def get_user_options(q=None, limit=50):
+    """
+    Lightweight id/username pairs for dropdowns, without loading full User rows.
+    limit=None returns every match, for forms that have no search box to narrow it.
+    """
+    stmt = _username_prefix_filter(db.select(User.id, User.username).order_by(User.username), q)
+    if limit is not None:
+        stmt = stmt.limit(max(1, min(limit, 200)))
+    return [{'id': row.id, 'username': row.username} for row in db.session.execute(stmt)]
+
+@retry_on_busy
 def update_user(id, username):
     user = get_user(id)
     if user:
@@ -41,49 +68,22 @@ def update_user(id, username):
 
 from App.models import User, Shift, Attendance
 from App.database import db
+from .fieldsets import SHIFT_FIELDS, project_rows
+from .hours_controller import WeeklyHoursExceeded
+from .shift_controller import schedule_shift_with_check
+from App.roster_cache import get_roster_cache
 
 
-def schedule_shift(user_id: int, work_date: date, start: dtime, end: dtime, role=None, location=None):
-    existing = Shift.query.filter_by(
-        user_id=user_id,
-        work_date=work_date,
-        start_time=start,
-        end_time=end
-    ).first()
-    if existing:
-        if role is not None:
-            existing.role = role
-        if location is not None:
-            existing.location = location
-        db.session.commit()
-        return existing
-
-    shift = Shift(
-        user_id=user_id,
-        work_date=work_date,
-        start_time=start,
-        end_time=end,
-        role=role,
-        location=location
-    )
-    db.session.add(shift)
-    db.session.commit()
-
-    att = Attendance.query.filter_by(shift_id=shift.id, user_id=user_id).first()
-    if not att:
-        db.session.add(Attendance(shift_id=shift.id, user_id=user_id))
-        db.session.commit()
-
-    return shift
-
 def schedule_week(user_id: int, week_start: date, daily_windows: dict, role=None, location=None, skip_existing=True):
     """
     daily_windows:
       {0: ("09:00","17:00"), 1: ("09:00","17:00"), 2: None, ...}
 
     skip_existing=True => duplicates are skipped/updated (no error)
+    Days over the weekly hours cap are listed under "warnings" (warn mode)
+    or left out and listed under "rejected" (reject mode).
     """
-    created, skipped = [], []
+    created, skipped, warnings, rejected = [], [], [], []
     for offset in range(7):
         pair = daily_windows.get(offset)
         if not pair:
@@ -110,18 +110,42 @@ def schedule_week(user_id: int, week_start: date, daily_windows: dict, role=None
             else:
                 raise ValueError("Duplicate shift exists")
 
-        created.append(
-            schedule_shift(user_id, work_day, start, end, role, location)
-        )
+        try:
+            shift, check = schedule_shift_with_check(user_id, work_day, start, end, role, location)
+        except WeeklyHoursExceeded as exc:
+            rejected.append(exc.check)
+            continue
+        created.append(shift)
+        if check and check["over"]:
+            warnings.append(check)
 
     return {"created": [s.get_json() for s in created],
-            "skipped": [s.get_json() for s in skipped]}
+            "skipped": [s.get_json() for s in skipped],
+            "warnings": warnings,
+            "rejected": rejected}
 
-def get_roster(start_date: date, end_date: date):
-    q = Shift.query.filter(and_(Shift.work_date >= start_date, Shift.work_date <= end_date))\
-                   .order_by(Shift.work_date.asc(), Shift.start_time.asc())
+@read_replica
+def get_roster(start_date: date, end_date: date, fields=None, user_id=None):
+    """
+    Shifts in [start_date, end_date] as dicts. `fields` (see parse_fields) limits
+    both the selected columns and the keys; users is only joined for 'username'.
+    Ranges inside the hot window are served from the roster cache.
+    """
+    cache = get_roster_cache()
+    if cache is not None:
+        cached = cache.roster(start_date, end_date, fields=fields, user_id=user_id)
+        if cached is not None:
+            return cached
+    criteria = [Shift.work_date >= start_date, Shift.work_date <= end_date]
+    if user_id is not None:
+        criteria.append(Shift.user_id == user_id)
+    order = (Shift.work_date.asc(), Shift.start_time.asc())
+    if fields is not None:
+        return project_rows(SHIFT_FIELDS, Shift, fields, *criteria, order_by=order)
+    q = Shift.query.options(joinedload(Shift.user)).filter(and_(*criteria)).order_by(*order)
     return [s.get_json() for s in q.all()]
 
+@retry_on_busy
 def clock_in(user_id: int, shift_id: int, when: datetime | None = None):
     when = when or datetime.now()
     att = Attendance.query.filter_by(shift_id=shift_id, user_id=user_id).first()
@@ -133,6 +157,7 @@ def clock_in(user_id: int, shift_id: int, when: datetime | None = None):
     db.session.commit()
     return att
 
+@retry_on_busy
 def clock_out(user_id: int, shift_id: int, when: datetime | None = None):
     when = when or datetime.now()
     att = Attendance.query.filter_by(shift_id=shift_id, user_id=user_id).first()
@@ -1,14 +1,457 @@
+import os
+import random
+import threading
+import time
+import weakref
+from contextvars import ContextVar
+from functools import wraps
+
+from flask import current_app, has_app_context, has_request_context, session as cookie_session
 from flask_sqlalchemy import SQLAlchemy
-from flask_migrate import Migrate
+from flask_sqlalchemy.session import Session
+from sqlalchemy import event, text
+from sqlalchemy.engine import make_url
+from sqlalchemy.exc import OperationalError, TimeoutError as PoolTimeoutError
+from sqlalchemy.pool import QueuePool
+
+
+class MeteredQueuePool(QueuePool):
+    """QueuePool that also records how long callers wait for a connection."""
+
+    wait_count = 0
+    wait_total = 0.0
+    wait_max = 0.0
+    timeouts = 0
+
+    def _do_get(self):
+        started = time.perf_counter()
+        try:
+            return super()._do_get()
+        except PoolTimeoutError:
+            self.timeouts += 1
+            raise
+        finally:
+            waited = time.perf_counter() - started
+            self.wait_count += 1
+            self.wait_total += waited
+            self.wait_max = max(self.wait_max, waited)
+
+
+REPLICA_BIND = 'replica'
+# signed-cookie key holding the time.time() until which the caller reads the primary
+PRIMARY_UNTIL_KEY = 'primary_until'
+
+# True while a @read_replica controller runs
+_prefer_replica = ContextVar('prefer_replica', default=False)
+# replica url -> (checked_at, fresh_enough)
+_replica_lag_checks = {}
+
+REPLICA_LAG_QUERIES = {
+    'postgresql': "SELECT COALESCE(EXTRACT(EPOCH FROM now() - pg_last_xact_replay_timestamp()), 0)",
+}
+
+
+def _replica_is_fresh(engine):
+    """
+    Staleness guard: compare the replica's replay lag with REPLICA_MAX_LAG seconds,
+    re-probing at most every REPLICA_LAG_CHECK_INTERVAL seconds. Backends without a
+    lag query (e.g. a second SQLite file standing in locally) count as fresh.
+    """
+    config = current_app.config
+    key = str(engine.url)
+    now = time.monotonic()
+    checked_at, fresh = _replica_lag_checks.get(key, (None, True))
+    if checked_at is not None and now - checked_at < config.get('REPLICA_LAG_CHECK_INTERVAL', 2):
+        return fresh
+
+    query = config.get('REPLICA_LAG_QUERY') or REPLICA_LAG_QUERIES.get(engine.dialect.name)
+    if query is None:
+        fresh = True
+    else:
+        try:
+            with engine.connect() as conn:
+                lag = float(conn.execute(text(query)).scalar() or 0)
+            fresh = lag <= config.get('REPLICA_MAX_LAG', 5)
+        except Exception:
+            fresh = False
+    _replica_lag_checks[key] = (now, fresh)
+    return fresh
+
+
+class RoutingSession(Session):
+    """
+    Sends reads made inside @read_replica controllers to the replica bind.
+    Flushes, and reads after this session has written, stay on the primary so
+    a request sees its own writes: for the rest of a transaction that wrote,
+    and for REPLICA_MAX_LAG seconds after it commits (the most the replica
+    may trail). The session pin ends with the request, so the response also
+    carries a signed-cookie pin (see _pin_caller) that keeps the caller's
+    next requests on the primary for the same window; a POST that redirects
+    to a GET reads what it wrote. Clients that drop cookies only get the
+    per-session pin.
+    """
+
+    def get_bind(self, mapper=None, clause=None, bind=None, **kwargs):
+        if bind is None and _prefer_replica.get() and not self._flushing:
+            engine = self._db.engines.get(REPLICA_BIND)
+            if engine is not None and not self._pinned_to_primary() and _replica_is_fresh(engine):
+                return engine
+        return super().get_bind(mapper=mapper, clause=clause, bind=bind, **kwargs)
+
+    def _pinned_to_primary(self):
+        if self.info.get('wrote'):
+            return True
+        committed_at = self.info.get('wrote_committed_at')
+        if committed_at is not None and (
+            time.monotonic() - committed_at < current_app.config.get('REPLICA_MAX_LAG', 5)
+        ):
+            return True
+        return has_request_context() and cookie_session.get(PRIMARY_UNTIL_KEY, 0) > time.time()
+
+    def close(self):
+        self.info.pop('wrote', None)
+        self.info.pop('wrote_committed_at', None)
+        super().close()
+
+
+@event.listens_for(RoutingSession, 'after_flush')
+def _mark_session_wrote(session, _flush_context):
+    session.info['wrote'] = True
+
+@event.listens_for(RoutingSession, 'do_orm_execute')
+def _mark_bulk_write(orm_execute_state):
+    # db.session.execute(insert/update/delete) writes without a flush
+    if orm_execute_state.is_insert or orm_execute_state.is_update or orm_execute_state.is_delete:
+        orm_execute_state.session.info['wrote'] = True
+
+@event.listens_for(RoutingSession, 'after_commit')
+def _pin_after_commit(session):
+    if session.info.pop('wrote', False):
+        session.info['wrote_committed_at'] = time.monotonic()
+
+@event.listens_for(RoutingSession, 'after_rollback')
+def _forget_rolled_back_write(session):
+    session.info.pop('wrote', None)
+
+
+def _pin_caller(response):
+    """
+    after_request hook: when this request committed a write, pin the caller
+    to the primary for REPLICA_MAX_LAG seconds through the signed session
+    cookie. Wall-clock time, since the next request may land on another
+    worker. A batch's sub-requests share its session, so the outer response
+    carries the pin too.
+    """
+    if db.session.info.get('wrote_committed_at') is not None:
+        cookie_session[PRIMARY_UNTIL_KEY] = time.time() + current_app.config.get('REPLICA_MAX_LAG', 5)
+    return response
+
+
+def read_replica(fn):
+    """Run a read-only controller against the replica when one is configured."""
+    @wraps(fn)
+    def wrapper(*args, **kwargs):
+        token = _prefer_replica.set(True)
+        try:
+            return fn(*args, **kwargs)
+        finally:
+            _prefer_replica.reset(token)
+    return wrapper
+
+
+class SQLiteWriter:
+    """
+    Per-process writer queue for SQLite, which only ever allows one writer.
+    Sessions take the slot at their first write statement, whether it comes
+    from a flush, db.session.execute() or Core on db.session.connection(), and
+    give it back when the transaction ends. Writes from the same worker so run
+    one after another while reads stay concurrent. Once gevent has patched threading the lock is
+    cooperative: queued greenlets yield to the hub, where waiting inside
+    SQLite's busy handler would block the whole worker.
+    """
+
+    def __init__(self, timeout=30.0):
+        self.timeout = timeout
+        self._lock = threading.Lock()
+        self.writes = 0
+        self.wait_total = 0.0
+        self.wait_max = 0.0
+        self.timeouts = 0
+        self.busy_retries = 0
+
+    def acquire(self):
+        started = time.perf_counter()
+        acquired = self._lock.acquire(timeout=self.timeout)
+        waited = time.perf_counter() - started
+        self.writes += 1
+        self.wait_total += waited
+        self.wait_max = max(self.wait_max, waited)
+        if not acquired:
+            # don't fail the write; fall back to SQLite's own busy handling
+            self.timeouts += 1
+        return acquired
+
+    def release(self):
+        self._lock.release()
+
+    def stats(self):
+        return {
+            'writes': self.writes,
+            'wait_seconds_total': round(self.wait_total, 6),
+            'wait_seconds_max': round(self.wait_max, 6),
+            'queue_timeouts': self.timeouts,
+            'busy_retries': self.busy_retries,
+        }
+
 
+def _current_writer():
+    if not has_app_context():
+        return None
+    return current_app.extensions.get('sqlite_writer')
 
-db = SQLAlchemy()
+def _enter_writer(session):
+    if 'sqlite_writer' in session.info:
+        return
+    writer = _current_writer()
+    if writer is not None:
+        session.info['sqlite_writer'] = writer if writer.acquire() else None
+
+def _leave_writer(session):
+    writer = session.info.pop('sqlite_writer', None)
+    if writer is not None:
+        writer.release()
+
+
+# connection -> the session whose transaction it carries
+_session_connections = weakref.WeakKeyDictionary()
+_WRITE_VERBS = ('INSERT', 'UPDATE', 'DELETE', 'REPLACE')
+
+@event.listens_for(RoutingSession, 'after_begin')
+def _remember_session_connection(session, _transaction, connection):
+    _session_connections[connection] = session
+
+def _queue_write(connection, _cursor, statement, _parameters, _context, _executemany):
+    # every write statement of a session, ORM or Core, passes here first
+    if statement.lstrip()[:7].upper().startswith(_WRITE_VERBS):
+        session = _session_connections.get(connection)
+        if session is not None:
+            _enter_writer(session)
+
+
+@event.listens_for(RoutingSession, 'after_rollback')
+def _release_writer_on_rollback(session):
+    _leave_writer(session)
+
+
+@event.listens_for(RoutingSession, 'after_transaction_end')
+def _release_writer(session, transaction):
+    if transaction.parent is None:
+        _leave_writer(session)
+
+
+# set inside the outermost @retry_on_busy call so nested controllers don't retry on their own
+_retrying = ContextVar('retrying_busy_write', default=False)
+
+def is_busy_error(exc):
+    message = str(getattr(exc, 'orig', exc)).lower()
+    return isinstance(exc, OperationalError) and ('database is locked' in message or 'database is busy' in message)
+
+def retry_on_busy(fn):
+    """
+    Re-run a write controller from the top when SQLite reports the database as
+    locked (another process held the write lock past busy_timeout). The session
+    is rolled back between attempts and the backoff sleeps cooperatively.
+    """
+    @wraps(fn)
+    def wrapper(*args, **kwargs):
+        if _retrying.get():
+            return fn(*args, **kwargs)
+        token = _retrying.set(True)
+        try:
+            retries = current_app.config.get('SQLITE_BUSY_RETRIES', 5)
+            for attempt in range(retries + 1):
+                try:
+                    return fn(*args, **kwargs)
+                except OperationalError as exc:
+                    if attempt == retries or not is_busy_error(exc):
+                        raise
+                    db.session.rollback()
+                    writer = _current_writer()
+                    if writer is not None:
+                        writer.busy_retries += 1
+                    time.sleep(min(0.025 * 2 ** attempt, 1.0) * random.uniform(0.5, 1.0))
+        finally:
+            _retrying.reset(token)
+    return wrapper
+
+
+db = SQLAlchemy(session_options={'class_': RoutingSession})
 
 def get_migrate(app):
+    # alembic is the slowest import in the app; only pay for it when asked
+    from flask_migrate import Migrate
     return Migrate(app, db)
 
 def create_db():
     db.create_all()
-    
+
+# config key -> create_engine() argument; values come from config/env (FLASK_DB_POOL_SIZE=20 ...)
+POOL_SETTINGS = {
+    'DB_POOL_SIZE': 'pool_size',
+    'DB_MAX_OVERFLOW': 'max_overflow',
+    'DB_POOL_TIMEOUT': 'pool_timeout',
+    'DB_POOL_RECYCLE': 'pool_recycle',
+    'DB_POOL_PRE_PING': 'pool_pre_ping',
+}
+
+def configure_engine_options(app):
+    """
+    Fill SQLALCHEMY_ENGINE_OPTIONS from the DB_POOL_* settings for server databases.
+    Anything already set explicitly in SQLALCHEMY_ENGINE_OPTIONS wins.
+    """
+    uri = app.config.get('SQLALCHEMY_DATABASE_URI', '')
+    if not uri or make_url(uri).get_backend_name() == 'sqlite':
+        return
+    options = {'poolclass': MeteredQueuePool, 'pool_pre_ping': True, 'pool_recycle': 1800}
+    for key, option in POOL_SETTINGS.items():
+        if key in app.config:
+            options[option] = app.config[key]
+    options.update(app.config.get('SQLALCHEMY_ENGINE_OPTIONS', {}))
+    app.config['SQLALCHEMY_ENGINE_OPTIONS'] = options
+
+def make_psycopg2_green():
+    """
+    Let psycopg2 yield to the gevent hub while waiting on the server instead of
+    blocking the whole worker. No-op unless gevent has patched the process.
+    """
+    try:
+        from gevent import monkey
+        from gevent.socket import wait_read, wait_write
+        import psycopg2
+        from psycopg2 import extensions
+    except ImportError:
+        return False
+    if not monkey.is_module_patched('socket'):
+        return False
+
+    def gevent_wait_callback(conn, timeout=None):
+        while True:
+            state = conn.poll()
+            if state == extensions.POLL_OK:
+                break
+            elif state == extensions.POLL_READ:
+                wait_read(conn.fileno(), timeout=timeout)
+            elif state == extensions.POLL_WRITE:
+                wait_write(conn.fileno(), timeout=timeout)
+            else:
+                raise psycopg2.OperationalError(f"Bad result from poll: {state!r}")
+
+    extensions.set_wait_callback(gevent_wait_callback)
+    return True
+
+def dispose_engines(app):
+    """
+    Drop pooled connections inherited from a parent process (gunicorn preload_app).
+    close=False leaves the parent's sockets alone; the child just opens its own.
+    """
+    with app.app_context():
+        for engine in db.engines.values():
+            engine.dispose(close=False)
+
+# apps whose engines a forked child must reset; one fork hook serves every app
+# in the process, however many times create_app runs
+_fork_apps = weakref.WeakSet()
+
+def _dispose_after_fork():
+    for app in list(_fork_apps):
+        dispose_engines(app)
+
+if hasattr(os, 'register_at_fork'):
+    os.register_at_fork(after_in_child=_dispose_after_fork)
+
+def get_pool_stats(app=None):
+    """Live pool numbers per bind, for monitoring."""
+    app = app or current_app._get_current_object()
+    stats = {}
+    with app.app_context():
+        for bind_key, engine in db.engines.items():
+            pool = engine.pool
+            entry = {'pool': type(pool).__name__}
+            if isinstance(pool, QueuePool):
+                entry.update(
+                    size=pool.size(),
+                    checked_out=pool.checkedout(),
+                    checked_in=pool.checkedin(),
+                    overflow=pool.overflow(),
+                )
+            if isinstance(pool, MeteredQueuePool):
+                entry.update(
+                    waits=pool.wait_count,
+                    wait_seconds_total=round(pool.wait_total, 6),
+                    wait_seconds_max=round(pool.wait_max, 6),
+                    timeouts=pool.timeouts,
+                )
+            stats[bind_key or 'default'] = entry
+        writer = app.extensions.get('sqlite_writer')
+        if writer is not None:
+            stats['sqlite_writer'] = writer.stats()
+    return stats
+
+def _is_sqlite_file(engine):
+    return engine.dialect.name == 'sqlite' and engine.url.database not in (None, '', ':memory:')
+
+def sqlite_pragmas(config):
+    """PRAGMAs applied to every new SQLite connection in concurrent mode."""
+    return {
+        'journal_mode': 'WAL',  # readers no longer block the writer, nor it them
+        'synchronous': config.get('SQLITE_SYNCHRONOUS', 'NORMAL'),  # durable at checkpoints; safe with WAL
+        'busy_timeout': int(config.get('SQLITE_BUSY_TIMEOUT', 1000)),  # ms; short, retry_on_busy backs off cooperatively
+        'mmap_size': int(config.get('SQLITE_MMAP_SIZE', 256 * 1024 * 1024)),
+    }
+
+def configure_sqlite(app):
+    """
+    SQLITE_CONCURRENT (default on) tunes file-backed SQLite for several gevent
+    workers: WAL and the pragmas above on connect, plus the per-process
+    SQLiteWriter queue. Other backends are untouched.
+    """
+    if not app.config.get('SQLITE_CONCURRENT', True):
+        return
+    with app.app_context():
+        engines = [engine for engine in db.engines.values() if _is_sqlite_file(engine)]
+    if not engines:
+        return
+    pragmas = sqlite_pragmas(app.config)
+
+    def set_pragmas(dbapi_connection, _connection_record):
+        cursor = dbapi_connection.cursor()
+        for name, value in pragmas.items():
+            cursor.execute(f"PRAGMA {name}={value}")
+        cursor.close()
+
+    for engine in engines:
+        event.listen(engine, 'connect', set_pragmas)
+    if app.config.get('SQLITE_SERIALIZE_WRITES', True):
+        app.extensions['sqlite_writer'] = SQLiteWriter(app.config.get('SQLITE_WRITE_QUEUE_TIMEOUT', 30.0))
+        for engine in engines:
+            event.listen(engine, 'before_cursor_execute', _queue_write)
+
+def configure_replica(app):
+    """
+    SQLALCHEMY_REPLICA_URI adds the read-only 'replica' bind. Locally two SQLite
+    files (or two Postgres databases) can stand in for primary and replica.
+    """
+    replica_uri = app.config.get('SQLALCHEMY_REPLICA_URI')
+    if replica_uri:
+        binds = dict(app.config.get('SQLALCHEMY_BINDS') or {})
+        binds.setdefault(REPLICA_BIND, replica_uri)
+        app.config['SQLALCHEMY_BINDS'] = binds
+        app.after_request(_pin_caller)
+
 def init_db(app):
-    db.init_app(app)
\ No newline at end of file
+    configure_engine_options(app)
+    configure_replica(app)
+    make_psycopg2_green()
+    db.init_app(app)
+    configure_sqlite(app)
+    _fork_apps.add(app)
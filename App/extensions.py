@@ -1,3 +1,2 @@
-from flask_sqlalchemy import SQLAlchemy
-
-db = SQLAlchemy()
+# Kept for older imports; there is a single SQLAlchemy instance, in App.database.
+from App.database import db
@@ -0,0 +1,194 @@
+"""
+Idempotency-Key support for mutating endpoints.
+
+A client that retries a request with the same Idempotency-Key header gets the
+stored response of the first attempt back instead of running the controller
+again. Endpoints opt in with @idempotent, placed directly under the route:
+
+    @api.route('/admin/shifts', methods=['POST'])
+    @idempotent
+    @admin_required()
+    def api_create_shift(): ...
+
+Keys are scoped to the caller's JWT identity and bound to a fingerprint of the
+request (method, path, query, body); reusing a key for a different request is
+a 422. Without an identity there is no scope to keep one client's keys from
+another's, so anonymous requests ignore the header and simply run. A
+duplicate arriving while the first attempt is still running waits up to
+IDEMPOTENCY_WAIT seconds and then replays its response (409 if it is still
+running). 5xx responses are not stored, so those can be retried.
+
+    IDEMPOTENCY_TTL = 86400            # seconds a finished response is replayable
+    IDEMPOTENCY_WAIT = 10              # seconds a concurrent duplicate waits
+    IDEMPOTENCY_LOCK_TIMEOUT = 60      # a pending key older than this was abandoned
+    IDEMPOTENCY_PURGE_INTERVAL = 300   # seconds between expired-row sweeps per process
+"""
+import hashlib
+import time
+from datetime import datetime, timedelta
+
+from flask import current_app, g, jsonify, request
+from flask_jwt_extended import get_jwt_identity, verify_jwt_in_request
+from flask_jwt_extended.exceptions import JWTExtendedException
+from jwt.exceptions import PyJWTError
+from sqlalchemy import delete, insert, select, update
+from sqlalchemy.exc import IntegrityError
+
+from App.database import db
+from App.models import IdempotencyKey
+
+HEADER = "Idempotency-Key"
+REPLAY_HEADER = "Idempotent-Replayed"
+MUTATING_METHODS = {"POST", "PUT", "PATCH", "DELETE"}
+MAX_KEY_LENGTH = 255
+# belong to the original exchange, never replayed
+SKIP_HEADERS = {"set-cookie", "content-length", "content-encoding", "date", "vary"}
+
+_table = IdempotencyKey.__table__
+_last_purge = 0.0
+
+
+def idempotent(view):
+    """Mark a view as honouring the Idempotency-Key header."""
+    view.idempotent = True
+    return view
+
+
+def request_fingerprint():
+    digest = hashlib.sha256()
+    for part in (request.method, request.path, request.query_string, request.get_data(cache=True)):
+        digest.update(part if isinstance(part, bytes) else part.encode())
+        digest.update(b"\0")
+    return digest.hexdigest()
+
+
+def purge_expired_idempotency_keys():
+    with db.engine.begin() as conn:
+        return conn.execute(delete(_table).where(_table.c.expires_at < datetime.utcnow())).rowcount
+
+
+def _scope():
+    try:
+        verify_jwt_in_request(optional=True)
+    except (JWTExtendedException, PyJWTError):
+        return None  # the view's own auth check produces the error response
+    identity = get_jwt_identity()
+    return f"user:{identity}" if identity is not None else None
+
+
+def _where(scope, key):
+    return (_table.c.scope == scope) & (_table.c.key == key)
+
+
+def _claim(scope, key, fingerprint, config):
+    """Insert the pending row; False when another request already holds the key."""
+    now = datetime.utcnow()
+    with db.engine.begin() as conn:
+        conn.execute(delete(_table).where(_where(scope, key), _table.c.expires_at < now))
+    try:
+        with db.engine.begin() as conn:
+            conn.execute(insert(_table).values(
+                scope=scope, key=key, fingerprint=fingerprint, created_at=now,
+                expires_at=now + timedelta(seconds=config.get("IDEMPOTENCY_TTL", 86400)),
+            ))
+        return True
+    except IntegrityError:
+        return False
+
+
+def _take_over(row, config):
+    """Claim a pending key whose first request died without finishing."""
+    cutoff = datetime.utcnow() - timedelta(seconds=config.get("IDEMPOTENCY_LOCK_TIMEOUT", 60))
+    if row.created_at > cutoff:
+        return False
+    with db.engine.begin() as conn:
+        taken = conn.execute(
+            update(_table)
+            .where(_where(row.scope, row.key), _table.c.status_code.is_(None), _table.c.created_at == row.created_at)
+            .values(created_at=datetime.utcnow())
+        ).rowcount
+    return taken == 1
+
+
+def _release(scope, key):
+    with db.engine.begin() as conn:
+        conn.execute(delete(_table).where(_where(scope, key), _table.c.status_code.is_(None)))
+
+
+def _replay(row):
+    response = current_app.response_class(row.body, status=row.status_code, headers=row.headers)
+    response.headers[REPLAY_HEADER] = "true"
+    return response
+
+
+def check_idempotency_key():
+    global _last_purge
+    if request.method not in MUTATING_METHODS or HEADER not in request.headers:
+        return None
+    view = current_app.view_functions.get(request.endpoint)
+    if not getattr(view, "idempotent", False):
+        return None
+    key = request.headers[HEADER]
+    if not key or len(key) > MAX_KEY_LENGTH:
+        return jsonify(error=f"{HEADER} must be 1-{MAX_KEY_LENGTH} characters"), 400
+    scope = _scope()
+    if scope is None:
+        return None
+
+    config = current_app.config
+    if time.monotonic() - _last_purge > config.get("IDEMPOTENCY_PURGE_INTERVAL", 300):
+        _last_purge = time.monotonic()
+        purge_expired_idempotency_keys()
+
+    fingerprint = request_fingerprint()
+    deadline = time.monotonic() + config.get("IDEMPOTENCY_WAIT", 10)
+    while True:
+        if _claim(scope, key, fingerprint, config):
+            g.idempotency_claim = (scope, key)
+            return None
+        with db.engine.connect() as conn:
+            row = conn.execute(select(_table).where(_where(scope, key))).first()
+        if row is None:
+            continue  # finished with a 5xx or expired in between; claim again
+        if row.fingerprint != fingerprint:
+            return jsonify(error=f"{HEADER} was already used for a different request"), 422
+        if row.status_code is not None:
+            return _replay(row)
+        if _take_over(row, config):
+            g.idempotency_claim = (scope, key)
+            return None
+        if time.monotonic() >= deadline:
+            return jsonify(error=f"A request with this {HEADER} is still in progress"), 409, {"Retry-After": "1"}
+        # the first attempt is still running; wait for its response
+        time.sleep(config.get("IDEMPOTENCY_POLL_INTERVAL", 0.05))
+
+
+def store_idempotent_response(response):
+    claim = g.pop("idempotency_claim", None)
+    if claim is None:
+        return response
+    scope, key = claim
+    if response.status_code >= 500 or response.is_streamed or response.direct_passthrough:
+        _release(scope, key)
+        return response
+    headers = [[name, value] for name, value in response.headers.items() if name.lower() not in SKIP_HEADERS]
+    with db.engine.begin() as conn:
+        conn.execute(
+            update(_table).where(_where(scope, key))
+            .values(status_code=response.status_code, headers=headers, body=response.get_data())
+        )
+    return response
+
+
+def release_unfinished_claim(_exc=None):
+    # the request died before after_request could store a response
+    claim = g.pop("idempotency_claim", None)
+    if claim is not None:
+        _release(*claim)
+
+
+def init_idempotency(app):
+    """Register after init_compression so responses are stored uncompressed."""
+    app.before_request(check_idempotency_key)
+    app.after_request(store_idempotent_response)
+    app.teardown_request(release_unfinished_claim)
@@ -1,27 +1,27 @@
 
 import os
-from flask import Flask, render_template
-from flask_uploads import DOCUMENTS, IMAGES, TEXT, UploadSet, configure_uploads
-from flask_cors import CORS
-from werkzeug.utils import secure_filename
-from werkzeug.datastructures import  FileStorage
+from flask import Flask, render_template, jsonify
 
 from App.database import init_db
 from App.config import load_config
-
-from App.views import views, setup_admin
-
-from App.api import api   # <-- import your new API blueprint
-
+from App.passwords import init_password_hashing, PasswordHashingBusy
+from App.serialization import init_json
 
 from App.controllers import (
     setup_jwt,
+    setup_login,
     add_auth_context
 )
 
+# APP_MODE="cli" builds only config, database, hashing and JWT: enough for
+# `flask user create` / `flask att in`. Blueprints, admin, uploads, CORS and
+# metrics (and their imports) are only set up in the default "full" mode.
+FULL_MODE = "full"
+CLI_MODE = "cli"
 
 
 def add_views(app):
+    from App.views import views
     for view in views:
         app.register_blueprint(view)
 
@@ -46,23 +46,54 @@ def create_app(overrides={}):
     return app
 """
 
-def create_app(overrides={}):
-    app = Flask(__name__, static_url_path='/static')
-    load_config(app, overrides)
+def setup_web(app):
+    """Everything only the HTTP side needs, imported on demand."""
+    from flask_uploads import DOCUMENTS, IMAGES, TEXT, UploadSet, configure_uploads
+    from flask_cors import CORS
+    from App.metrics import init_metrics
+    from App.compression import init_compression
+    from App.idempotency import init_idempotency
+    from App.roster_cache import init_roster_cache
+    from App.maintenance import init_maintenance
+    from App.query_inspector import init_query_inspector
+    from App.views import setup_admin
+    from App.api import api
+
     CORS(app)
+    init_metrics(app)
+    init_query_inspector(app)
+    init_compression(app)
+    init_idempotency(app)
+    init_roster_cache(app)
+    init_maintenance(app)
+    setup_login(app)
     add_auth_context(app)
 
     photos = UploadSet('photos', TEXT + DOCUMENTS + IMAGES)
     configure_uploads(app, photos)
 
     add_views(app)
-    init_db(app)
-    jwt = setup_jwt(app)
     setup_admin(app)
 
     # Register the API routes here
     app.register_blueprint(api)
 
+def create_app(overrides={}, mode=None):
+    app = Flask(__name__, static_url_path='/static')
+    load_config(app, overrides)
+    mode = mode or app.config.get('APP_MODE', FULL_MODE)
+    init_json(app)
+
+    init_db(app)
+    init_password_hashing(app)
+    jwt = setup_jwt(app)
+    if mode != CLI_MODE:
+        setup_web(app)
+
+    @app.errorhandler(PasswordHashingBusy)
+    def password_hashing_busy(error):
+        return jsonify(message=str(error)), 503, {'Retry-After': '1'}
+
     @jwt.invalid_token_loader
     @jwt.unauthorized_loader
     def custom_unauthorized_response(error):
@@ -0,0 +1,291 @@
+"""
+Maintenance scheduler: cron-style jobs that keep heavy upkeep off the request
+path and in off-peak windows.
+
+    flask maintenance run           # sidecar: runs until stopped (recommended)
+    flask maintenance list          # jobs and their next run
+    flask maintenance run-job purge_tombstones
+    flask maintenance history --job rollup_reports
+
+MAINTENANCE_SCHEDULER = "in-process" runs the same loop in every web worker
+instead. The thread is started in the worker, never at import: by gunicorn's
+post_worker_init hook (gunicorn_config.py), or else on the worker's first
+request. A preloading master therefore never runs jobs, and never forks while
+a scheduler thread holds a lock.
+
+Either way, any number of schedulers can run at once. Before running a job,
+each one inserts a job_runs row for (job, slot). Only the insert that wins the
+unique key runs the job, so each slot runs once across workers and nodes. The
+row then records the node, status, duration and result. Jobs marked
+leader=False (cache warmup) run in every process and are only logged.
+
+Jobs come from DEFAULT_JOBS merged with MAINTENANCE_JOBS. Set a name to None
+to drop it, or override any of its keys:
+
+    MAINTENANCE_JOBS = {
+        "rollup_reports": {"schedule": "30 1 * * *", "kwargs": {"weeks": 4}},
+        "purge_tombstones": None,
+        "vacuum": {"schedule": "0 5 * * 0", "task": "myapp.tasks.vacuum"},
+    }
+
+Schedules are five-field cron expressions in server local time
+(minute hour day-of-month month day-of-week; *, lists, ranges and /steps).
+The @hourly, @daily and @weekly shorthands also work. Slots missed while no
+scheduler was running are skipped, not caught up.
+
+A node that dies mid-job leaves its row 'running'. Every scheduler marks runs
+still 'running' after MAINTENANCE_STALE_RUN_SECONDS (default 6 hours; keep it
+above the longest job) as failed. The slot itself is not run again.
+"""
+import json
+import logging
+import os
+import socket
+import threading
+import time
+from datetime import datetime, timedelta
+
+from sqlalchemy import update
+from sqlalchemy.exc import IntegrityError
+from werkzeug.utils import import_string
+
+from App.database import db
+from App.models import JobRun
+from App.models.maintenance import FAILED, RUNNING, SUCCEEDED
+from App.serialization import json_default
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_JOBS = {
+    "rollup_reports": {"schedule": "15 2 * * *", "task": "App.controllers.rollup_recent_reports"},
+    "close_open_attendance": {"schedule": "30 2 * * *", "task": "App.controllers.close_open_attendance",
+                              "kwargs": {"grace_hours": 4}},
+    "purge_idempotency_keys": {"schedule": "45 2 * * *", "task": "App.idempotency.purge_expired_idempotency_keys"},
+    "purge_outbox": {"schedule": "0 3 * * *", "task": "App.controllers.purge_dispatched_outbox",
+                     "kwargs": {"older_than_days": 7}},
+    "purge_tombstones": {"schedule": "15 3 * * 0", "task": "App.controllers.purge_tombstones",
+                         "kwargs": {"older_than_days": 30}},
+    # the roster window rolls over at midnight on Monday; reload it before traffic does
+    "warm_roster_cache": {"schedule": "1 0 * * 1", "task": "App.controllers.warm_roster_cache", "leader": False},
+}
+
+
+# ---------- cron expressions ----------
+
+_ALIASES = {"@hourly": "0 * * * *", "@daily": "0 0 * * *", "@midnight": "0 0 * * *", "@weekly": "0 0 * * 0"}
+_FIELDS = (("minute", 0, 59), ("hour", 0, 23), ("day of month", 1, 31), ("month", 1, 12), ("day of week", 0, 7))
+
+
+def _parse_field(text, name, low, high):
+    values = set()
+    for part in text.split(","):
+        part, _, step = part.partition("/")
+        if part == "*":
+            start, end = low, high
+        elif "-" in part:
+            start, end = (int(v) for v in part.split("-", 1))
+        else:
+            start = end = int(part)
+        step = int(step) if step else 1
+        if not (low <= start <= end <= high) or step < 1:
+            raise ValueError(f"bad {name} field {text!r} (allowed {low}-{high})")
+        values.update(range(start, end + 1, step))
+    return values
+
+
+class CronSchedule:
+    def __init__(self, expression: str):
+        self.expression = expression
+        fields = _ALIASES.get(expression.strip(), expression).split()
+        if len(fields) != 5:
+            raise ValueError(f"cron expression needs 5 fields: {expression!r}")
+        self.minutes, self.hours, self.days, self.months, weekdays = (
+            _parse_field(text, *spec) for text, spec in zip(fields, _FIELDS)
+        )
+        # cron counts Sunday as 0 (or 7); datetime.weekday() counts Monday as 0
+        self.weekdays = {(day - 1) % 7 for day in weekdays}
+        # as in cron: if both day fields are restricted, either may match
+        self.any_day = not fields[2].startswith("*") and not fields[4].startswith("*")
+
+    def _day_matches(self, moment: datetime) -> bool:
+        in_month, in_week = moment.day in self.days, moment.weekday() in self.weekdays
+        return (in_month or in_week) if self.any_day else (in_month and in_week)
+
+    def next_after(self, moment: datetime) -> datetime:
+        """The first matching minute strictly after `moment`."""
+        t = moment.replace(second=0, microsecond=0) + timedelta(minutes=1)
+        limit = moment.year + 5
+        while t.year <= limit:
+            if t.month not in self.months:
+                t = (t.replace(day=1, hour=0, minute=0) + timedelta(days=32)).replace(day=1)
+            elif not self._day_matches(t):
+                t = t.replace(hour=0, minute=0) + timedelta(days=1)
+            elif t.hour not in self.hours:
+                t = t.replace(minute=0) + timedelta(hours=1)
+            elif t.minute not in self.minutes:
+                t += timedelta(minutes=1)
+            else:
+                return t
+        raise ValueError(f"cron expression never fires: {self.expression!r}")
+
+    def __str__(self):
+        return self.expression
+
+
+# ---------- jobs ----------
+
+class Job:
+    def __init__(self, name, schedule, task, kwargs=None, leader=True):
+        self.name = name
+        self.schedule = CronSchedule(schedule)
+        self.task = import_string(task) if isinstance(task, str) else task
+        self.kwargs = kwargs or {}
+        self.leader = leader
+
+    def __repr__(self):
+        return f"<Job {self.name} '{self.schedule}'>"
+
+
+def load_jobs(config) -> list:
+    specs = {name: dict(spec) for name, spec in DEFAULT_JOBS.items()}
+    for name, override in (config.get("MAINTENANCE_JOBS") or {}).items():
+        if override is None:
+            specs.pop(name, None)
+        else:
+            specs.setdefault(name, {}).update(override)
+    return [Job(name, **spec) for name, spec in specs.items() if spec.pop("enabled", True)]
+
+
+def node_name() -> str:
+    return f"{socket.gethostname()}:{os.getpid()}"
+
+
+def run_job(job: Job, slot: datetime):
+    """
+    Run `job` for `slot` (needs an app context). Leader jobs first claim the
+    slot; returns the JobRun, or None when another scheduler already has it.
+    """
+    run = None
+    if job.leader:
+        run = JobRun(job=job.name, scheduled_for=slot, node=node_name(), status=RUNNING)
+        db.session.add(run)
+        try:
+            db.session.commit()
+        except IntegrityError:
+            db.session.rollback()
+            return None
+        run_id = run.id
+    started = time.perf_counter()
+    try:
+        result, error, status = job.task(**job.kwargs), None, SUCCEEDED
+    except Exception as exc:
+        db.session.rollback()
+        result, error, status = None, f"{type(exc).__name__}: {exc}"[:2000], FAILED
+        logger.exception("maintenance: %s failed", job.name)
+    duration_ms = round((time.perf_counter() - started) * 1000.0, 3)
+    logger.info("maintenance: %s %s in %.0f ms", job.name, status, duration_ms)
+    if run is None:
+        return None
+    run = db.session.get(JobRun, run_id)
+    run.status, run.error = status, error
+    run.finished_at = datetime.utcnow()
+    run.duration_ms = duration_ms
+    run.result = json.dumps(result, default=json_default) if result is not None else None
+    db.session.commit()
+    return run
+
+
+def fail_stale_runs(older_than_seconds: float, now=None) -> int:
+    """Mark runs still 'running' after `older_than_seconds` as failed; their node died mid-job."""
+    now = now or datetime.utcnow()
+    result = db.session.execute(
+        update(JobRun)
+        .where(JobRun.status == RUNNING, JobRun.started_at < now - timedelta(seconds=older_than_seconds))
+        .values(status=FAILED, finished_at=now,
+                error=f"abandoned: no result after {older_than_seconds:.0f} s (node died mid-job?)")
+    )
+    db.session.commit()
+    return result.rowcount
+
+
+# ---------- scheduler ----------
+
+class MaintenanceScheduler:
+    def __init__(self, app, jobs=None):
+        self.app = app
+        self.jobs = jobs if jobs is not None else load_jobs(app.config)
+        self.max_sleep = app.config.get("MAINTENANCE_MAX_SLEEP_SECONDS", 60)
+        self.stale_after = app.config.get("MAINTENANCE_STALE_RUN_SECONDS", 6 * 3600)
+        self.stopping = threading.Event()
+        self._thread = None
+        self._started_in = None    # pid that started the thread
+        self._start_lock = threading.Lock()
+
+    def next_runs(self, now=None):
+        now = now or datetime.now()
+        return {job.name: job.schedule.next_after(now) for job in self.jobs}
+
+    def run_due(self, due: dict, now: datetime) -> list:
+        """Run every job whose slot in `due` has come; advances `due` and returns the runs as JSON."""
+        runs = []
+        if any(job.leader and due[job.name] <= now for job in self.jobs):
+            with self.app.app_context():
+                try:
+                    fail_stale_runs(self.stale_after)
+                finally:
+                    db.session.remove()
+        for job in self.jobs:
+            slot = due[job.name]
+            if slot > now:
+                continue
+            with self.app.app_context():
+                try:
+                    run = run_job(job, slot)
+                    runs.append(run.get_json() if run else None)
+                finally:
+                    db.session.remove()
+            due[job.name] = job.schedule.next_after(max(slot, now))
+        return runs
+
+    def run(self):
+        """Loop until stop(), sleeping until the next slot (at most max_sleep at a time)."""
+        due = self.next_runs()
+        while not self.stopping.is_set():
+            now = datetime.now()
+            self.run_due(due, now)
+            wait = (min(due.values()) - datetime.now()).total_seconds() if due else self.max_sleep
+            self.stopping.wait(min(max(wait, 0.0), self.max_sleep))
+
+    def start(self):
+        """Run in a daemon thread (a greenlet under gevent)."""
+        self.stopping.clear()
+        self._thread = threading.Thread(target=self.run, name="maintenance-scheduler", daemon=True)
+        self._thread.start()
+
+    def ensure_started(self):
+        """start() once per process; a forked worker starts its own."""
+        if self._started_in == os.getpid():
+            return
+        with self._start_lock:
+            if self._started_in != os.getpid():
+                self._started_in = os.getpid()
+                self.start()
+
+    def stop(self):
+        self.stopping.set()
+
+
+def start_maintenance(app):
+    """Start the in-process scheduler in this worker, if the app has one."""
+    scheduler = getattr(app, "extensions", {}).get("maintenance_scheduler")
+    if scheduler is not None:
+        scheduler.ensure_started()
+
+
+def init_maintenance(app):
+    if app.config.get("MAINTENANCE_SCHEDULER", "off") != "in-process":
+        return
+    scheduler = MaintenanceScheduler(app)
+    app.extensions["maintenance_scheduler"] = scheduler
+    # not at import: a preloading master would run jobs too and fork mid-job
+    app.before_request(scheduler.ensure_started)
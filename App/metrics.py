@@ -0,0 +1,110 @@
+"""
+Per-endpoint request metrics in Prometheus exposition format, served at /metrics.
+
+Under gunicorn, set PROMETHEUS_MULTIPROC_DIR to an empty directory before the
+workers start so every worker writes to a shared store and a scrape of any one
+worker returns totals for all of them (see gunicorn_config.py).
+"""
+import os
+import time
+
+from flask import Blueprint, Response, g, has_request_context, request
+from prometheus_client import (
+    CONTENT_TYPE_LATEST,
+    REGISTRY,
+    CollectorRegistry,
+    Counter,
+    Histogram,
+    generate_latest,
+    multiprocess,
+)
+from sqlalchemy import event
+from sqlalchemy.engine import Engine
+
+metrics_views = Blueprint('metrics_views', __name__)
+
+LATENCY_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10)
+SIZE_BUCKETS = (256, 1024, 4096, 16384, 65536, 262144, 1048576, 4194304)
+STATEMENT_BUCKETS = (0, 1, 2, 3, 5, 10, 20, 50, 100, 250)
+
+REQUEST_LATENCY = Histogram(
+    'shiftmate_request_latency_seconds', 'Request latency by endpoint',
+    ['endpoint', 'method'], buckets=LATENCY_BUCKETS,
+)
+REQUESTS = Counter(
+    'shiftmate_requests_total', 'Requests by endpoint and status',
+    ['endpoint', 'method', 'status'],
+)
+RESPONSE_SIZE = Histogram(
+    'shiftmate_response_size_bytes', 'Response body size by endpoint',
+    ['endpoint'], buckets=SIZE_BUCKETS,
+)
+SQL_STATEMENTS = Histogram(
+    'shiftmate_sql_statements_per_request', 'SQL statements executed per request',
+    ['endpoint'], buckets=STATEMENT_BUCKETS,
+)
+SQL_SECONDS = Counter(
+    'shiftmate_sql_seconds_total', 'Time spent executing SQL by endpoint',
+    ['endpoint'],
+)
+
+
+# ---------- SQL timing (all engines, including the replica bind) ----------
+
+@event.listens_for(Engine, 'before_cursor_execute')
+def _before_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+    conn.info.setdefault('_metrics_started', []).append(time.perf_counter())
+
+@event.listens_for(Engine, 'after_cursor_execute')
+def _after_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+    started = conn.info.get('_metrics_started')
+    if not started:
+        return
+    elapsed = time.perf_counter() - started.pop()
+    if has_request_context() and '_metrics_start' in g:
+        g._metrics_sql_count += 1
+        g._metrics_sql_seconds += elapsed
+
+
+# ---------- request hooks ----------
+
+def _endpoint_label():
+    # unmatched URLs share one label so scanners can't blow up cardinality
+    return request.endpoint or 'unmatched'
+
+def _before_request():
+    g._metrics_start = time.perf_counter()
+    g._metrics_sql_count = 0
+    g._metrics_sql_seconds = 0.0
+
+def _after_request(response):
+    if '_metrics_start' not in g:
+        return response
+    endpoint = _endpoint_label()
+    REQUEST_LATENCY.labels(endpoint, request.method).observe(time.perf_counter() - g._metrics_start)
+    REQUESTS.labels(endpoint, request.method, str(response.status_code)).inc()
+    if response.content_length is not None:
+        RESPONSE_SIZE.labels(endpoint).observe(response.content_length)
+    SQL_STATEMENTS.labels(endpoint).observe(g._metrics_sql_count)
+    SQL_SECONDS.labels(endpoint).inc(g._metrics_sql_seconds)
+    # g outlives the request when an app context is pushed globally (CLI, tests)
+    g.pop('_metrics_start', None)
+    return response
+
+
+@metrics_views.route('/metrics', methods=['GET'])
+def metrics():
+    if os.environ.get('PROMETHEUS_MULTIPROC_DIR'):
+        registry = CollectorRegistry()
+        multiprocess.MultiProcessCollector(registry)
+    else:
+        registry = REGISTRY
+    return Response(generate_latest(registry), mimetype=CONTENT_TYPE_LATEST)
+
+
+def init_metrics(app):
+    if not app.config.get('METRICS_ENABLED', True):
+        return
+    app.before_request(_before_request)
+    app.after_request(_after_request)
+    app.register_blueprint(metrics_views)
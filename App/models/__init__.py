@@ -2,4 +2,9 @@ from .user import *
 from .shift import *
 from .attendance import *
 from .report import *
+from .idempotency import *
+from .sync import *
+from .outbox import *
+from .weekly_hours import *
+from .maintenance import *
 from ..extensions import db
\ No newline at end of file
@@ -7,7 +7,7 @@ class Attendance(db.Model):
     id = db.Column(db.Integer, primary_key=True)
 
     shift_id = db.Column(db.Integer, db.ForeignKey("shifts.id"), nullable=False, index=True)
-    user_id = db.Column(db.Integer, db.ForeignKey("user.id"), nullable=False, index=True)
+    user_id = db.Column(db.Integer, db.ForeignKey("users.id"), nullable=False, index=True)
 
     time_in = db.Column(db.DateTime)
     time_out = db.Column(db.DateTime)
@@ -15,6 +15,9 @@ class Attendance(db.Model):
     # Optional admin review flag for manual corrections
     approved = db.Column(db.Boolean, default=False)
 
+    # bumped on every write; /api/sync returns rows above the client's cursor
+    change_seq = db.Column(db.BigInteger, nullable=False, default=0, index=True)
+
     # Relationships
     shift = db.relationship("Shift", backref=db.backref("attendance", lazy=True))
     user = db.relationship("User", backref=db.backref("attendance", lazy=True))
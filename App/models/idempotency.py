@@ -0,0 +1,24 @@
+from datetime import datetime
+from App.database import db
+
+
+class IdempotencyKey(db.Model):
+    """
+    One row per (caller, Idempotency-Key): the request fingerprint while the
+    first attempt runs, then the finished response for replay until expires_at.
+    """
+    __tablename__ = "idempotency_keys"
+
+    scope = db.Column(db.String(64), primary_key=True)     # "user:<id>"; anonymous requests store nothing
+    key = db.Column(db.String(255), primary_key=True)
+    fingerprint = db.Column(db.String(64), nullable=False)
+    # NULL while the first request is still running
+    status_code = db.Column(db.Integer)
+    headers = db.Column(db.JSON)
+    body = db.Column(db.LargeBinary)
+    created_at = db.Column(db.DateTime, nullable=False, default=datetime.utcnow)
+    expires_at = db.Column(db.DateTime, nullable=False, index=True)
+
+    def __repr__(self):
+        state = "pending" if self.status_code is None else self.status_code
+        return f"<IdempotencyKey {self.scope}/{self.key} {state}>"
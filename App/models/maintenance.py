@@ -0,0 +1,45 @@
+from datetime import datetime
+from App.database import db
+
+RUNNING, SUCCEEDED, FAILED = "running", "succeeded", "failed"
+
+
+class JobRun(db.Model):
+    """
+    One run of a scheduled maintenance job. The (job, scheduled_for) key is
+    also the election: the worker whose insert for a slot wins runs it.
+    """
+    __tablename__ = "job_runs"
+
+    id = db.Column(db.Integer, primary_key=True)
+    job = db.Column(db.String(64), nullable=False)
+    scheduled_for = db.Column(db.DateTime, nullable=False)
+    node = db.Column(db.String(128), nullable=False)    # "<host>:<pid>" that ran it
+    status = db.Column(db.String(10), nullable=False, default=RUNNING)
+    started_at = db.Column(db.DateTime, nullable=False, default=datetime.utcnow)
+    finished_at = db.Column(db.DateTime)
+    duration_ms = db.Column(db.Float)
+    result = db.Column(db.Text)    # JSON of what the task returned
+    error = db.Column(db.Text)
+
+    __table_args__ = (
+        db.UniqueConstraint("job", "scheduled_for", name="uq_job_run_slot"),
+        db.Index("ix_job_runs_job_started", "job", "started_at"),
+    )
+
+    def get_json(self):
+        return {
+            "id": self.id,
+            "job": self.job,
+            "scheduled_for": self.scheduled_for,
+            "node": self.node,
+            "status": self.status,
+            "started_at": self.started_at,
+            "finished_at": self.finished_at,
+            "duration_ms": self.duration_ms,
+            "result": self.result,
+            "error": self.error,
+        }
+
+    def __repr__(self):
+        return f"<JobRun {self.job} @{self.scheduled_for} {self.status}>"
@@ -0,0 +1,92 @@
+import json
+from datetime import datetime
+
+from sqlalchemy import event, insert
+
+from App.database import db, RoutingSession
+from App.models.shift import Shift
+from App.models.attendance import Attendance
+from App.serialization import json_default
+
+# model -> topic prefix; events are "<prefix>.created|updated|deleted"
+OUTBOX_TOPICS = {Shift: "shift", Attendance: "attendance"}
+
+PENDING, SENT, DEAD = "pending", "sent", "dead"
+
+
+class OutboxEvent(db.Model):
+    """
+    A change to mirror into payroll/BI, written in the same transaction as
+    the change itself and delivered later by the dispatcher (App/outbox.py).
+    """
+    __tablename__ = "outbox_events"
+
+    id = db.Column(db.Integer, primary_key=True)
+    topic = db.Column(db.String(40), nullable=False)
+    aggregate_id = db.Column(db.Integer, nullable=False)
+    payload = db.Column(db.Text, nullable=False)  # JSON of the row's columns
+    status = db.Column(db.String(10), nullable=False, default=PENDING)
+    attempts = db.Column(db.Integer, nullable=False, default=0)
+    last_error = db.Column(db.Text)
+    created_at = db.Column(db.DateTime, nullable=False, default=datetime.utcnow)
+    next_attempt_at = db.Column(db.DateTime, nullable=False, default=datetime.utcnow)
+    dispatched_at = db.Column(db.DateTime)
+
+    __table_args__ = (
+        # the dispatcher's claim query: pending events that are due, oldest first
+        db.Index("ix_outbox_events_due", "status", "next_attempt_at", "id"),
+    )
+
+    def get_json(self):
+        return {
+            "id": self.id,
+            "topic": self.topic,
+            "aggregate_id": self.aggregate_id,
+            "created_at": self.created_at,
+            "data": json.loads(self.payload),
+        }
+
+    def __repr__(self):
+        return f"<OutboxEvent {self.id} {self.topic}/{self.aggregate_id} {self.status}>"
+
+
+def _row_payload(obj):
+    return json.dumps(
+        {attr.key: getattr(obj, attr.key) for attr in db.inspect(obj).mapper.column_attrs},
+        default=json_default,
+    )
+
+def _event(topic, aggregate_id, payload, now):
+    return {
+        "topic": topic, "aggregate_id": aggregate_id, "payload": payload,
+        "status": PENDING, "attempts": 0, "created_at": now, "next_attempt_at": now,
+    }
+
+def write_outbox_rows(connection, model, action, rows):
+    """
+    Outbox events for rows written with Core statements, which the flush hook
+    below never sees. `rows` are mappings of all of `model`'s columns.
+    """
+    now = datetime.utcnow()
+    events = [
+        _event(f"{OUTBOX_TOPICS[model]}.{action}", row["id"], json.dumps(dict(row), default=json_default), now)
+        for row in rows
+    ]
+    if events:
+        connection.execute(insert(OutboxEvent.__table__), events)
+
+
+@event.listens_for(RoutingSession, "after_flush")
+def _write_outbox(session, _flush_context):
+    # after_flush: new rows have their ids, and new/dirty/deleted still describe this flush
+    now = datetime.utcnow()
+    rows = []
+    for action, objects in (("created", session.new), ("updated", session.dirty), ("deleted", session.deleted)):
+        for obj in objects:
+            prefix = OUTBOX_TOPICS.get(type(obj))
+            if prefix is None or (action == "updated" and not session.is_modified(obj, include_collections=False)):
+                continue
+            rows.append(_event(f"{prefix}.{action}", obj.id, _row_payload(obj), now))
+    if rows:
+        # same connection, same transaction: the events commit or roll back with the change
+        session.connection().execute(insert(OutboxEvent.__table__), rows)
@@ -1,10 +1,14 @@
 from App.database import db
 from datetime import datetime
 
+REPORT_SCOPE_ALL = "all"
+
 class Report(db.Model):
     id = db.Column(db.Integer, primary_key=True)
     start_date = db.Column(db.Date, nullable=False)
     end_date = db.Column(db.Date, nullable=False)
+    # "all", or "location:<name>" for per-location reports
+    scope = db.Column(db.String(120), nullable=False, default=REPORT_SCOPE_ALL)
     total_shifts = db.Column(db.Integer, nullable=False, default=0)
     total_hours = db.Column(db.Float, nullable=False, default=0.0)
     attendance_rate = db.Column(db.Float, nullable=False, default=0.0)  # percentage
@@ -12,7 +16,21 @@ class Report(db.Model):
     generated_at = db.Column(db.DateTime, default=datetime.utcnow)
 
     # Optional: who generated it (admin user)
-    generated_by = db.Column(db.Integer, db.ForeignKey('user.id'))
+    generated_by = db.Column(db.Integer, db.ForeignKey('users.id'))
+
+    __table_args__ = (
+        # one report per period and scope; regenerating or backfilling replaces, never duplicates
+        db.UniqueConstraint('start_date', 'end_date', 'scope', name='uq_report_period_scope'),
+    )
 
     def __repr__(self):
-        return f"<Report {self.start_date} - {self.end_date}>"
\ No newline at end of file
+        return f"<Report {self.start_date} - {self.end_date} {self.scope}>"
+
+
+class ReportBackfillCheckpoint(db.Model):
+    """A week `flask report backfill` has finished for one breakdown ('all' or 'location')."""
+    __tablename__ = "report_backfill_checkpoints"
+
+    by = db.Column(db.String(20), primary_key=True)
+    week_start = db.Column(db.Date, primary_key=True)
+    completed_at = db.Column(db.DateTime, nullable=False, default=datetime.utcnow)
@@ -7,12 +7,14 @@ from sqlalchemy import UniqueConstraint
 class Shift(db.Model):
     __tablename__ = 'shifts'
     id = db.Column(db.Integer, primary_key=True)
-    user_id = db.Column(db.Integer, db.ForeignKey('user.id'), nullable=False)
+    user_id = db.Column(db.Integer, db.ForeignKey('users.id'), nullable=False)
     work_date = db.Column(db.Date, nullable=False, index=True)
     start_time = db.Column(db.Time, nullable=False)
     end_time = db.Column(db.Time, nullable=False)
     role = db.Column(db.String(50))     
     location = db.Column(db.String(100))  
+    # bumped on every write; /api/sync returns rows above the client's cursor
+    change_seq = db.Column(db.BigInteger, nullable=False, default=0, index=True)
 
     user = db.relationship('User', backref=db.backref('shifts', lazy=True))
 
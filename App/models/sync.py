@@ -0,0 +1,82 @@
+from datetime import datetime
+
+from sqlalchemy import DDL, event, update
+
+from App.database import db, RoutingSession
+from App.models.shift import Shift
+from App.models.attendance import Attendance
+
+# entity name used in tombstones and /api/sync payloads
+SYNCED_MODELS = {Shift: "shifts", Attendance: "attendance"}
+
+
+class SyncCounter(db.Model):
+    """
+    Single-row change sequence. Each write transaction bumps it inside the
+    transaction, so the row lock orders commits: a change numbered N is never
+    committed after one numbered N+1, and a cursor never skips a change.
+
+    The price is that, on Postgres, every transaction that writes shifts or
+    attendance holds this one row lock from its first flush until it commits;
+    such writers run one at a time. Keep those transactions short (no slow
+    work between the flush and the commit). Sharding the counter would give
+    up the ordering that lets cursors never skip a change.
+    """
+    __tablename__ = "sync_counter"
+
+    id = db.Column(db.Integer, primary_key=True)
+    value = db.Column(db.BigInteger, nullable=False, default=0)
+    # tombstones at or below this seq have been purged; older cursors must resync fully
+    tombstone_floor = db.Column(db.BigInteger, nullable=False, default=0)
+
+
+event.listen(
+    SyncCounter.__table__, "after_create",
+    DDL("INSERT INTO sync_counter (id, value, tombstone_floor) VALUES (1, 0, 0)"),
+)
+
+
+class Tombstone(db.Model):
+    __tablename__ = "tombstones"
+
+    id = db.Column(db.Integer, primary_key=True)
+    entity = db.Column(db.String(20), nullable=False)
+    entity_id = db.Column(db.Integer, nullable=False)
+    change_seq = db.Column(db.BigInteger, nullable=False, index=True)
+    # owner of the deleted row; staff only receive their own attendance deletions
+    user_id = db.Column(db.Integer)
+    deleted_at = db.Column(db.DateTime, nullable=False, default=datetime.utcnow)
+
+    def __repr__(self):
+        return f"<Tombstone {self.entity}/{self.entity_id} seq={self.change_seq}>"
+
+
+def next_change_seq(connection) -> int:
+    """
+    Allocate the next change sequence number on `connection` (inside its
+    transaction). Bulk writers that bypass the ORM flush (INSERT ... SELECT,
+    set-based deletes) call this and stamp change_seq / tombstones themselves.
+    """
+    return connection.execute(
+        update(SyncCounter.__table__)
+        .where(SyncCounter.__table__.c.id == 1)
+        .values(value=SyncCounter.__table__.c.value + 1)
+        .returning(SyncCounter.__table__.c.value)
+    ).scalar_one()
+
+
+@event.listens_for(RoutingSession, "before_flush")
+def _stamp_changes(session, _flush_context, _instances):
+    changed = [
+        obj for obj in list(session.new) + list(session.dirty)
+        if type(obj) in SYNCED_MODELS and (obj in session.new or session.is_modified(obj, include_collections=False))
+    ]
+    deleted = [obj for obj in session.deleted if type(obj) in SYNCED_MODELS]
+    if not changed and not deleted:
+        return
+    # one number per flush: everything in it commits (or not) together
+    seq = next_change_seq(session.connection())
+    for obj in changed:
+        obj.change_seq = seq
+    for obj in deleted:
+        session.add(Tombstone(entity=SYNCED_MODELS[type(obj)], entity_id=obj.id, user_id=obj.user_id, change_seq=seq))
@@ -1,4 +1,4 @@
-from werkzeug.security import check_password_hash, generate_password_hash
+from App.passwords import hash_password, verify_password, needs_rehash
 from App.database import db
 from ..extensions import db
 
@@ -6,9 +6,28 @@ class User(db.Model):
     __tablename__ = "users"
     id = db.Column(db.Integer, primary_key=True)
     username =  db.Column(db.String(20), nullable=False, unique=True)
-    password = db.Column(db.String(120), nullable=False)
+    password = db.Column(db.String(256), nullable=False)
     isAdmin = db.Column(db.Boolean, default=False)
+    # Bumped to revoke every access token issued before the change
+    token_version = db.Column(db.Integer, nullable=False, default=0)
+
+    __table_args__ = (
+        # Prefix search (LIKE 'abc%'); text_pattern_ops keeps it usable under non-C collations
+        db.Index("ix_users_username_prefix", "username", postgresql_ops={"username": "text_pattern_ops"}),
+    )
     
+    # flask_login's user protocol; only authenticated users are ever loaded
+    is_authenticated = True
+    is_active = True
+    is_anonymous = False
+
+    def get_id(self):
+        return str(self.id)
+
+    @property
+    def is_admin(self):
+        return bool(self.isAdmin)
+
     def __repr__(self):
         return f"<User id={self.id} username={self.username!r} admin={self.isAdmin}>"
 
@@ -26,11 +45,14 @@ class User(db.Model):
 
     def set_password(self, password):
         """Create hashed password."""
-        self.password = generate_password_hash(password)
+        self.password = hash_password(password)
     
     def check_password(self, password):
         """Check hashed password."""
-        return check_password_hash(self.password, password)
+        return verify_password(self.password, password)
+
+    def password_needs_rehash(self):
+        return needs_rehash(self.password)
 
     def is_authenticated_admin(self):
         return self.isAdmin
@@ -0,0 +1,107 @@
+from datetime import datetime
+
+from sqlalchemy import event, insert, update
+from sqlalchemy.dialects import postgresql, sqlite
+
+from App.database import db, RoutingSession
+from App.models.shift import Shift
+
+
+def shift_hours(work_date, start_time, end_time) -> float:
+    """Same arithmetic as Shift.duration_hours, for values that aren't on an instance."""
+    delta = datetime.combine(work_date, end_time) - datetime.combine(work_date, start_time)
+    return max(delta.total_seconds() / 3600.0, 0)
+
+def iso_week(work_date):
+    year, week, _ = work_date.isocalendar()
+    return year, week
+
+
+class WeeklyHours(db.Model):
+    """
+    Scheduled hours per user per ISO week, kept in step with shift writes so
+    the weekly cap check is one primary-key lookup.
+    """
+    __tablename__ = "weekly_hours"
+
+    user_id = db.Column(db.Integer, db.ForeignKey("users.id"), primary_key=True)
+    iso_year = db.Column(db.Integer, primary_key=True)
+    iso_week = db.Column(db.Integer, primary_key=True)
+    scheduled_hours = db.Column(db.Float, nullable=False, default=0.0)
+
+    def __repr__(self):
+        return f"<WeeklyHours user={self.user_id} {self.iso_year}-W{self.iso_week:02d} {self.scheduled_hours}h>"
+
+
+_UPSERT_DIALECTS = {"sqlite": sqlite.insert, "postgresql": postgresql.insert}
+
+def add_weekly_hours(connection, deltas: dict):
+    """
+    Apply {(user_id, iso_year, iso_week): hours} on `connection`, in its transaction.
+    Bulk shift writers that skip the ORM flush call this themselves.
+    """
+    deltas = {key: hours for key, hours in deltas.items() if abs(hours) > 1e-9}
+    if not deltas:
+        return
+    table = WeeklyHours.__table__
+    rows = [
+        {"user_id": user_id, "iso_year": year, "iso_week": week, "scheduled_hours": hours}
+        for (user_id, year, week), hours in deltas.items()
+    ]
+    dialect_insert = _UPSERT_DIALECTS.get(connection.dialect.name)
+    if dialect_insert is not None:
+        stmt = dialect_insert(table)
+        connection.execute(stmt.on_conflict_do_update(
+            index_elements=[table.c.user_id, table.c.iso_year, table.c.iso_week],
+            set_={"scheduled_hours": table.c.scheduled_hours + stmt.excluded.scheduled_hours},
+        ), rows)
+        return
+    for row in rows:
+        updated = connection.execute(
+            update(table)
+            .where(table.c.user_id == row["user_id"], table.c.iso_year == row["iso_year"],
+                   table.c.iso_week == row["iso_week"])
+            .values(scheduled_hours=table.c.scheduled_hours + row["scheduled_hours"])
+        ).rowcount
+        if not updated:
+            connection.execute(insert(table), row)
+
+
+_WINDOW = ("user_id", "work_date", "start_time", "end_time")
+
+def _keep_old_value(target, value, oldvalue, initiator):
+    pass
+
+# active_history loads the old value when an expired attribute is assigned,
+# so the hook below can take the shift's hours off the week it used to be in
+for _name in _WINDOW:
+    event.listen(getattr(Shift, _name), "set", _keep_old_value, active_history=True)
+
+def _window(obj, committed):
+    state = db.inspect(obj)
+    values = []
+    for name in _WINDOW:
+        history = state.attrs[name].history
+        values.append(history.deleted[0] if committed and history.deleted else getattr(obj, name))
+    return values
+
+def _add(deltas, user_id, work_date, start_time, end_time, sign):
+    key = (user_id, *iso_week(work_date))
+    deltas[key] = deltas.get(key, 0.0) + sign * shift_hours(work_date, start_time, end_time)
+
+
+@event.listens_for(RoutingSession, "before_flush")
+def _track_weekly_hours(session, _flush_context, _instances):
+    deltas = {}
+    for obj in session.new:
+        if isinstance(obj, Shift):
+            _add(deltas, *_window(obj, committed=False), +1)
+    for obj in session.deleted:
+        if isinstance(obj, Shift):
+            _add(deltas, *_window(obj, committed=True), -1)
+    for obj in session.dirty:
+        if isinstance(obj, Shift) and any(db.inspect(obj).attrs[name].history.has_changes() for name in _WINDOW):
+            _add(deltas, *_window(obj, committed=True), -1)
+            _add(deltas, *_window(obj, committed=False), +1)
+    if deltas:
+        add_weekly_hours(session.connection(), deltas)
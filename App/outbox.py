@@ -0,0 +1,217 @@
+"""
+Outbox dispatcher: drains outbox_events (written in the same commit as each
+shift/attendance change, see App/models/outbox.py) to pluggable sinks.
+
+    flask outbox dispatch --sinks "http://localhost:9000/events,file:/var/log/shiftmate/outbox.jsonl"
+    flask outbox receive --port 9000      # local HTTP stand-in for payroll/BI
+
+Delivery is at-least-once: a batch goes to every sink, and if any sink fails
+the whole batch is retried with exponential backoff, so sinks should
+de-duplicate on the event id. Events are not delivered in order; each batch
+is sorted by id, but later events carry on while an earlier batch backs off
+or is leased by another dispatcher. After OUTBOX_MAX_ATTEMPTS an event is
+marked dead and left for inspection.
+
+Claiming a batch is its own short transaction: the rows are picked with
+FOR UPDATE SKIP LOCKED, leased by pushing next_attempt_at OUTBOX_LEASE_SECONDS
+ahead, and committed before any sink is called, so no row lock is held while
+a sink is slow. A dispatcher that dies mid-delivery leaves the lease to run
+out, and the batch is delivered again.
+
+Sinks (OUTBOX_SINKS, comma separated):
+  http(s)://...          POST {"events": [...]} as JSON
+  file:<path>            append one JSON line per event
+  queue:<name>           in-process queue.Queue (tests, embedding)
+  package.module:Class   anything with send(events)
+
+    OUTBOX_BATCH_SIZE = 100
+    OUTBOX_MAX_ATTEMPTS = 10
+    OUTBOX_BACKOFF_SECONDS = 1        # doubled per attempt, capped at OUTBOX_MAX_BACKOFF_SECONDS
+    OUTBOX_MAX_BACKOFF_SECONDS = 300
+    OUTBOX_POLL_INTERVAL = 1.0
+    OUTBOX_LEASE_SECONDS = 120        # longer than a batch takes to deliver to every sink
+"""
+import json
+import queue
+import random
+import threading
+import time
+import urllib.request
+from datetime import datetime, timedelta
+
+from prometheus_client import Counter, Gauge, Histogram
+from sqlalchemy import select, update
+from werkzeug.utils import import_string
+
+from App.controllers.outbox_controller import get_outbox_stats
+from App.database import db
+from App.models import OutboxEvent
+from App.models.outbox import DEAD, PENDING, SENT
+from App.serialization import json_default
+
+EVENTS_DISPATCHED = Counter('shiftmate_outbox_events_dispatched_total', 'Outbox events delivered to every sink')
+DISPATCH_FAILURES = Counter('shiftmate_outbox_dispatch_failures_total', 'Failed batch deliveries by sink', ['sink'])
+EVENTS_DEAD = Counter('shiftmate_outbox_events_dead_total', 'Outbox events given up on after max attempts')
+BATCH_SECONDS = Histogram('shiftmate_outbox_batch_seconds', 'Time to deliver one batch to all sinks')
+PENDING_EVENTS = Gauge('shiftmate_outbox_pending_events', 'Outbox events not yet delivered')
+LAG_SECONDS = Gauge('shiftmate_outbox_lag_seconds', 'Age of the oldest undelivered outbox event')
+
+
+# ---------- sinks ----------
+
+class HttpSink:
+    def __init__(self, url, timeout=10):
+        self.url = url
+        self.timeout = timeout
+
+    def send(self, events):
+        body = json.dumps({"events": events}, default=json_default).encode()
+        req = urllib.request.Request(self.url, data=body, headers={"Content-Type": "application/json"})
+        with urllib.request.urlopen(req, timeout=self.timeout) as resp:
+            resp.read()
+
+    def __str__(self):
+        return self.url
+
+
+class FileSink:
+    def __init__(self, path):
+        self.path = path
+
+    def send(self, events):
+        with open(self.path, "a") as fh:
+            for event in events:
+                fh.write(json.dumps(event, default=json_default) + "\n")
+
+    def __str__(self):
+        return f"file:{self.path}"
+
+
+class QueueSink:
+    """Puts every event on an in-process queue; queue:<name> sinks share one queue per name."""
+    queues = {}
+
+    def __init__(self, name="default"):
+        self.name = name
+        self.queue = self.queues.setdefault(name, queue.Queue())
+
+    def send(self, events):
+        for event in events:
+            self.queue.put(event)
+
+    def __str__(self):
+        return f"queue:{self.name}"
+
+
+def build_sinks(spec):
+    sinks = []
+    for item in filter(None, (part.strip() for part in (spec or "").split(","))):
+        if item.startswith(("http://", "https://")):
+            sinks.append(HttpSink(item))
+        elif item.startswith("file:"):
+            sinks.append(FileSink(item[len("file:"):]))
+        elif item.startswith("queue:"):
+            sinks.append(QueueSink(item[len("queue:"):] or "default"))
+        else:
+            sinks.append(import_string(item)())
+    return sinks
+
+
+# ---------- dispatcher ----------
+
+class OutboxDispatcher:
+    def __init__(self, app, sinks, batch_size=None):
+        config = app.config
+        self.app = app
+        self.sinks = sinks
+        self.batch_size = batch_size or config.get("OUTBOX_BATCH_SIZE", 100)
+        self.max_attempts = config.get("OUTBOX_MAX_ATTEMPTS", 10)
+        self.backoff = config.get("OUTBOX_BACKOFF_SECONDS", 1)
+        self.max_backoff = config.get("OUTBOX_MAX_BACKOFF_SECONDS", 300)
+        self.poll_interval = config.get("OUTBOX_POLL_INTERVAL", 1.0)
+        self.lease = config.get("OUTBOX_LEASE_SECONDS", 120)
+        self.stopping = threading.Event()
+
+    def _claim(self):
+        """Lease the next due batch and commit; returns the events as JSON, sorted by id."""
+        now = datetime.utcnow()
+        stmt = (
+            select(OutboxEvent)
+            .where(OutboxEvent.status == PENDING, OutboxEvent.next_attempt_at <= now)
+            .order_by(OutboxEvent.id)
+            .limit(self.batch_size)
+            # several dispatchers can run side by side on Postgres; SQLite ignores this
+            .with_for_update(skip_locked=True)
+        )
+        batch = db.session.scalars(stmt).all()
+        events = [event.get_json() for event in batch]
+        for event in batch:
+            event.next_attempt_at = now + timedelta(seconds=self.lease)
+        db.session.commit()
+        return events
+
+    def _retry_delay(self, attempts):
+        delay = min(self.backoff * 2 ** (attempts - 1), self.max_backoff)
+        return delay * random.uniform(0.8, 1.2)
+
+    def _deliver(self, events):
+        for sink in self.sinks:
+            try:
+                sink.send(events)
+            except Exception:
+                DISPATCH_FAILURES.labels(sink=str(sink)).inc()
+                raise
+
+    def _record_failure(self, ids, exc):
+        now = datetime.utcnow()
+        # PENDING only: another dispatcher may have delivered the batch after our lease ran out
+        for event in OutboxEvent.query.filter(OutboxEvent.id.in_(ids), OutboxEvent.status == PENDING):
+            event.attempts += 1
+            event.last_error = f"{type(exc).__name__}: {exc}"[:2000]
+            if event.attempts >= self.max_attempts:
+                event.status = DEAD
+                EVENTS_DEAD.inc()
+            else:
+                event.next_attempt_at = now + timedelta(seconds=self._retry_delay(event.attempts))
+        db.session.commit()
+
+    def run_once(self):
+        """Deliver one batch; returns how many events were delivered."""
+        with self.app.app_context():
+            events = self._claim()
+            if not events:
+                self._update_gauges()
+                return 0
+            ids = [event["id"] for event in events]
+            started = time.perf_counter()
+            try:
+                self._deliver(events)
+            except Exception as exc:
+                self._record_failure(ids, exc)
+                self.app.logger.warning("outbox: batch of %d failed: %s", len(events), exc)
+                self._update_gauges()
+                return 0
+            BATCH_SECONDS.observe(time.perf_counter() - started)
+            db.session.execute(
+                update(OutboxEvent).where(OutboxEvent.id.in_(ids))
+                .values(status=SENT, dispatched_at=datetime.utcnow(), last_error=None)
+            )
+            db.session.commit()
+            EVENTS_DISPATCHED.inc(len(events))
+            self._update_gauges()
+            return len(events)
+
+    def _update_gauges(self):
+        stats = get_outbox_stats()
+        PENDING_EVENTS.set(stats["pending"])
+        LAG_SECONDS.set(stats["lag_seconds"])
+
+    def run(self):
+        """Drain until stop(); full batches are followed immediately by the next one."""
+        while not self.stopping.is_set():
+            delivered = self.run_once()
+            if delivered < self.batch_size:
+                self.stopping.wait(self.poll_interval)
+
+    def stop(self):
+        self.stopping.set()
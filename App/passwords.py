@@ -0,0 +1,88 @@
+from __future__ import annotations
+
+import threading
+from typing import Callable, Optional
+
+from werkzeug.security import check_password_hash, generate_password_hash
+
+
+class PasswordHashingBusy(RuntimeError):
+    """Raised when too many hash operations are already queued in this process."""
+
+
+# ---------- settings (overridden from app config by init_password_hashing) ----------
+
+_method = "scrypt"          # werkzeug method string, e.g. "scrypt" or "pbkdf2:sha256:600000"
+_workers = 4                # native threads used under gevent; 0 hashes inline
+_queue_timeout = 5.0        # seconds a caller may wait for a free slot
+
+_slots = threading.BoundedSemaphore(16)
+_pool = None
+_pool_lock = threading.Lock()
+_method_prefixes: dict = {}
+
+
+def init_password_hashing(app) -> None:
+    global _method, _workers, _queue_timeout, _slots, _pool
+    _method = app.config.get("PASSWORD_HASH_METHOD", _method)
+    _workers = int(app.config.get("PASSWORD_HASH_WORKERS", _workers))
+    _queue_timeout = float(app.config.get("PASSWORD_HASH_QUEUE_TIMEOUT", _queue_timeout))
+    # running + waiting operations; anything beyond this fails fast instead of piling up
+    _slots = threading.BoundedSemaphore(int(app.config.get("PASSWORD_HASH_MAX_PENDING", 4 * max(_workers, 1))))
+    _pool = None
+
+
+def _gevent_active() -> bool:
+    try:
+        from gevent import monkey
+    except ImportError:
+        return False
+    return monkey.is_module_patched("threading")
+
+
+def _get_pool():
+    """
+    Native thread pool, only under gevent: there hashing inline would block the
+    whole worker's event loop. hashlib releases the GIL while it hashes, so the
+    other greenlets keep running. Sync workers already have a thread per request.
+    """
+    global _pool
+    if _workers <= 0 or not _gevent_active():
+        return None
+    with _pool_lock:
+        if _pool is None:
+            from gevent.threadpool import ThreadPool
+            _pool = ThreadPool(_workers)
+        return _pool
+
+
+def _run(fn: Callable, *args):
+    if not _slots.acquire(timeout=_queue_timeout):
+        raise PasswordHashingBusy("Password hashing is saturated, retry shortly.")
+    try:
+        pool = _get_pool()
+        if pool is None:
+            return fn(*args)
+        return pool.apply(fn, args)
+    finally:
+        _slots.release()
+
+
+# ---------- public helpers ----------
+
+def hash_password(password: str, method: Optional[str] = None) -> str:
+    return _run(generate_password_hash, password, method or _method)
+
+
+def verify_password(pwhash: str, password: str) -> bool:
+    return _run(check_password_hash, pwhash, password)
+
+
+def needs_rehash(pwhash: str) -> bool:
+    """True when a stored hash was made with a different method or cost than configured."""
+    prefix = _method_prefixes.get(_method)
+    if prefix is None:
+        # werkzeug fills in default parameters, so learn the full prefix from one real hash
+        prefix = hash_password("").split("$", 1)[0]
+        _method_prefixes[_method] = prefix
+    return pwhash.split("$", 1)[0] != prefix
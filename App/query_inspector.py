@@ -0,0 +1,118 @@
+"""
+Statement counting for query budgets in tests, plus a dev-mode N+1 warning.
+
+    with assert_max_queries(2, max_repeats=1):
+        weekly_report(week_start)
+"""
+import os
+import re
+import traceback
+from collections import Counter
+from contextlib import contextmanager
+
+from flask import current_app, g, has_request_context, request
+from sqlalchemy import event
+from sqlalchemy.engine import Engine
+
+_IN_LIST = re.compile(r"\(\s*\?(?:\s*,\s*\?)+\s*\)")
+_PYFORMAT = re.compile(r"%\(\w+\)s")
+_WHITESPACE = re.compile(r"\s+")
+_APP_DIR = os.path.dirname(os.path.abspath(__file__))
+
+
+def statement_shape(statement: str) -> str:
+    """Normalize a statement so the same query with different parameters compares equal."""
+    shape = _PYFORMAT.sub("?", statement)
+    shape = _IN_LIST.sub("(?...)", shape)
+    return _WHITESPACE.sub(" ", shape).strip()
+
+
+def _call_site():
+    """Innermost frame in application code that isn't this module."""
+    for frame in reversed(traceback.extract_stack()[:-1]):
+        path = os.path.abspath(frame.filename)
+        if path.startswith(_APP_DIR) and path != os.path.abspath(__file__):
+            return f"{os.path.relpath(path, os.path.dirname(_APP_DIR))}:{frame.lineno} in {frame.name}"
+    return "unknown"
+
+
+class QueryCounter:
+    """Context manager recording every statement executed on any engine."""
+
+    def __init__(self):
+        self.statements = []
+
+    def __enter__(self):
+        event.listen(Engine, "before_cursor_execute", self._record)
+        return self
+
+    def __exit__(self, *exc):
+        event.remove(Engine, "before_cursor_execute", self._record)
+        return False
+
+    def _record(self, conn, cursor, statement, parameters, context, executemany):
+        self.statements.append(statement)
+
+    @property
+    def count(self) -> int:
+        return len(self.statements)
+
+    def shapes(self) -> Counter:
+        return Counter(statement_shape(s) for s in self.statements)
+
+    def repeated(self, threshold: int = 2) -> dict:
+        """Statement shapes executed at least `threshold` times: the N+1 signature."""
+        return {shape: n for shape, n in self.shapes().items() if n >= threshold}
+
+    def report(self) -> str:
+        return "\n".join(f"  {n}x {shape}" for shape, n in self.shapes().most_common())
+
+
+@contextmanager
+def assert_max_queries(limit: int, max_repeats: int = None):
+    """
+    Fail if the block runs more than `limit` statements, or (with max_repeats)
+    if any single statement shape runs more than `max_repeats` times.
+    """
+    with QueryCounter() as counter:
+        yield counter
+    if counter.count > limit:
+        raise AssertionError(f"Expected at most {limit} queries, ran {counter.count}:\n{counter.report()}")
+    if max_repeats is not None:
+        repeated = counter.repeated(max_repeats + 1)
+        if repeated:
+            raise AssertionError(f"Repeated statements (limit {max_repeats} each):\n{counter.report()}")
+
+
+# ---------- dev mode: warn about repeated statements within one request ----------
+
+@event.listens_for(Engine, "before_cursor_execute")
+def _inspect_statement(conn, cursor, statement, parameters, context, executemany):
+    if not has_request_context() or "_query_shapes" not in g:
+        return
+    shape = statement_shape(statement)
+    seen = g._query_shapes[shape] = g._query_shapes.get(shape, 0) + 1
+    if seen == current_app.config.get("NPLUSONE_THRESHOLD", 3):
+        g._query_call_sites[shape] = _call_site()
+
+def _start_inspection():
+    g._query_shapes = {}
+    g._query_call_sites = {}
+
+def _report_repeats(response):
+    # popped so a long-lived app context (CLI, tests) doesn't keep collecting
+    shapes = g.pop("_query_shapes", {})
+    call_sites = g.pop("_query_call_sites", {})
+    for shape, site in call_sites.items():
+        current_app.logger.warning(
+            "Possible N+1 in %s: %d identical statements, repeated at %s: %s",
+            request.endpoint, shapes[shape], site, shape[:200],
+        )
+    return response
+
+def init_query_inspector(app):
+    """Enabled in debug mode, or explicitly with QUERY_INSPECTOR=True."""
+    if not app.config.get("QUERY_INSPECTOR", app.debug):
+        return
+    app.before_request(_start_inspection)
+    app.after_request(_report_repeats)
@@ -0,0 +1,300 @@
+"""
+Process-local cache of the hot roster window: this week and the next
+ROSTER_CACHE_WEEKS - 1, where most roster traffic lands.
+
+Shifts are held column-wise in `array` columns (id, user id, date ordinal,
+start/end minute, interned role/location ids), sorted by date and start. That
+costs about 28 bytes a shift against well over a kilobyte for an ORM object and
+its state. get_roster and per-user lookups inside the window are answered by
+bisecting the date column, without touching the database.
+
+Ranges outside the window go straight to the database, without touching the
+cache. The cache follows the /api/sync change cursor. At most every
+ROSTER_CACHE_REFRESH_SECONDS it reads the counter; if the counter moved, only
+shifts in the window with a newer change_seq are fetched, plus the ids of new
+shift tombstones and of changed shifts now dated outside the window.
+A commit in this process that touched shifts forces a refresh on the next read,
+so a worker always sees its own writes. Refreshes read on their own primary
+connection rather than the caller's session, so they never go to a replica
+or pick up a caller's uncommitted rows. A full reload happens when the window
+rolls over to a new week or the cursor falls behind purged tombstones.
+
+    ROSTER_CACHE = True
+    ROSTER_CACHE_WEEKS = 3
+    ROSTER_CACHE_REFRESH_SECONDS = 1.0
+"""
+from __future__ import annotations
+
+import sys
+import threading
+import time
+from array import array
+from bisect import bisect_left, bisect_right
+from datetime import date, timedelta
+from typing import Optional
+
+from flask import current_app, has_app_context
+from sqlalchemy import event, select, union_all
+
+from App.database import db, RoutingSession
+from App.models import Shift, SyncCounter, Tombstone, User
+
+NO_STRING = -1
+
+_SHIFT_COLUMNS = (Shift.id, Shift.user_id, Shift.work_date, Shift.start_time, Shift.end_time, Shift.role, Shift.location)
+
+
+def _minutes(value) -> int:
+    return value.hour * 60 + value.minute
+
+def _hhmm(minutes: int) -> str:
+    return f"{minutes // 60:02d}:{minutes % 60:02d}"
+
+
+class _Snapshot:
+    """Immutable column set; refreshes build a new one and swap it in, so readers never lock."""
+    __slots__ = ("first_day", "last_day", "ids", "user_ids", "days", "starts", "ends",
+                 "roles", "locations", "by_user")
+
+    def __init__(self, first_day: date, last_day: date, rows: list):
+        rows.sort(key=lambda r: (r[2], r[3], r[0]))
+        self.first_day, self.last_day = first_day, last_day
+        self.ids = array("i", (r[0] for r in rows))
+        self.user_ids = array("i", (r[1] for r in rows))
+        self.days = array("i", (r[2] for r in rows))
+        self.starts = array("H", (r[3] for r in rows))
+        self.ends = array("H", (r[4] for r in rows))
+        self.roles = array("i", (r[5] for r in rows))
+        self.locations = array("i", (r[6] for r in rows))
+        positions = {}
+        for position, user_id in enumerate(self.user_ids):
+            positions.setdefault(user_id, []).append(position)
+        self.by_user = {user_id: array("i", found) for user_id, found in positions.items()}
+
+    def rows(self):
+        return zip(self.ids, self.user_ids, self.days, self.starts, self.ends, self.roles, self.locations)
+
+    def nbytes(self) -> int:
+        columns = (self.ids, self.user_ids, self.days, self.starts, self.ends, self.roles, self.locations)
+        return (sum(c.itemsize * len(c) for c in columns)
+                + sum(a.itemsize * len(a) for a in self.by_user.values()))
+
+
+# same names and formats as Shift.get_json / SHIFT_FIELDS
+_RENDER = {
+    "id": lambda cache, snap, i: snap.ids[i],
+    "user_id": lambda cache, snap, i: snap.user_ids[i],
+    "username": lambda cache, snap, i: cache._usernames.get(snap.user_ids[i]),
+    "date": lambda cache, snap, i: date.fromordinal(snap.days[i]).isoformat(),
+    "start": lambda cache, snap, i: _hhmm(snap.starts[i]),
+    "end": lambda cache, snap, i: _hhmm(snap.ends[i]),
+    "role": lambda cache, snap, i: cache._string(snap.roles[i]),
+    "location": lambda cache, snap, i: cache._string(snap.locations[i]),
+}
+
+
+class RosterWindowCache:
+    def __init__(self, weeks: int = 3, refresh_interval: float = 1.0):
+        self.weeks = weeks
+        self.refresh_interval = refresh_interval
+        self._snapshot: Optional[_Snapshot] = None
+        self._cursor = 0
+        self._checked_at = 0.0
+        self._dirty = False
+        # held while refreshing and around every change to the shared tables below;
+        # re-entrant because a flush on the refreshing thread can fire _username_changed
+        self._lock = threading.RLock()
+        self._stats_lock = threading.Lock()
+        # role and location strings share one table; rows hold their index
+        self._strings: list = []
+        self._string_ids: dict = {}
+        self._usernames: dict = {}
+        self.stats = {"hits": 0, "misses": 0, "full_loads": 0, "incremental_loads": 0}
+
+    # ---------- encoding ----------
+
+    def _intern(self, value) -> int:
+        if value is None:
+            return NO_STRING
+        string_id = self._string_ids.get(value)
+        if string_id is None:
+            string_id = self._string_ids[value] = len(self._strings)
+            self._strings.append(sys.intern(value))
+        return string_id
+
+    def _string(self, string_id: int):
+        return None if string_id == NO_STRING else self._strings[string_id]
+
+    def _encode(self, row) -> tuple:
+        shift_id, user_id, work_date, start, end, role, location = row
+        return (shift_id, user_id, work_date.toordinal(), _minutes(start), _minutes(end),
+                self._intern(role), self._intern(location))
+
+    # ---------- loading ----------
+
+    def window(self, today: Optional[date] = None) -> tuple:
+        today = today or date.today()
+        first = today - timedelta(days=today.weekday())
+        return first, first + timedelta(days=7 * self.weeks - 1)
+
+    def invalidate(self) -> None:
+        self._dirty = True
+
+    def _count(self, stat: str) -> None:
+        with self._stats_lock:
+            self.stats[stat] += 1
+
+    def forget_user(self, user_id: int) -> None:
+        with self._lock:
+            self._usernames.pop(user_id, None)
+        self.invalidate()
+
+    def _read_counter(self, connection):
+        return connection.execute(select(SyncCounter.value, SyncCounter.tombstone_floor)).one()
+
+    def _load_full(self, connection, first: date, last: date, cursor: int) -> _Snapshot:
+        rows = connection.execute(
+            select(*_SHIFT_COLUMNS).where(Shift.work_date >= first, Shift.work_date <= last)
+        )
+        self._count("full_loads")
+        self._cursor = cursor
+        return _Snapshot(first, last, [self._encode(row) for row in rows])
+
+    def _load_changes(self, connection, snapshot: _Snapshot, cursor: int) -> _Snapshot:
+        since = Shift.change_seq > self._cursor
+        in_window = Shift.work_date.between(snapshot.first_day, snapshot.last_day)
+        changed = connection.execute(select(*_SHIFT_COLUMNS).where(since, in_window)).all()
+        # ids only: deleted shifts, and shifts moved to a date outside the window
+        gone = set(connection.scalars(union_all(
+            select(Tombstone.entity_id).where(Tombstone.entity == "shifts", Tombstone.change_seq > self._cursor),
+            select(Shift.id).where(since, ~in_window),
+        )))
+        gone.update(row.id for row in changed)
+        rows = [row for row in snapshot.rows() if row[0] not in gone]
+        rows.extend(map(self._encode, changed))
+        self._count("incremental_loads")
+        self._cursor = cursor
+        return _Snapshot(snapshot.first_day, snapshot.last_day, rows)
+
+    def _load_usernames(self, connection, snapshot: _Snapshot) -> None:
+        missing = [user_id for user_id in snapshot.by_user if user_id not in self._usernames]
+        if missing:
+            for user_id, username in connection.execute(select(User.id, User.username).where(User.id.in_(missing))):
+                self._usernames[user_id] = username
+
+    def refresh(self, force: bool = False) -> _Snapshot:
+        """Bring the window up to date if it is due (or `force`); returns the current snapshot."""
+        snapshot = self._snapshot
+        now = time.monotonic()
+        first, last = self.window()
+        stale = snapshot is None or snapshot.first_day != first
+        if not (force or stale or self._dirty or now - self._checked_at >= self.refresh_interval):
+            return snapshot
+        # one refresher at a time; other readers keep using the current snapshot
+        if not self._lock.acquire(blocking=snapshot is None or stale):
+            return snapshot
+        try:
+            self._dirty = False
+            with db.engine.connect() as connection:
+                cursor, floor = self._read_counter(connection)
+                if stale or self._cursor < floor:
+                    snapshot = self._load_full(connection, first, last, cursor)
+                elif cursor != self._cursor:
+                    snapshot = self._load_changes(connection, self._snapshot, cursor)
+                self._load_usernames(connection, snapshot)
+            self._snapshot = snapshot
+            self._checked_at = now
+            return snapshot
+        finally:
+            self._lock.release()
+
+    # ---------- lookups ----------
+
+    def roster(self, start: date, end: date, fields=None, user_id: Optional[int] = None) -> Optional[list]:
+        """
+        Same dicts as get_roster for [start, end], or None when the range is not
+        entirely inside the cached window (the caller then asks the database).
+        A miss costs no query; a hit refreshes the window first when it is due.
+        """
+        first, last = self.window()
+        if start < first or end > last:
+            self._count("misses")
+            return None
+        snapshot = self.refresh()
+        if snapshot is None or start < snapshot.first_day or end > snapshot.last_day:
+            self._count("misses")
+            return None
+        self._count("hits")
+        lo = bisect_left(snapshot.days, start.toordinal())
+        hi = bisect_right(snapshot.days, end.toordinal())
+        if user_id is None:
+            positions = range(lo, hi)
+        else:
+            mine = snapshot.by_user.get(user_id, ())
+            positions = mine[bisect_left(mine, lo):bisect_left(mine, hi)]
+        plan = [(name, _RENDER[name]) for name in fields or _RENDER]
+        return [{name: render(self, snapshot, position) for name, render in plan} for position in positions]
+
+    def user_shifts(self, user_id: int) -> Optional[list]:
+        """Every shift `user_id` has in the window."""
+        snapshot = self.refresh()
+        if snapshot is None:
+            return None
+        return self.roster(snapshot.first_day, snapshot.last_day, user_id=user_id)
+
+    def footprint(self) -> dict:
+        snapshot = self._snapshot
+        strings = sum(sys.getsizeof(s) for s in self._strings)
+        usernames = sum(sys.getsizeof(u) for u in self._usernames.values())
+        arrays = snapshot.nbytes() if snapshot else 0
+        with self._stats_lock:
+            stats = dict(self.stats)
+        return {
+            "window": [snapshot.first_day, snapshot.last_day] if snapshot else None,
+            "cursor": self._cursor,
+            "shifts": len(snapshot.ids) if snapshot else 0,
+            "users": len(snapshot.by_user) if snapshot else 0,
+            "strings": len(self._strings),
+            "array_bytes": arrays,
+            "string_bytes": strings + usernames,
+            "total_bytes": arrays + strings + usernames,
+            **stats,
+        }
+
+
+def get_roster_cache() -> Optional[RosterWindowCache]:
+    return current_app.extensions.get("roster_cache") if has_app_context() else None
+
+
+# ---------- invalidation on local writes ----------
+
+@event.listens_for(RoutingSession, "before_flush")
+def _note_shift_writes(session, _flush_context, _instances):
+    if any(isinstance(obj, Shift) for obj in (*session.new, *session.dirty, *session.deleted)):
+        session.info["roster_changed"] = True
+
+@event.listens_for(RoutingSession, "after_commit")
+def _invalidate_after_commit(session):
+    if session.info.pop("roster_changed", False):
+        cache = get_roster_cache()
+        if cache is not None:
+            cache.invalidate()
+
+@event.listens_for(RoutingSession, "after_rollback")
+def _forget_rolled_back(session):
+    session.info.pop("roster_changed", None)
+
+@event.listens_for(User, "after_update")
+def _username_changed(_mapper, _connection, target):
+    cache = get_roster_cache()
+    if cache is not None:
+        cache.forget_user(target.id)
+
+
+def init_roster_cache(app) -> None:
+    if not app.config.get("ROSTER_CACHE", True):
+        return
+    app.extensions["roster_cache"] = RosterWindowCache(
+        weeks=app.config.get("ROSTER_CACHE_WEEKS", 3),
+        refresh_interval=app.config.get("ROSTER_CACHE_REFRESH_SECONDS", 1.0),
+    )
@@ -0,0 +1,78 @@
+"""
+JSON provider for Flask built on orjson, with a stdlib fallback.
+
+Either way any date, time or datetime that reaches it is written as ISO 8601.
+Models and controllers still format their own dates with isoformat(), so
+get_json() output is plain JSON whichever provider is in use, or none (the
+CLI prints it with json.dumps). Select with JSON_PROVIDER = "fast" (default),
+"default" (Flask's own), or a dotted path to another JSONProvider subclass.
+"""
+import dataclasses
+import decimal
+import json
+import uuid
+from datetime import date, datetime, time
+
+from flask.json.provider import DefaultJSONProvider
+from werkzeug.utils import import_string
+
+try:
+    import orjson
+except ImportError:  # pragma: no cover - optional speedup
+    orjson = None
+
+
+def json_default(o):
+    if isinstance(o, (date, datetime, time)):
+        return o.isoformat()
+    if isinstance(o, (decimal.Decimal, uuid.UUID)):
+        return str(o)
+    if isinstance(o, (set, frozenset)):
+        return list(o)
+    if dataclasses.is_dataclass(o) and not isinstance(o, type):
+        return dataclasses.asdict(o)
+    if hasattr(o, "__html__"):
+        return str(o.__html__())
+    raise TypeError(f"Object of type {type(o).__name__} is not JSON serializable")
+
+
+class FastJSONProvider(DefaultJSONProvider):
+    # Sorting keys costs time on every response and no client relies on it
+    sort_keys = False
+
+    # int keys (e.g. weekly_report totals_per_user) are stringified like json.dumps does
+    OPTIONS = orjson.OPT_NON_STR_KEYS if orjson is not None else 0
+    default = staticmethod(json_default)
+
+    def dumps(self, obj, **kwargs):
+        if orjson is not None and not kwargs:
+            return orjson.dumps(obj, default=json_default, option=self.OPTIONS).decode()
+        kwargs.setdefault("default", json_default)
+        kwargs.setdefault("sort_keys", self.sort_keys)
+        return json.dumps(obj, **kwargs)
+
+    def loads(self, s, **kwargs):
+        if orjson is not None and not kwargs:
+            return orjson.loads(s)
+        return json.loads(s, **kwargs)
+
+    def response(self, *args, **kwargs):
+        if orjson is None or self._app.debug:
+            # pretty-printed debug output goes through the stdlib path
+            return super().response(*args, **kwargs)
+        obj = self._prepare_response_obj(args, kwargs)
+        # bytes straight into the response, skipping the str round trip
+        body = orjson.dumps(obj, default=json_default, option=self.OPTIONS | orjson.OPT_APPEND_NEWLINE)
+        return self._app.response_class(body, mimetype=self.mimetype)
+
+
+JSON_PROVIDERS = {
+    "fast": FastJSONProvider,
+    "default": DefaultJSONProvider,
+}
+
+
+def init_json(app):
+    provider = app.config.get("JSON_PROVIDER", "fast")
+    provider_class = JSON_PROVIDERS.get(provider) or import_string(provider)
+    app.json = provider_class(app)
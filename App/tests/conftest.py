@@ -0,0 +1,38 @@
+import os, tempfile
+import pytest
+from flask.globals import _cv_app
+
+from App.main import create_app
+from App.database import db
+
+
+@pytest.fixture
+def make_app():
+    """
+    make_app(config=None, name="test", mode="cli") -> an app on a fresh SQLite
+    file, tables created. Teardown drops the tables, pops the app context that
+    create_app pushed and removes the temporary directory.
+    """
+    made = []
+
+    def make(config=None, name="test", mode="cli"):
+        tmpdir = tempfile.TemporaryDirectory()
+        uri = f"sqlite:///{os.path.join(tmpdir.name, name + '.db')}"
+        app = create_app({"SQLALCHEMY_DATABASE_URI": uri, **(config or {})}, mode=mode)
+        made.append((_cv_app.get(), tmpdir))
+        db.create_all()
+        return app
+
+    yield make
+    for ctx, tmpdir in reversed(made):
+        db.session.remove()
+        db.drop_all()
+        for engine in db.engines.values():
+            engine.dispose()
+        ctx.pop()
+        tmpdir.cleanup()
+
+
+@pytest.fixture
+def app(make_app):
+    return make_app()
@@ -0,0 +1,119 @@
+from datetime import date, time as dtime
+import pytest
+
+from App.controllers import create_user, create_user_token, schedule_shift
+
+
+@pytest.fixture
+def client(app):
+    from App.api import api
+    app.register_blueprint(api)
+    return app.test_client()
+
+
+@pytest.fixture
+def setup(client):
+    admin = create_user("boss", "bosspass", isAdmin=True)
+    staff = create_user("staff", "staffpass")
+    shift = schedule_shift(staff.id, date(2025, 3, 3), dtime(9), dtime(17))
+    return {
+        "admin": {"Authorization": f"Bearer {create_user_token(admin)}"},
+        "staff": {"Authorization": f"Bearer {create_user_token(staff)}"},
+        "shift_id": shift.id,
+        "staff_id": staff.id,
+    }
+
+
+def test_batch_runs_sub_requests_in_order(client, setup):
+    roster = {"path": "/api/roster?start=2025-03-03&end=2025-03-09"}
+    new_shift = {"user_id": setup["staff_id"], "date": "2025-03-04", "start": "09:00", "end": "17:00"}
+    resp = client.post("/api/batch", headers=setup["admin"], json={"requests": [
+        {"id": "before", **roster},
+        {"id": "create", "method": "POST", "path": "/api/admin/shifts", "body": new_shift},
+        {"id": "after", **roster},
+    ]})
+    assert resp.status_code == 200
+    before, created, after = resp.get_json()["responses"]
+    assert (before["id"], before["status"], len(before["body"])) == ("before", 200, 1)
+    assert created["status"] == 201 and created["body"]["date"] == "2025-03-04"
+    assert [s["id"] for s in after["body"]] == [setup["shift_id"], created["body"]["id"]]
+
+
+def test_sub_requests_keep_their_own_auth_and_errors(client, setup):
+    resp = client.post("/api/batch", headers=setup["staff"], json={"requests": [
+        {"path": "/api/admin/reports/weekly?week_start=2025-03-03"},
+        {"path": "/api/nope"},
+        {"method": "POST", "path": "/api/batch", "body": {"requests": []}},
+    ]})
+    assert [r["status"] for r in resp.get_json()["responses"]] == [403, 404, 404]
+
+
+def test_concurrent_reads_match_sequential(client, setup):
+    reads = [{"id": n, "path": "/api/roster?start=2025-03-03&end=2025-03-09"} for n in range(4)]
+    sequential = client.post("/api/batch", headers=setup["admin"], json={"requests": reads}).get_json()
+    concurrent = client.post("/api/batch", headers=setup["admin"],
+                             json={"requests": reads, "concurrent_reads": True}).get_json()
+    assert concurrent == sequential
+    assert [r["id"] for r in concurrent["responses"]] == [0, 1, 2, 3]
+
+
+def test_invalid_batches_rejected(client, setup):
+    assert client.post("/api/batch", headers=setup["staff"], json={"requests": []}).status_code == 400
+    too_many = {"requests": [{"path": "/api/roster"}] * 21}
+    assert client.post("/api/batch", headers=setup["staff"], json=too_many).status_code == 400
+
+
+def test_sub_requests_honour_idempotency_keys(client, setup):
+    from App.idempotency import init_idempotency
+    from App.models import Shift
+    init_idempotency(client.application)
+    create = {"method": "POST", "path": "/api/admin/shifts", "headers": {"Idempotency-Key": "batch-shift"},
+              "body": {"user_id": setup["staff_id"], "date": "2025-03-05", "start": "09:00", "end": "17:00"}}
+    first, retry = (
+        client.post("/api/batch", headers=setup["admin"], json={"requests": [create]}).get_json()["responses"][0]
+        for _ in range(2)
+    )
+    assert first["status"] == retry["status"] == 201 and first["body"] == retry["body"]
+    assert retry["headers"]["Idempotent-Replayed"] == "true"
+    assert Shift.query.filter_by(work_date=date(2025, 3, 5)).count() == 1
+
+    other = {**create, "headers": {"Cookie": "session=stolen"}}
+    assert client.post("/api/batch", headers=setup["admin"], json={"requests": [other]}).status_code == 400
+
+
+def test_rejected_sub_requests_leave_nothing_behind(client, setup, monkeypatch):
+    from App.database import db
+    from App.models import User
+
+    def half_done():
+        db.session.add(User("orphan", "orphanpass", False))
+        db.session.flush()
+        return {"message": "changed my mind"}, 422
+
+    monkeypatch.setitem(client.application.view_functions, "api.api_weekly_report", half_done)
+    resp = client.post("/api/batch", headers=setup["admin"], json={"requests": [
+        {"path": "/api/admin/reports/weekly?week_start=2025-03-03"},
+    ]})
+    assert resp.get_json()["responses"][0]["status"] == 422
+    assert User.query.filter_by(username="orphan").count() == 0
+
+
+def test_sub_requests_share_the_session_and_user_lookup(client, setup, monkeypatch):
+    from App.database import db
+    from App.controllers.auth import user_cache
+    from App.query_inspector import QueryCounter
+    seen = []
+    view = client.application.view_functions["api.api_weekly_report"]
+
+    def recording_view():
+        seen.append(db.session())
+        return view()
+
+    monkeypatch.setitem(client.application.view_functions, "api.api_weekly_report", recording_view)
+    report = {"path": "/api/admin/reports/weekly?week_start=2025-03-03"}
+    user_cache.clear()
+    with QueryCounter() as counter:
+        resp = client.post("/api/batch", headers=setup["admin"], json={"requests": [report] * 3})
+    assert [r["status"] for r in resp.get_json()["responses"]] == [200] * 3
+    assert len(set(map(id, seen))) == 1 and seen[0] is db.session()
+    assert sum("FROM users" in s and "users.id = " in s for s in counter.statements) == 1
@@ -0,0 +1,36 @@
+"""The benchmark scripts boot the app the way they measure it; keep them runnable."""
+import importlib.util, json, os, socket, subprocess, sys
+
+import pytest
+
+ROOT = os.path.dirname(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+
+def test_suite_runs(tmp_path):
+    output = tmp_path / "bench.json"
+    proc = subprocess.run(
+        [sys.executable, "benchmarks/suite.py", "--scales", "5", "--weeks", "1", "--reps", "1", "--output", str(output)],
+        cwd=ROOT, capture_output=True, text=True, timeout=300,
+    )
+    assert proc.returncode == 0, proc.stderr[-2000:]
+    results = json.loads(output.read_text())["results"]
+    assert {r["name"] for r in results} >= {"get_roster.week", "GET /api/roster", "GET /api/users"}
+
+
+def _free_port():
+    with socket.socket() as sock:
+        sock.bind(("127.0.0.1", 0))
+        return sock.getsockname()[1]
+
+@pytest.mark.skipif(importlib.util.find_spec("gunicorn") is None, reason="needs gunicorn")
+def test_loadtest_runs_against_gunicorn():
+    proc = subprocess.run(
+        [sys.executable, "benchmarks/loadtest.py", "--users", "10", "--weeks", "1", "--duration", "1",
+         "--spike-seconds", "0.5", "--managers", "1", "--poll-interval", "0.2", "--report-users", "1", "--workers", "1",
+         "--port", str(_free_port()), "--json"],
+        cwd=ROOT, capture_output=True, text=True, timeout=300,
+    )
+    assert proc.returncode == 0, proc.stderr[-2000:]
+    endpoints = json.loads(proc.stdout)["runs"][0]["endpoints"]
+    assert endpoints["GET /api/roster"]["requests"] > 0
+    assert all(row["error_rate"] == 0 for row in endpoints.values())
@@ -0,0 +1,76 @@
+import json
+from datetime import date, time as dtime
+import pytest
+
+from App.models import Attendance, OutboxEvent, Shift
+from App.controllers import (
+    create_user, schedule_shift, clone_shifts, get_changes, get_weekly_hours, WeeklyHoursExceeded,
+)
+
+MONDAY = date(2025, 3, 3)
+
+
+@pytest.fixture
+def week(app):
+    ann, bo = create_user("ann", "annpass"), create_user("bo", "bopass")
+    schedule_shift(ann.id, MONDAY, dtime(9), dtime(17), role="cook", location="airport")
+    schedule_shift(ann.id, date(2025, 3, 5), dtime(9), dtime(17), role="cook", location="airport")
+    schedule_shift(bo.id, date(2025, 3, 4), dtime(14), dtime(22), role="server", location="harbour")
+    return ann, bo
+
+
+def _dates(user_id):
+    return [s.work_date for s in Shift.query.filter_by(user_id=user_id).order_by(Shift.work_date)]
+
+
+def test_clone_into_following_weeks(week):
+    ann, bo = week
+    cursor = int(get_changes(None)["cursor"])
+    result = clone_shifts(MONDAY, date(2025, 3, 9), date(2025, 3, 10), copies=2)
+    assert (result["source_shifts"], result["created"], result["skipped"]) == (3, 6, 0)
+    assert result["targets"] == [date(2025, 3, 10), date(2025, 3, 17)]
+    assert _dates(bo.id) == [date(2025, 3, 4), date(2025, 3, 11), date(2025, 3, 18)]
+    copy = Shift.query.filter_by(user_id=bo.id, work_date=date(2025, 3, 11)).one()
+    assert (copy.start_time, copy.role, copy.location) == (dtime(14), "server", "harbour")
+
+    # placeholders, sync, outbox and weekly hours all see the copies
+    assert Attendance.query.filter_by(shift_id=copy.id).count() == 1
+    delta = get_changes(cursor)
+    assert len(delta["shifts"]) == 6 and len(delta["attendance"]) == 6
+    topics = [e.topic for e in OutboxEvent.query.order_by(OutboxEvent.id)][-12:]
+    assert topics.count("shift.created") == 6 and topics.count("attendance.created") == 6
+    assert json.loads(OutboxEvent.query.filter_by(aggregate_id=copy.id, topic="shift.created").one().payload)["location"] == "harbour"
+    assert get_weekly_hours(ann.id, date(2025, 3, 17)) == 16
+
+
+def test_existing_windows_are_skipped_and_filters_apply(week):
+    ann, bo = week
+    schedule_shift(ann.id, date(2025, 3, 10), dtime(9), dtime(17))
+    result = clone_shifts(MONDAY, date(2025, 3, 9), date(2025, 3, 10), location="airport")
+    assert (result["source_shifts"], result["created"], result["skipped"]) == (2, 1, 1)
+    assert _dates(bo.id) == [date(2025, 3, 4)]
+    assert get_weekly_hours(ann.id, date(2025, 3, 10)) == 16
+    # running it again changes nothing
+    assert clone_shifts(MONDAY, date(2025, 3, 9), date(2025, 3, 10), location="airport")["created"] == 0
+
+
+def test_reject_mode_rolls_back_the_whole_clone(app, week):
+    ann, _ = week
+    app.config.update(WEEKLY_HOURS_CAP=20, WEEKLY_HOURS_CAP_MODE="reject")
+    schedule_shift(ann.id, date(2025, 3, 13), dtime(9), dtime(17))
+    before = Shift.query.count()
+    with pytest.raises(WeeklyHoursExceeded) as exc:
+        clone_shifts(MONDAY, date(2025, 3, 9), date(2025, 3, 10))
+    assert exc.value.check["user_id"] == ann.id and exc.value.check["hours_after"] == 24
+    assert Shift.query.count() == before
+    assert get_weekly_hours(ann.id, date(2025, 3, 10)) == 8
+
+
+@pytest.mark.parametrize("args", [
+    (date(2025, 3, 9), MONDAY, date(2025, 3, 10)),
+    (MONDAY, date(2025, 3, 9), date(2025, 3, 5)),
+    (MONDAY, date(2025, 3, 9), date(2025, 3, 11)),
+])
+def test_bad_ranges(week, args):
+    with pytest.raises(ValueError):
+        clone_shifts(*args)
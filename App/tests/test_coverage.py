@@ -0,0 +1,57 @@
+from datetime import date, datetime, time as dtime
+import pytest
+
+from App.controllers import create_user, schedule_shift, clock_in, clock_out, get_coverage
+
+MONDAY = date(2025, 3, 3)
+
+
+@pytest.fixture
+def staff(make_app):
+    make_app({"WEEKLY_HOURS_CAP": None})
+    return create_user("ann", "annpass"), create_user("bo", "bopass")
+
+
+def test_scheduled_and_actual_headcount(staff):
+    ann, bo = staff
+    first = schedule_shift(ann.id, MONDAY, dtime(9), dtime(11), location="airport")
+    schedule_shift(bo.id, MONDAY, dtime(10), dtime(12), location="airport")
+    clock_in(ann.id, first.id, when=datetime(2025, 3, 3, 9, 20))
+    clock_out(ann.id, first.id, when=datetime(2025, 3, 3, 10, 40))
+
+    grid = get_coverage(MONDAY, MONDAY, slot_minutes=60)
+    assert grid["locations"] == ["airport"] and grid["slots_per_day"] == 24
+    assert grid["scheduled"][0][8:13] == [0, 1, 2, 1, 0]
+    # clocked in 09:20-10:40 -> present in the 9:00 and 10:00 slots
+    assert grid["actual"][0][8:12] == [0, 1, 1, 0]
+
+
+def test_dense_columns_span_the_range_and_locations_are_separate(staff):
+    ann, bo = staff
+    schedule_shift(ann.id, date(2025, 3, 4), dtime(22), dtime(23, 59), location="harbour")
+    schedule_shift(bo.id, MONDAY, dtime(6, 5), dtime(6, 10))
+    grid = get_coverage(MONDAY, date(2025, 3, 9))
+    assert grid["locations"] == ["harbour", None]
+    assert all(len(row) == 7 * 96 for row in grid["scheduled"] + grid["actual"])
+    harbour, unassigned = grid["scheduled"]
+    assert sum(harbour) == 8 and harbour[96 + 88] == 1
+    # 06:05-06:10 sits inside the 06:00 slot only
+    assert [i for i, count in enumerate(unassigned) if count] == [24]
+
+
+def test_open_attendance_counts_until_now_or_scheduled_end(staff):
+    ann, _ = staff
+    shift = schedule_shift(ann.id, MONDAY, dtime(9), dtime(17), location="airport")
+    clock_in(ann.id, shift.id, when=datetime(2025, 3, 3, 9, 0))
+    midday = get_coverage(MONDAY, MONDAY, slot_minutes=60, now=datetime(2025, 3, 3, 12, 30))
+    assert sum(midday["actual"][0]) == 4
+    later = get_coverage(MONDAY, MONDAY, slot_minutes=60, now=datetime(2025, 3, 5))
+    assert sum(later["actual"][0]) == 8
+
+
+def test_validation(staff):
+    for slot_minutes in (7, 0, -15):
+        with pytest.raises(ValueError):
+            get_coverage(MONDAY, MONDAY, slot_minutes=slot_minutes)
+    with pytest.raises(ValueError):
+        get_coverage(MONDAY, date(2025, 6, 1))
@@ -0,0 +1,56 @@
+from datetime import date, datetime, time as dtime
+import pytest
+
+from App.models import Attendance, OutboxEvent, Shift
+from App.controllers import (
+    create_user, schedule_shift, clock_in, delete_shifts_in_range, get_changes, get_weekly_hours,
+)
+
+MONDAY = date(2025, 3, 3)
+
+
+@pytest.fixture
+def staff(make_app):
+    make_app({"WEEKLY_HOURS_CAP": None})
+    ann, bo = create_user("ann", "annpass"), create_user("bo", "bopass")
+    for day in range(3, 17):
+        schedule_shift(ann.id, date(2025, 3, day), dtime(9), dtime(17), location="airport")
+        schedule_shift(bo.id, date(2025, 3, day), dtime(9), dtime(13), location="harbour")
+    return ann, bo
+
+
+def test_dry_run_only_counts(staff):
+    ann, _ = staff
+    first = Shift.query.filter_by(user_id=ann.id, work_date=MONDAY).one()
+    clock_in(ann.id, first.id, when=datetime(2025, 3, 3, 9, 0))
+    counts = delete_shifts_in_range(MONDAY, date(2025, 3, 9), dry_run=True)
+    assert counts == {"dry_run": True, "shifts": 14, "attendance": 14, "clocked_in": 1}
+    assert Shift.query.count() == 28 and Attendance.query.count() == 28
+
+
+def test_deletes_shifts_and_attendance_with_sync_outbox_and_hours(staff):
+    ann, bo = staff
+    cursor = int(get_changes(None)["cursor"])
+    events = OutboxEvent.query.count()
+    doomed = {s.id for s in Shift.query.filter(Shift.user_id == ann.id, Shift.work_date <= date(2025, 3, 9))}
+
+    result = delete_shifts_in_range(MONDAY, date(2025, 3, 9), user_id=ann.id)
+    assert (result["shifts"], result["attendance"], result["dry_run"]) == (7, 7, False)
+    assert Shift.query.filter(Shift.id.in_(doomed)).count() == 0
+    assert Attendance.query.filter(Attendance.shift_id.in_(doomed)).count() == 0
+    assert Shift.query.count() == 21 and Attendance.query.count() == 21
+
+    delta = get_changes(cursor)
+    assert set(delta["deleted"]["shifts"]) == doomed and len(delta["deleted"]["attendance"]) == 7
+    assert OutboxEvent.query.count() - events == 14
+    assert get_weekly_hours(ann.id, MONDAY) == 0
+    assert get_weekly_hours(ann.id, date(2025, 3, 10)) == 56
+    assert get_weekly_hours(bo.id, MONDAY) == 28
+
+
+def test_location_filter_and_empty_ranges(staff):
+    assert delete_shifts_in_range(MONDAY, date(2025, 3, 31), location="harbour")["shifts"] == 14
+    assert {s.location for s in Shift.query} == {"airport"}
+    assert delete_shifts_in_range(date(2025, 4, 1), date(2025, 4, 30))["shifts"] == 0
+    with pytest.raises(ValueError):
+        delete_shifts_in_range(date(2025, 3, 9), MONDAY)
@@ -0,0 +1,43 @@
+from datetime import date, time as dtime
+import pytest
+
+from App.query_inspector import QueryCounter
+from App.controllers import (
+    create_user, schedule_shift, get_roster, clock_in, get_attendance_fields,
+    attendance_to_json, get_attendance_for_user, parse_fields, SHIFT_FIELDS, ATTENDANCE_FIELDS,
+)
+
+
+@pytest.fixture
+def staff(app):
+    user = create_user("sparse", "sparsepass")
+    shift = schedule_shift(user.id, date(2025, 3, 3), dtime(9), dtime(17), role="till")
+    clock_in(user.id, shift.id)
+    return user
+
+
+def test_parse_fields_keeps_spec_order_and_rejects_unknown():
+    assert parse_fields("end, id,start", SHIFT_FIELDS) == ["id", "start", "end"]
+    assert parse_fields("", SHIFT_FIELDS) is None
+    with pytest.raises(ValueError, match="Unknown fields: salary"):
+        parse_fields("id,salary", SHIFT_FIELDS)
+
+
+def test_roster_projection_skips_unrequested_joins(staff):
+    with QueryCounter() as counter:
+        rows = get_roster(date(2025, 3, 3), date(2025, 3, 9), fields=["id", "start", "end"])
+    assert rows == [{"id": rows[0]["id"], "start": "09:00", "end": "17:00"}]
+    assert counter.count == 1
+    assert "JOIN" not in counter.statements[0] and "role" not in counter.statements[0]
+
+    with QueryCounter() as counter:
+        rows = get_roster(date(2025, 3, 3), date(2025, 3, 9), fields=["username"])
+    assert rows == [{"username": "sparse"}]
+    assert "JOIN users" in counter.statements[0]
+
+
+def test_full_fieldset_matches_serializers(staff):
+    full = get_roster(date(2025, 3, 3), date(2025, 3, 9))
+    assert get_roster(date(2025, 3, 3), date(2025, 3, 9), fields=list(SHIFT_FIELDS)) == full
+    expected = [attendance_to_json(a) for a in get_attendance_for_user(staff.id)]
+    assert get_attendance_fields(list(ATTENDANCE_FIELDS), user_id=staff.id) == expected
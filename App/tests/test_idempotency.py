@@ -0,0 +1,90 @@
+import threading, time
+import pytest
+from flask import jsonify, request
+
+from App.idempotency import idempotent, init_idempotency
+from App.controllers import create_user, create_user_token
+
+
+@pytest.fixture
+def app(make_app):
+    app = make_app({"IDEMPOTENCY_WAIT": 5})
+    init_idempotency(app)
+    app.calls = 0
+
+    @app.route("/things", methods=["POST"])
+    @idempotent
+    def create_thing():
+        app.calls += 1
+        data = request.get_json()
+        time.sleep(data.get("sleep", 0))
+        if data.get("fail"):
+            return jsonify(error="boom"), 503
+        return jsonify(id=app.calls, name=data["name"]), 201
+
+    return app
+
+
+@pytest.fixture
+def auth(app):
+    token = create_user_token(create_user("idem", "idempass"))
+    return {"Authorization": f"Bearer {token}"}
+
+
+def _post(app, auth, key, body):
+    return app.test_client().post("/things", json=body, headers={**auth, "Idempotency-Key": key})
+
+
+def test_retry_replays_first_response(app, auth):
+    first = _post(app, auth, "k1", {"name": "a"})
+    again = _post(app, auth, "k1", {"name": "a"})
+    assert app.calls == 1
+    assert (again.status_code, again.get_json()) == (201, {"id": 1, "name": "a"})
+    assert again.headers["Idempotent-Replayed"] == "true"
+    assert "Idempotent-Replayed" not in first.headers
+
+
+def test_key_reused_for_different_request_is_rejected(app, auth):
+    _post(app, auth, "k2", {"name": "a"})
+    assert _post(app, auth, "k2", {"name": "b"}).status_code == 422
+    assert app.calls == 1
+
+
+def test_server_errors_are_not_stored(app, auth):
+    assert _post(app, auth, "k3", {"name": "a", "fail": True}).status_code == 503
+    assert _post(app, auth, "k3", {"name": "a", "fail": True}).status_code == 503
+    assert app.calls == 2
+
+
+def test_requests_without_key_run_every_time(app, auth):
+    client = app.test_client()
+    client.post("/things", json={"name": "a"}, headers=auth)
+    client.post("/things", json={"name": "a"}, headers=auth)
+    assert app.calls == 2
+
+
+def test_concurrent_duplicate_waits_and_replays(app, auth):
+    responses = []
+    def send():
+        responses.append(_post(app, auth, "k4", {"name": "slow", "sleep": 0.3}))
+    threads = [threading.Thread(target=send) for _ in range(3)]
+    for t in threads:
+        t.start()
+    for t in threads:
+        t.join()
+    assert app.calls == 1
+    assert sorted(r.headers.get("Idempotent-Replayed", "") for r in responses) == ["", "true", "true"]
+    assert {r.get_json()["id"] for r in responses} == {1}
+
+
+def test_anonymous_callers_do_not_share_keys(app):
+    # no identity to scope by: the key is ignored rather than shared by every anonymous client
+    assert _post(app, {}, "k-anon", {"name": "a"}).get_json() == {"id": 1, "name": "a"}
+    again = _post(app, {}, "k-anon", {"name": "a"})
+    assert again.get_json() == {"id": 2, "name": "a"} and "Idempotent-Replayed" not in again.headers
+    assert app.calls == 2
+
+
+def test_report_generation_needs_a_login(make_app):
+    client = make_app({"TESTING": True}, name="reports", mode="full").test_client()
+    assert client.post("/reports/generate", headers={"Idempotency-Key": "k-report"}).status_code == 401
@@ -0,0 +1,117 @@
+import json
+from datetime import date, datetime, time as dtime
+import pytest
+
+from App.database import db
+from App.models import Attendance, JobRun
+from App.controllers import create_user, schedule_shift, clock_in, close_open_attendance, get_latest_job_runs
+from App.maintenance import (
+    CronSchedule, Job, MaintenanceScheduler, fail_stale_runs, load_jobs, run_job, start_maintenance,
+)
+
+
+@pytest.fixture
+def app(make_app):
+    return make_app({"WEEKLY_HOURS_CAP": None})
+
+
+@pytest.mark.parametrize("expression, after, expected", [
+    ("15 2 * * *", datetime(2025, 3, 3, 2, 15), datetime(2025, 3, 4, 2, 15)),
+    ("*/20 9-10 * * *", datetime(2025, 3, 3, 9, 41), datetime(2025, 3, 3, 10, 0)),
+    ("0 3 * * 0", datetime(2025, 3, 3, 12, 0), datetime(2025, 3, 9, 3, 0)),        # Sunday
+    ("0 0 1 * 1", datetime(2025, 3, 4, 0, 0), datetime(2025, 3, 10, 0, 0)),       # 1st or a Monday
+    ("30 1 29 2 *", datetime(2025, 3, 1, 0, 0), datetime(2028, 2, 29, 1, 30)),
+    ("@weekly", datetime(2025, 3, 3, 0, 0), datetime(2025, 3, 9, 0, 0)),
+])
+def test_cron_next_after(expression, after, expected):
+    assert CronSchedule(expression).next_after(after) == expected
+
+
+@pytest.mark.parametrize("expression", ["* * * *", "61 * * * *", "0 0 30 2 *"])
+def test_bad_cron_expressions(expression):
+    with pytest.raises(ValueError):
+        CronSchedule(expression).next_after(datetime(2025, 1, 1))
+
+
+def test_config_overrides_and_removes_jobs():
+    jobs = {job.name: job for job in load_jobs({"MAINTENANCE_JOBS": {
+        "purge_tombstones": None,
+        "purge_outbox": {"schedule": "0 4 * * *"},
+        "nightly": {"schedule": "@daily", "task": "App.controllers.get_outbox_stats"},
+    }})}
+    assert "purge_tombstones" not in jobs
+    assert str(jobs["purge_outbox"].schedule) == "0 4 * * *" and jobs["purge_outbox"].kwargs == {"older_than_days": 7}
+    assert jobs["nightly"].leader
+
+
+def test_each_slot_runs_once_across_schedulers(app):
+    calls = []
+    job = Job("count", "* * * * *", lambda: calls.append(1) or {"calls": len(calls)})
+    first, second = MaintenanceScheduler(app, [job]), MaintenanceScheduler(app, [job])
+    slot = datetime(2025, 3, 3, 2, 15)
+    due = {"count": slot}
+    assert first.run_due(dict(due), slot)[0]["status"] == "succeeded"
+    assert second.run_due(dict(due), slot) == [None]
+    assert calls == [1]
+
+    run = JobRun.query.one()
+    assert json.loads(run.result) == {"calls": 1} and run.duration_ms >= 0
+    # the next slot is free again
+    assert first.run_due(due, slot) and due["count"] == datetime(2025, 3, 3, 2, 16)
+
+
+def test_failures_are_recorded(app):
+    def broken():
+        raise RuntimeError("disk full")
+    run = run_job(Job("broken", "@daily", broken), datetime(2025, 3, 3))
+    assert (run.status, run.error) == ("failed", "RuntimeError: disk full")
+    assert get_latest_job_runs()["broken"]["status"] == "failed"
+
+
+def test_default_purge_job_runs(app):
+    job = next(job for job in load_jobs(app.config) if job.name == "purge_outbox")
+    assert run_job(job, datetime(2025, 3, 3)).result == "0"
+
+
+def test_close_open_attendance(app):
+    user = create_user("forgetful", "forgetpass")
+    old = schedule_shift(user.id, date(2025, 3, 3), dtime(9), dtime(17))
+    recent = schedule_shift(user.id, date(2025, 3, 4), dtime(9), dtime(17))
+    clock_in(user.id, old.id, when=datetime(2025, 3, 3, 9, 2))
+    clock_in(user.id, recent.id, when=datetime(2025, 3, 4, 9, 0))
+
+    assert close_open_attendance(grace_hours=4, now=datetime(2025, 3, 4, 19, 0)) == 1
+    assert Attendance.query.filter_by(shift_id=old.id).one().time_out == datetime(2025, 3, 3, 17, 0)
+    assert Attendance.query.filter_by(shift_id=recent.id).one().time_out is None
+
+
+def test_in_process_scheduler_starts_in_the_worker_not_at_import(make_app, monkeypatch):
+    started = []
+    monkeypatch.setattr(MaintenanceScheduler, "start", lambda self: started.append(self))
+    app = make_app({"MAINTENANCE_SCHEDULER": "in-process", "TESTING": True}, mode="full")
+    scheduler = app.extensions["maintenance_scheduler"]
+    assert started == []    # what a preloading master sees
+
+    client = app.test_client()
+    client.get("/health")
+    client.get("/health")
+    assert started == [scheduler]
+
+    start_maintenance(app)    # gunicorn's post_worker_init in the same worker
+    assert started == [scheduler]
+
+
+def test_stale_running_rows_are_failed(app):
+    now = datetime(2025, 3, 3, 12, 0)
+    db.session.add_all([
+        JobRun(job="dead", scheduled_for=datetime(2025, 3, 3, 2, 15), node="gone:1",
+               status="running", started_at=datetime(2025, 3, 3, 2, 15)),
+        JobRun(job="slow", scheduled_for=datetime(2025, 3, 3, 11, 0), node="here:2",
+               status="running", started_at=datetime(2025, 3, 3, 11, 0)),
+    ])
+    db.session.commit()
+
+    assert fail_stale_runs(6 * 3600, now=now) == 1
+    runs = {run.job: run for run in JobRun.query}
+    assert runs["dead"].status == "failed" and runs["dead"].error.startswith("abandoned")
+    assert runs["slow"].status == "running"
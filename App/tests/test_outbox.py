@@ -0,0 +1,101 @@
+import json
+from datetime import date, time as dtime
+import pytest
+
+from App.database import db
+from App.models import OutboxEvent, Shift
+from App.controllers import create_user, schedule_shift, clock_in, get_outbox_stats
+from App.outbox import FileSink, OutboxDispatcher, QueueSink
+
+
+class FlakySink:
+    def __init__(self, failures):
+        self.failures = failures
+        self.received = []
+
+    def send(self, events):
+        if self.failures:
+            self.failures -= 1
+            raise ConnectionError("payroll down")
+        self.received.extend(events)
+
+
+@pytest.fixture
+def app(make_app):
+    return make_app({"OUTBOX_BACKOFF_SECONDS": 0, "OUTBOX_MAX_ATTEMPTS": 3})
+
+
+@pytest.fixture
+def shift(app):
+    user = create_user("payroll", "payrollpass")
+    return schedule_shift(user.id, date(2025, 3, 3), dtime(9), dtime(17))
+
+
+def _topics():
+    return [e.topic for e in OutboxEvent.query.order_by(OutboxEvent.id)]
+
+
+def test_events_written_with_the_change(shift):
+    clock_in(shift.user_id, shift.id)
+    assert _topics() == ["shift.created", "attendance.created", "attendance.updated"]
+    payload = json.loads(OutboxEvent.query.order_by(OutboxEvent.id.desc()).first().payload)
+    assert payload["shift_id"] == shift.id and payload["time_in"]
+
+
+def test_rolled_back_changes_leave_no_events(shift):
+    before = len(_topics())
+    shift.role = "cook"
+    db.session.flush()
+    db.session.rollback()
+    assert len(_topics()) == before
+    assert db.session.get(Shift, shift.id).role is None
+
+
+def test_dispatcher_delivers_in_order_to_every_sink(app, shift, tmp_path):
+    queue_sink, file_sink = QueueSink("test-deliver"), FileSink(str(tmp_path / "events.jsonl"))
+    dispatcher = OutboxDispatcher(app, [queue_sink, file_sink], batch_size=10)
+    assert dispatcher.run_once() == 2
+    assert [queue_sink.queue.get_nowait()["topic"] for _ in range(2)] == ["shift.created", "attendance.created"]
+    assert len((tmp_path / "events.jsonl").read_text().splitlines()) == 2
+    assert get_outbox_stats() == {"pending": 0, "dead": 0, "lag_seconds": 0.0}
+    assert dispatcher.run_once() == 0
+
+
+def test_failed_batches_retry_then_go_dead(app, shift):
+    sink = FlakySink(failures=1)
+    dispatcher = OutboxDispatcher(app, [sink])
+    assert dispatcher.run_once() == 0
+    assert OutboxEvent.query.first().attempts == 1
+    assert dispatcher.run_once() == 2
+    assert [e["topic"] for e in sink.received] == ["shift.created", "attendance.created"]
+
+    clock_in(shift.user_id, shift.id)
+    dead_sink = FlakySink(failures=99)
+    for _ in range(3):
+        OutboxDispatcher(app, [dead_sink]).run_once()
+    assert get_outbox_stats()["dead"] == 1
+
+
+def test_batches_are_leased_and_committed_before_delivery(app, shift):
+    class PeekingSink:
+        """While delivering, the rows are already committed as leased: a second dispatcher finds nothing."""
+        def __init__(self):
+            self.second_dispatcher_got = None
+
+        def send(self, events):
+            self.second_dispatcher_got = OutboxDispatcher(app, [QueueSink("test-lease")]).run_once()
+
+    sink = PeekingSink()
+    assert OutboxDispatcher(app, [sink]).run_once() == 2
+    assert sink.second_dispatcher_got == 0
+
+
+def test_a_lease_left_by_a_dead_dispatcher_runs_out(app, shift):
+    with app.app_context():
+        claimed = OutboxDispatcher(app, [], batch_size=10)._claim()    # then the process dies
+    assert len(claimed) == 2
+    assert OutboxDispatcher(app, [QueueSink("test-expired")]).run_once() == 0
+
+    db.session.execute(db.update(OutboxEvent).values(next_attempt_at=OutboxEvent.created_at))
+    db.session.commit()
+    assert OutboxDispatcher(app, [QueueSink("test-expired")]).run_once() == 2
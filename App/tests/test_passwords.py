@@ -0,0 +1,7 @@
+from werkzeug.security import generate_password_hash
+
+from App.passwords import needs_rehash
+
+
+def test_old_hash_needs_rehash():
+    assert needs_rehash(generate_password_hash("mypass", method="pbkdf2:sha256:1000"))
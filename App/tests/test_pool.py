@@ -0,0 +1,62 @@
+import gc, os, json, weakref
+
+import pytest
+from flask.globals import _cv_app
+
+from App.database import db, _fork_apps
+
+
+def test_every_app_shares_one_fork_hook(make_app):
+    first, second = make_app(name="first"), make_app(name="second")
+    assert first in _fork_apps and second in _fork_apps
+
+
+def test_dropped_apps_leave_the_fork_hook():
+    from App.main import create_app
+    app = create_app({"SQLALCHEMY_DATABASE_URI": "sqlite://"}, mode="cli")
+    assert app in _fork_apps
+    dropped = weakref.ref(app)
+    _cv_app.get().pop()  # the context create_app pushed holds the app too
+    del app
+    gc.collect()
+    assert dropped() is None
+
+
+@pytest.mark.skipif(not hasattr(os, "fork"), reason="needs os.fork")
+def test_forked_child_starts_with_an_empty_pool(app):
+    engine = db.engine
+    db.session.execute(db.text("SELECT 1"))
+    db.session.remove()
+    assert engine.pool.checkedin() == 1
+
+    read, write = os.pipe()
+    pid = os.fork()
+    if pid == 0:
+        os.close(read)
+        os.write(write, json.dumps(engine.pool.checkedin()).encode())
+        os._exit(0)
+    os.close(write)
+    with os.fdopen(read) as pipe:
+        in_child = json.loads(pipe.read())
+    os.waitpid(pid, 0)
+    # the child gets a fresh pool; the parent's connection is left alone
+    assert in_child == 0
+    assert engine.pool.checkedin() == 1
+
+
+def test_pool_stats_are_admin_only(make_app):
+    from App.controllers import create_user, create_user_token
+    app = make_app({"TESTING": True}, mode="full")
+    client = app.test_client()
+
+    def get(user=None):
+        headers = {"Authorization": f"Bearer {create_user_token(user)}"} if user else {}
+        return client.get("/health/pool", headers=headers)
+
+    assert get().status_code == 401
+    assert get(create_user("staff", "staffpass")).status_code == 403
+    response = get(create_user("boss", "bosspass", isAdmin=True))
+    assert response.status_code == 200
+    assert "default" in response.get_json()
+    # the liveness probe stays open
+    assert client.get("/health").status_code == 200
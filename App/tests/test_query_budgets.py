@@ -0,0 +1,92 @@
+import pytest, unittest
+from datetime import date, time as dtime, timedelta
+from sqlalchemy import text
+
+from App.database import db
+from App.query_inspector import QueryCounter, assert_max_queries, statement_shape
+from App.controllers import (
+    create_user,
+    login,
+    schedule_shift,
+    get_roster,
+    weekly_report
+)
+
+WEEK_START = date(2024, 1, 1)
+
+
+'''
+   Unit Tests
+'''
+class StatementShapeUnitTests(unittest.TestCase):
+
+    def test_in_lists_collapse(self):
+        assert statement_shape("SELECT * FROM t WHERE id IN (?, ?, ?)") == statement_shape("SELECT * FROM t WHERE id IN (?, ?)")
+
+    def test_pyformat_params_normalized(self):
+        assert statement_shape("SELECT * FROM t WHERE id = %(id_1)s") == "SELECT * FROM t WHERE id = ?"
+
+'''
+    Query budget tests
+'''
+
+@pytest.fixture(autouse=True)
+def roster_db(make_app):
+    from App.api import api
+    app = make_app({'TESTING': True}, name="budgets")
+    app.register_blueprint(api)
+    for n in range(3):
+        user = create_user(f"staff{n}", "staffpass")
+        for offset in range(5):
+            schedule_shift(user.id, WEEK_START + timedelta(days=offset), dtime(9), dtime(17))
+    db.session.expire_all()
+    return app.test_client()
+
+
+def test_roster_does_not_load_users_per_shift():
+    with assert_max_queries(1):
+        roster = get_roster(WEEK_START, WEEK_START + timedelta(days=6))
+    assert len(roster) == 15
+
+
+def test_cached_roster_budget():
+    from flask import current_app
+    from App.roster_cache import init_roster_cache
+    init_roster_cache(current_app)
+    monday = date.today() - timedelta(days=date.today().weekday())
+    user = create_user("cached", "cachedpass")
+    schedule_shift(user.id, monday, dtime(9), dtime(17))
+    # ranges outside the hot window skip the cache entirely
+    with assert_max_queries(1):
+        get_roster(WEEK_START, WEEK_START + timedelta(days=6))
+    # the first read in the window pays for the change counter, the window and the usernames
+    with assert_max_queries(3):
+        get_roster(monday, monday + timedelta(days=6))
+    # after that it is served from memory until the refresh interval runs out
+    with assert_max_queries(0):
+        roster = get_roster(monday, monday + timedelta(days=6))
+    assert [s["username"] for s in roster] == ["cached"]
+
+
+def test_weekly_report_has_no_per_shift_lookups():
+    with assert_max_queries(2, max_repeats=1):
+        report = weekly_report(WEEK_START)
+    assert len(report['shifts']) == 15
+
+
+def test_roster_endpoint_budget(roster_db):
+    token = login("staff0", "staffpass")
+    with assert_max_queries(3):
+        response = roster_db.get(
+            f"/api/roster?start={WEEK_START.isoformat()}&end={(WEEK_START + timedelta(days=6)).isoformat()}",
+            headers={'Authorization': f'Bearer {token}'},
+        )
+    assert response.status_code == 200
+
+
+def test_counter_detects_repeated_statements():
+    db.session.expire_all()
+    with QueryCounter() as counter:
+        for n in range(3):
+            db.session.execute(text("SELECT :n"), {"n": n})
+    assert list(counter.repeated(3).values()) == [3]
@@ -0,0 +1,72 @@
+import os
+import pytest
+from sqlalchemy import update
+
+from App.database import db, read_replica, REPLICA_BIND
+from App.models import User
+from App.controllers import create_user
+
+
+@read_replica
+def _usernames():
+    return [u.username for u in User.query.order_by(User.username)]
+
+
+@pytest.fixture
+def app(make_app, tmp_path):
+    # a second SQLite file stands in for the replica; nothing copies rows into it
+    replica = os.path.join(tmp_path, "replica.db")
+    app = make_app({"SQLALCHEMY_REPLICA_URI": f"sqlite:///{replica}", "REPLICA_MAX_LAG": 5})
+    db.metadata.create_all(db.engines[REPLICA_BIND])
+    with db.engines[REPLICA_BIND].begin() as conn:
+        conn.execute(User.__table__.insert(), {"username": "replica_only", "password": "x", "isAdmin": False})
+    yield app
+    db.metadata.drop_all(db.engines[REPLICA_BIND])
+    # the bind's metadata is registered on the shared db; later apps have no such bind
+    db.metadatas.pop(REPLICA_BIND, None)
+
+
+def test_reads_go_to_the_replica(app):
+    assert _usernames() == ["replica_only"]
+
+
+def test_read_your_writes_after_commit(app):
+    create_user("fresh", "freshpass")
+    # the replica hasn't seen the write yet, so this session keeps reading the primary
+    assert _usernames() == ["fresh"]
+    db.session.remove()
+    assert _usernames() == ["replica_only"]
+
+
+def test_pin_expires_after_the_replica_lag(app):
+    app.config["REPLICA_MAX_LAG"] = 0
+    create_user("fresh", "freshpass")
+    assert _usernames() == ["replica_only"]
+
+
+def test_core_dml_pins_the_open_transaction(app):
+    create_user("fresh", "freshpass")
+    db.session.remove()
+    db.session.execute(update(User).where(User.username == "fresh").values(isAdmin=True))
+    assert _usernames() == ["fresh"]
+    db.session.rollback()
+    assert _usernames() == ["replica_only"]
+
+
+def test_the_pin_follows_the_caller_to_its_next_request(app):
+    @app.post("/users")
+    def _add_user():
+        create_user("fresh", "freshpass")
+        return "", 303, {"Location": "/users"}
+
+    @app.get("/users")
+    def _list_users():
+        return {"usernames": _usernames()}
+
+    client = app.test_client()
+    assert client.post("/users", follow_redirects=False).status_code == 303
+    # the next request may get another worker and a fresh session
+    db.session.remove()
+    assert client.get("/users").get_json() == {"usernames": ["fresh"]}
+    # a caller without the cookie still reads the replica
+    assert app.test_client().get("/users").get_json() == {"usernames": ["replica_only"]}
@@ -0,0 +1,87 @@
+from datetime import date, datetime, time as dtime
+import pytest
+
+from App.database import db
+from App.models import Attendance, Report, ReportBackfillCheckpoint
+from App.controllers import (
+    create_user, schedule_shift, backfill_reports, generate_weekly_report, seed_bench_data,
+)
+
+MONDAY = date(2025, 3, 3)
+
+
+@pytest.fixture
+def app(make_app):
+    return make_app({"WEEKLY_HOURS_CAP": None})
+
+
+def _attend(shift, start, end):
+    att = Attendance.query.filter_by(shift_id=shift.id).first()
+    att.time_in = datetime.combine(shift.work_date, start)
+    att.time_out = datetime.combine(shift.work_date, end)
+    db.session.commit()
+
+
+def _reports():
+    return {(r.start_date, r.scope): r for r in Report.query}
+
+
+def test_weekly_figures_per_scope(app):
+    user = create_user("backfilled", "backfillpass")
+    for day in range(5):
+        shift = schedule_shift(user.id, date(2025, 3, 3 + day), dtime(8), dtime(18), location="airport")
+        _attend(shift, dtime(8), dtime(18))
+    schedule_shift(user.id, date(2025, 3, 8), dtime(9), dtime(12), location="harbour")
+
+    result = backfill_reports(MONDAY, date(2025, 3, 16), by="location", workers=0)
+    assert (result["weeks"], result["chunks"]) == (2, 1)
+    reports = _reports()
+    week = reports[(MONDAY, "all")]
+    assert (week.total_shifts, week.total_hours, week.overtime_hours) == (6, 50.0, 10.0)
+    assert week.attendance_rate == pytest.approx(83.33)
+    assert reports[(MONDAY, "location:harbour")].attendance_rate == 0.0
+    # empty weeks still get an all-staff report
+    assert reports[(date(2025, 3, 10), "all")].total_shifts == 0
+    assert (date(2025, 3, 10), "location:airport") not in reports
+
+
+def test_rerun_skips_checkpointed_weeks_and_never_duplicates(app):
+    user = create_user("rerun", "rerunpass")
+    schedule_shift(user.id, MONDAY, dtime(9), dtime(17))
+    backfill_reports(MONDAY, date(2025, 3, 9), workers=0)
+    generate_weekly_report(date(2025, 3, 10), date(2025, 3, 16))
+
+    result = backfill_reports(MONDAY, date(2025, 3, 23), workers=0, chunk_weeks=1)
+    assert (result["skipped_weeks"], result["chunks"]) == (1, 2)
+    assert Report.query.count() == 3
+    assert ReportBackfillCheckpoint.query.count() == 3
+
+    assert backfill_reports(MONDAY, date(2025, 3, 23), workers=0, force=True)["reports"] == 3
+    assert Report.query.count() == 3
+
+
+def test_resume_around_a_checkpointed_gap(app):
+    user = create_user("gappy", "gappypass")
+    for day in (MONDAY, date(2025, 3, 11), date(2025, 3, 18)):
+        schedule_shift(user.id, day, dtime(9), dtime(17))
+    backfill_reports(date(2025, 3, 10), date(2025, 3, 16), workers=0)
+
+    result = backfill_reports(MONDAY, date(2025, 3, 23), workers=0)
+    # the checkpointed week splits the rest into two chunks; neither reads it
+    assert (result["skipped_weeks"], result["chunks"], result["reports"]) == (1, 2, 2)
+    assert {start: r.total_shifts for (start, _), r in _reports().items()} == {
+        MONDAY: 1, date(2025, 3, 10): 1, date(2025, 3, 17): 1,
+    }
+
+
+def test_process_pool_matches_inline(app):
+    seed_bench_data(users=6, weeks=6, start=MONDAY, seed=3)
+    backfill_reports(MONDAY, date(2025, 4, 13), by="location", workers=0)
+    inline = {key: (r.total_shifts, r.total_hours, r.attendance_rate) for key, r in _reports().items()}
+    Report.query.delete()
+    ReportBackfillCheckpoint.query.delete()
+    db.session.commit()
+
+    result = backfill_reports(MONDAY, date(2025, 4, 13), by="location", workers=2, chunk_weeks=2)
+    assert result["chunks"] == 3
+    assert {key: (r.total_shifts, r.total_hours, r.attendance_rate) for key, r in _reports().items()} == inline
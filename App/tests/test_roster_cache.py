@@ -0,0 +1,116 @@
+from datetime import date, timedelta, time as dtime
+import pytest
+from sqlalchemy import insert
+
+from flask import current_app
+
+from App.database import db
+from App.query_inspector import QueryCounter
+from App.models import Shift, next_change_seq
+from App.controllers import create_user, schedule_shift, delete_shift, get_roster
+from App.roster_cache import get_roster_cache, init_roster_cache
+
+MONDAY = date.today() - timedelta(days=date.today().weekday())
+
+
+@pytest.fixture
+def cache(make_app):
+    app = make_app({"WEEKLY_HOURS_CAP": None, "ROSTER_CACHE_REFRESH_SECONDS": 60})
+    init_roster_cache(app)
+    return get_roster_cache()
+
+
+def _from_db(start, end, **kwargs):
+    cache = get_roster_cache()
+    del current_app.extensions["roster_cache"]
+    try:
+        return get_roster(start, end, **kwargs)
+    finally:
+        current_app.extensions["roster_cache"] = cache
+
+
+def test_answers_match_the_database(cache):
+    ann, bo = create_user("ann", "annpass"), create_user("bo", "bopass")
+    for day in range(0, 21, 2):
+        schedule_shift(ann.id, MONDAY + timedelta(days=day), dtime(9), dtime(17), role="cook", location="airport")
+        schedule_shift(bo.id, MONDAY + timedelta(days=day), dtime(6, 30), dtime(14))
+    end = MONDAY + timedelta(days=20)
+
+    assert get_roster(MONDAY, end) == _from_db(MONDAY, end)
+    assert get_roster(MONDAY, MONDAY + timedelta(days=6), user_id=bo.id) == _from_db(MONDAY, MONDAY + timedelta(days=6), user_id=bo.id)
+    assert get_roster(MONDAY, end, fields=["id", "start"]) == _from_db(MONDAY, end, fields=["id", "start"])
+    assert get_roster(MONDAY, end)[0]["start"] == "06:30"
+    assert cache.stats["full_loads"] == 1 and cache.stats["hits"] == 4
+
+    # outside the window -> database
+    assert get_roster(MONDAY - timedelta(days=7), MONDAY) == _from_db(MONDAY - timedelta(days=7), MONDAY)
+    assert cache.stats["misses"] == 1
+
+
+def test_local_writes_show_up_immediately(cache):
+    ann = create_user("ann", "annpass")
+    first = schedule_shift(ann.id, MONDAY, dtime(9), dtime(17))
+    second = schedule_shift(ann.id, MONDAY + timedelta(days=1), dtime(9), dtime(17))
+    end = MONDAY + timedelta(days=20)
+    assert [s["id"] for s in get_roster(MONDAY, end)] == [first.id, second.id]
+
+    delete_shift(first.id)
+    second.work_date = MONDAY + timedelta(days=30)  # moved out of the window
+    db.session.commit()
+    third = schedule_shift(ann.id, MONDAY + timedelta(days=2), dtime(9), dtime(17), role="server")
+    assert [(s["id"], s["role"]) for s in get_roster(MONDAY, end)] == [(third.id, "server")]
+    assert cache.stats["full_loads"] == 1
+
+
+def test_other_writers_are_picked_up_from_the_change_cursor(cache):
+    ann = create_user("ann", "annpass")
+    get_roster(MONDAY, MONDAY)
+    # a write that skips this process's ORM session, as another worker's would
+    seq = next_change_seq(db.session.connection())
+    db.session.execute(insert(Shift), [{
+        "user_id": ann.id, "work_date": MONDAY, "start_time": dtime(9), "end_time": dtime(17), "change_seq": seq,
+    }])
+    db.session.commit()
+    assert get_roster(MONDAY, MONDAY) == []  # within the refresh interval
+
+    cache.refresh(force=True)
+    assert [s["username"] for s in get_roster(MONDAY, MONDAY)] == ["ann"]
+    assert cache.stats["incremental_loads"] == 1
+
+
+def test_refresh_ignores_the_callers_open_transaction(cache):
+    ann = create_user("ann", "annpass")
+    get_roster(MONDAY, MONDAY)
+    db.session.add(Shift(user_id=ann.id, work_date=MONDAY, start_time=dtime(9), end_time=dtime(17)))
+    db.session.flush()
+    # the refresh reads on its own connection, so the uncommitted row stays out
+    cache.refresh(force=True)
+    assert cache.roster(MONDAY, MONDAY) == []
+    db.session.rollback()
+
+
+def test_changes_outside_the_window_are_not_loaded(cache):
+    ann = create_user("ann", "annpass")
+    moved = schedule_shift(ann.id, MONDAY, dtime(9), dtime(17))
+    get_roster(MONDAY, MONDAY)
+    far = MONDAY + timedelta(days=90)
+    for day in range(5):
+        schedule_shift(ann.id, far + timedelta(days=day), dtime(9), dtime(17))
+    moved.work_date = far - timedelta(days=1)
+    db.session.commit()
+    with QueryCounter() as counter:
+        assert get_roster(MONDAY, MONDAY) == []
+    # only the window's rows come back in full; the far shifts are never encoded
+    assert any("BETWEEN" in statement for statement in counter.statements)
+    assert len(cache._snapshot.ids) == 0 and cache.stats["incremental_loads"] == 1
+
+
+def test_footprint(cache):
+    ann = create_user("ann", "annpass")
+    for day in range(14):
+        schedule_shift(ann.id, MONDAY + timedelta(days=day), dtime(9), dtime(17), location="harbour")
+    get_roster(MONDAY, MONDAY)
+    footprint = cache.footprint()
+    assert (footprint["shifts"], footprint["users"], footprint["strings"]) == (14, 1, 1)
+    assert footprint["array_bytes"] == 14 * 28
+    assert footprint["window"] == [MONDAY, MONDAY + timedelta(days=20)]
@@ -0,0 +1,54 @@
+import gzip
+from datetime import date, datetime
+
+from flask import Flask, jsonify
+
+from App.compression import init_compression
+from App.serialization import init_json
+
+
+def _app(**config):
+    app = Flask(__name__)
+    app.config.update(config)
+    init_json(app)
+    init_compression(app)
+
+    @app.route("/rows")
+    def rows():
+        return jsonify([{"date": date(2025, 3, 3), "time_in": datetime(2025, 3, 3, 9, 5), "n": i} for i in range(200)])
+
+    @app.route("/small")
+    def small():
+        return jsonify({1: "int keys"})
+
+    return app
+
+
+def test_dates_are_iso_8601():
+    body = _app().test_client().get("/rows").get_json()
+    assert body[0] == {"date": "2025-03-03", "time_in": "2025-03-03T09:05:00", "n": 0}
+
+
+def test_non_string_keys_stringified():
+    assert _app().test_client().get("/small").get_json() == {"1": "int keys"}
+
+
+def test_large_json_is_compressed_when_accepted():
+    resp = _app().test_client().get("/rows", headers={"Accept-Encoding": "gzip"})
+    assert resp.headers["Content-Encoding"] == "gzip"
+    assert "Accept-Encoding" in resp.headers["Vary"]
+    assert gzip.decompress(resp.data).startswith(b'[{"date":"2025-03-03"')
+
+
+def test_small_or_unaccepted_responses_untouched():
+    client = _app().test_client()
+    assert "Content-Encoding" not in client.get("/small", headers={"Accept-Encoding": "gzip, br"}).headers
+    assert "Content-Encoding" not in client.get("/rows").headers
+
+
+def test_model_json_is_iso_with_any_provider(make_app):
+    from datetime import time as dtime
+    from App.controllers import create_user, schedule_shift
+    app = make_app({"JSON_PROVIDER": "default", "WEEKLY_HOURS_CAP": None})
+    shift = schedule_shift(create_user("ann", "annpass").id, date(2025, 3, 3), dtime(9), dtime(17))
+    assert app.json.loads(app.json.dumps(shift.get_json()))["date"] == "2025-03-03"
@@ -0,0 +1,95 @@
+from datetime import date, time as dtime
+import pytest
+from sqlalchemy import text
+from sqlalchemy.exc import OperationalError
+
+from App.database import db, retry_on_busy, RoutingSession
+from App.models import Attendance, Shift, User
+from App.controllers import create_user, schedule_shift
+
+
+@pytest.fixture
+def app(make_app):
+    return make_app({"SQLITE_BUSY_RETRIES": 2})
+
+
+def test_connections_use_wal_and_pragmas(app):
+    assert db.session.execute(text("PRAGMA journal_mode")).scalar() == "wal"
+    assert db.session.execute(text("PRAGMA busy_timeout")).scalar() == 1000
+
+
+def test_writer_slot_released_after_commit_and_rollback(app):
+    writer = app.extensions["sqlite_writer"]
+    create_user("writer1", "pass")
+    assert not writer._lock.locked()
+
+    db.session.add(User("writer2", "pass", False))
+    db.session.flush()
+    assert writer._lock.locked()
+    db.session.rollback()
+    assert not writer._lock.locked()
+    assert writer.stats()["writes"] == 2
+
+
+def test_retry_on_busy_reruns_locked_writes(app):
+    calls = []
+
+    @retry_on_busy
+    def flaky():
+        calls.append(1)
+        if len(calls) < 3:
+            raise OperationalError("UPDATE attendance", {}, Exception("database is locked"))
+        return "ok"
+
+    assert flaky() == "ok"
+    assert len(calls) == 3
+    assert app.extensions["sqlite_writer"].busy_retries == 2
+
+
+def test_other_operational_errors_are_not_retried(app):
+    calls = []
+
+    @retry_on_busy
+    def broken():
+        calls.append(1)
+        raise OperationalError("SELECT", {}, Exception("no such table: nope"))
+
+    with pytest.raises(OperationalError):
+        broken()
+    assert len(calls) == 1
+
+
+def test_busy_commit_retries_the_whole_shift(app, monkeypatch):
+    user = create_user("busy", "busypass")
+    commit = RoutingSession.commit
+    failed = []
+
+    def commit_once_busy(session):
+        # the commit that carries the attendance placeholder hits a locked database once
+        if not failed and any(isinstance(obj, Attendance) for obj in session.new):
+            failed.append(1)
+            raise OperationalError("COMMIT", {}, Exception("database is locked"))
+        return commit(session)
+
+    monkeypatch.setattr(RoutingSession, "commit", commit_once_busy)
+    shift = schedule_shift(user.id, date(2025, 3, 3), dtime(9), dtime(17))
+    assert failed and Shift.query.count() == 1
+    assert Attendance.query.filter_by(shift_id=shift.id, user_id=user.id).count() == 1
+
+
+def test_core_writes_on_the_session_take_the_writer_slot(app):
+    from App.controllers import clone_shifts, delete_shifts_in_range, lock_weekly_hours
+    writer = app.extensions["sqlite_writer"]
+    user = create_user("core", "corepass")
+    schedule_shift(user.id, date(2025, 3, 3), dtime(9), dtime(17))
+
+    lock_weekly_hours(user.id, date(2025, 3, 10))    # counter upsert on session.connection()
+    assert writer._lock.locked()
+    db.session.rollback()
+    assert not writer._lock.locked()
+
+    writes = writer.stats()["writes"]
+    clone_shifts(date(2025, 3, 3), date(2025, 3, 9), date(2025, 3, 17))
+    delete_shifts_in_range(date(2025, 3, 17), date(2025, 3, 23))
+    assert writer.stats()["writes"] == writes + 2
+    assert not writer._lock.locked()
@@ -0,0 +1,58 @@
+import json, os, subprocess, sys, time
+
+ROOT = os.path.dirname(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+# Generous default so slow CI machines pass; tighten locally with STARTUP_BUDGET_SECONDS
+STARTUP_BUDGET_SECONDS = float(os.environ.get("STARTUP_BUDGET_SECONDS", "3.0"))
+HEAVY_MODULES = ["reportlab", "flask_admin", "flask_uploads", "flask_cors", "alembic", "prometheus_client", "pytest"]
+
+
+def _cold_start_cli():
+    code = (
+        "import sys, json, wsgi;"
+        f"print(json.dumps([m for m in {HEAVY_MODULES!r} if m in sys.modules]))"
+    )
+    started = time.perf_counter()
+    proc = subprocess.run(
+        [sys.executable, "-c", code],
+        cwd=ROOT, env=dict(os.environ, SHIFTMATE_APP_MODE="cli"),
+        capture_output=True, text=True, check=True,
+    )
+    return time.perf_counter() - started, json.loads(proc.stdout.strip().splitlines()[-1])
+
+
+def test_cli_mode_skips_heavy_imports():
+    _, loaded = _cold_start_cli()
+    assert loaded == []
+
+
+def test_cli_cold_start_within_budget():
+    elapsed, _ = _cold_start_cli()
+    assert elapsed < STARTUP_BUDGET_SECONDS
+
+
+def test_full_mode_starts():
+    # what gunicorn and `flask run` load
+    code = "import json, wsgi; print(json.dumps(sorted(wsgi.app.blueprints)))"
+    proc = subprocess.run(
+        [sys.executable, "-c", code],
+        cwd=ROOT, env=dict(os.environ, SHIFTMATE_APP_MODE="full"),
+        capture_output=True, text=True,
+    )
+    assert proc.returncode == 0, proc.stderr[-2000:]
+    blueprints = json.loads(proc.stdout.strip().splitlines()[-1])
+    assert {"api", "user_views", "shift_views", "index_views"} <= set(blueprints)
+
+
+
+def test_full_mode_serves_requests(make_app):
+    from App.controllers import create_user, create_user_token
+    app = make_app({"TESTING": True}, mode="full")
+    client = app.test_client()
+    assert client.get("/health").status_code == 200
+    # the flask_login pages take their user from the JWT and refuse anonymous callers
+    week = "/api/shifts?start_date=2025-03-03&end_date=2025-03-09"
+    assert client.get(week).status_code == 401
+    token = create_user_token(create_user("web", "webpass"))
+    response = client.get(week, headers={"Authorization": f"Bearer {token}"})
+    assert response.status_code == 200
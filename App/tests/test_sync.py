@@ -0,0 +1,84 @@
+from datetime import date, time as dtime
+import pytest
+
+from App.database import db
+from App.models import SyncCounter
+from App.controllers import (
+    create_user, schedule_shift, clock_in, delete_shift, delete_attendance,
+    ensure_attendance_record, get_changes, purge_tombstones,
+)
+
+
+@pytest.fixture
+def staff(app):
+    return create_user("synced", "syncpass")
+
+
+def test_full_then_delta(staff):
+    first = schedule_shift(staff.id, date(2025, 3, 3), dtime(9), dtime(17))
+    full = get_changes(None)
+    assert full["full"] and [s["id"] for s in full["shifts"]] == [first.id]
+    assert len(full["attendance"]) == 1
+
+    second = schedule_shift(staff.id, date(2025, 3, 4), dtime(9), dtime(17))
+    delta = get_changes(int(full["cursor"]))
+    assert not delta["full"]
+    assert [s["id"] for s in delta["shifts"]] == [second.id]
+    assert [a["shift_id"] for a in delta["attendance"]] == [second.id]
+
+    # nothing changed -> empty delta, same cursor
+    idle = get_changes(int(delta["cursor"]))
+    assert (idle["shifts"], idle["attendance"], idle["cursor"]) == ([], [], delta["cursor"])
+
+
+def test_updates_and_deletes_produce_changes_and_tombstones(staff):
+    shift = schedule_shift(staff.id, date(2025, 3, 3), dtime(9), dtime(17))
+    other = schedule_shift(staff.id, date(2025, 3, 4), dtime(9), dtime(17))
+    cursor = int(get_changes(None)["cursor"])
+
+    clock_in(staff.id, shift.id)
+    delete_shift(other.id)
+    delta = get_changes(cursor)
+    assert [a["shift_id"] for a in delta["attendance"]] == [shift.id]
+    assert delta["attendance"][0]["time_in"] is not None
+    assert delta["deleted"]["shifts"] == [other.id]
+    assert len(delta["deleted"]["attendance"]) == 1
+
+    att = ensure_attendance_record(staff.id, shift.id)
+    cursor = int(delta["cursor"])
+    delete_attendance(att.id)
+    assert get_changes(cursor)["deleted"] == {"shifts": [], "attendance": [att.id]}
+
+
+def test_cursor_older_than_purged_tombstones_gets_full_resync(staff):
+    shift = schedule_shift(staff.id, date(2025, 3, 3), dtime(9), dtime(17))
+    cursor = int(get_changes(None)["cursor"])
+    delete_shift(shift.id)
+    assert purge_tombstones(older_than_days=-1) == 2
+    assert db.session.get(SyncCounter, 1).tombstone_floor > cursor
+    assert get_changes(cursor)["full"]
+
+
+def test_attendance_scoped_to_user(staff):
+    other = create_user("other", "otherpass")
+    schedule_shift(staff.id, date(2025, 3, 3), dtime(9), dtime(17))
+    schedule_shift(other.id, date(2025, 3, 3), dtime(9), dtime(17))
+    mine = get_changes(None, user_id=staff.id)
+    assert len(mine["shifts"]) == 2
+    assert {a["user_id"] for a in mine["attendance"]} == {staff.id}
+
+
+def test_staff_only_get_their_own_attendance_deletions(staff):
+    other = create_user("colleague", "colleaguepass")
+    mine = schedule_shift(staff.id, date(2025, 3, 3), dtime(9), dtime(17))
+    theirs = schedule_shift(other.id, date(2025, 3, 3), dtime(9), dtime(17))
+    cursor = int(get_changes(None)["cursor"])
+
+    delete_shift(mine.id)
+    delete_shift(theirs.id)
+    everyone = get_changes(cursor)["deleted"]
+    assert len(everyone["attendance"]) == 2
+    # the roster is shared, so both shift deletions still go to staff
+    assert get_changes(cursor, user_id=staff.id)["deleted"] == {
+        "shifts": everyone["shifts"], "attendance": everyone["attendance"][:1],
+    }
@@ -0,0 +1,71 @@
+import time
+
+import pytest
+
+from App.cache import TTLCache
+from App.database import db
+from App.models import User
+from App.controllers import create_user, load_user
+from App.controllers.auth import token_version_cache, user_cache
+
+
+def test_evicts_least_recently_used():
+    cache = TTLCache(maxsize=2, ttl=60)
+    cache.set(1, "a")
+    cache.set(2, "b")
+    cache.get(1)
+    cache.set(3, "c")
+    assert cache.get(2) is None
+    assert cache.get(1) == "a"
+
+
+def test_expired_entries_are_dropped():
+    cache = TTLCache(maxsize=2, ttl=0)
+    cache.set(1, "a")
+    assert cache.get(1) is None
+
+
+@pytest.fixture
+def cached_user(app):
+    user_cache.clear()
+    user = create_user("cached", "cachedpass")
+    load_user(user.id)
+    yield user.id
+    user_cache.clear()
+
+
+def test_snapshot_is_only_served_to_tokens_of_its_version(cached_user):
+    # another worker promotes the user: this process's snapshot is not invalidated
+    db.session.execute(db.update(User).where(User.id == cached_user).values(isAdmin=True, token_version=1))
+    db.session.commit()
+    db.session.remove()
+
+    assert not load_user(cached_user, token_version=0).isAdmin    # old token: cached snapshot
+    db.session.remove()
+    assert load_user(cached_user, token_version=1).isAdmin        # new token: reloaded
+    db.session.remove()
+    assert user_cache.get(cached_user).token_version == 1
+
+
+def test_admin_routes_check_revocation_through_the_cache(make_app):
+    from App.api import api
+    from App.controllers import create_user_token
+    from App.query_inspector import QueryCounter
+    app = make_app({"TOKEN_VERSION_CACHE_TTL": 0.2})
+    token_version_cache.clear()    # entries from earlier tests keep their longer expiry
+    app.register_blueprint(api)
+    client = app.test_client()
+    admin = create_user("boss", "bosspass", isAdmin=True)
+    headers = {"Authorization": f"Bearer {create_user_token(admin)}"}
+    coverage = "/api/admin/coverage?start=2025-03-03&end=2025-03-03"
+    assert client.get(coverage, headers=headers).status_code == 200
+    with QueryCounter() as warm:
+        assert client.get(coverage, headers=headers).status_code == 200
+    assert not any(s.startswith("SELECT users.token_version") for s in warm.statements)
+
+    # revoked by another worker: honoured here once the cached version expires
+    db.session.execute(db.update(User).where(User.id == admin.id).values(token_version=1))
+    db.session.commit()
+    time.sleep(0.25)
+    response = client.get(coverage, headers=headers)
+    assert response.status_code == 401 and response.get_json()["msg"] == "Token has been revoked"
@@ -0,0 +1,17 @@
+from App.controllers import create_user, get_user_options, get_users_page
+
+
+def test_options_are_capped_unless_asked_for_all(app):
+    for n in range(5):
+        create_user(f"user{n}", "userpass")
+    create_user("other", "userpass")
+    assert len(get_user_options(limit=3)) == 3
+    assert len(get_user_options(limit=None)) == 6
+    assert [o["username"] for o in get_user_options(q="user", limit=None)] == [f"user{n}" for n in range(5)]
+
+
+def test_page_and_prefix_search(app):
+    for name in ("ann", "anna", "bob"):
+        create_user(name, "userpass")
+    page = get_users_page(page=1, per_page=2, q="an")
+    assert [u.username for u in page.items] == ["ann", "anna"] and page.total == 2
@@ -0,0 +1,105 @@
+from datetime import date, time as dtime
+import pytest
+
+from sqlalchemy import update
+
+from App.database import db
+from App.models import Shift, WeeklyHours
+from App.controllers import (
+    create_user, schedule_shift, schedule_shift_with_check, schedule_week, update_shift, delete_shift,
+    get_weekly_hours, lock_weekly_hours, rebuild_weekly_hours, seed_bench_data, WeeklyHoursExceeded,
+)
+
+MONDAY = date(2025, 3, 3)
+
+
+@pytest.fixture
+def app(make_app):
+    return make_app({"WEEKLY_HOURS_CAP": 16})
+
+
+@pytest.fixture
+def staff(app):
+    return create_user("hours", "hourspass")
+
+
+def test_counter_follows_creates_edits_and_deletes(staff):
+    first = schedule_shift(staff.id, MONDAY, dtime(9), dtime(17))
+    second = schedule_shift(staff.id, date(2025, 3, 4), dtime(9), dtime(13))
+    assert get_weekly_hours(staff.id, MONDAY) == 12
+
+    second.end_time = dtime(12)
+    db.session.commit()
+    assert get_weekly_hours(staff.id, MONDAY) == 11
+
+    # moving a shift into the next ISO week moves its hours too
+    second.work_date = date(2025, 3, 10)
+    db.session.commit()
+    assert get_weekly_hours(staff.id, MONDAY) == 8
+    assert get_weekly_hours(staff.id, date(2025, 3, 10)) == 3
+
+    delete_shift(first.id)
+    assert get_weekly_hours(staff.id, MONDAY) == 0
+
+
+def test_warn_mode_schedules_and_reports(staff):
+    schedule_shift(staff.id, MONDAY, dtime(9), dtime(17))
+    _, ok = schedule_shift_with_check(staff.id, date(2025, 3, 4), dtime(9), dtime(17))
+    assert ok["hours_after"] == 16 and not ok["over"]
+
+    _, over = schedule_shift_with_check(staff.id, date(2025, 3, 5), dtime(9), dtime(10))
+    assert over["over"] and over["mode"] == "warn"
+    assert get_weekly_hours(staff.id, MONDAY) == 17
+
+
+def test_reject_mode(app, staff):
+    app.config["WEEKLY_HOURS_CAP_MODE"] = "reject"
+    windows = {day: ("09:00", "15:00") for day in range(5)}
+    result = schedule_week(staff.id, MONDAY, windows)
+    assert len(result["created"]) == 2
+    assert [r["date"] for r in result["rejected"]] == ["2025-03-05", "2025-03-06", "2025-03-07"]
+    assert Shift.query.count() == 2
+
+    with pytest.raises(WeeklyHoursExceeded) as exc:
+        schedule_shift(staff.id, MONDAY, dtime(18), dtime(23))
+    assert exc.value.check["hours_after"] == 17
+    # other weeks are unaffected
+    assert schedule_shift(staff.id, date(2025, 3, 10), dtime(9), dtime(17)).id
+
+
+def test_edits_go_through_the_guard(app, staff):
+    app.config["WEEKLY_HOURS_CAP_MODE"] = "reject"
+    first = schedule_shift(staff.id, MONDAY, dtime(9), dtime(17))
+    second = schedule_shift(staff.id, date(2025, 3, 4), dtime(9), dtime(15))
+    # resizing counts the shift's new length, not old + new
+    shift, check = update_shift(second.id, {"end_time": dtime(17)})
+    assert check["hours_after"] == 16 and get_weekly_hours(staff.id, MONDAY) == 16
+
+    with pytest.raises(WeeklyHoursExceeded):
+        update_shift(first.id, {"end_time": dtime(18)})
+    assert db.session.get(Shift, first.id).end_time == dtime(17)
+    assert get_weekly_hours(staff.id, MONDAY) == 16
+
+    # role changes and moves into an empty week aren't blocked
+    assert update_shift(first.id, {"role": "till"})[1] is None
+    shift, check = update_shift(first.id, {"work_date": date(2025, 3, 10), "end_time": dtime(18)})
+    assert check["hours_after"] == 9 and get_weekly_hours(staff.id, MONDAY) == 8
+
+
+def test_lock_reads_the_row_not_the_identity_map(staff):
+    schedule_shift(staff.id, MONDAY, dtime(9), dtime(17))
+    row = db.session.get(WeeklyHours, (staff.id, 2025, 10))  # held in the identity map
+    db.session.execute(update(WeeklyHours.__table__).values(scheduled_hours=12))
+    assert get_weekly_hours(staff.id, MONDAY) == row.scheduled_hours == 8  # stale
+    assert lock_weekly_hours(staff.id, MONDAY) == 12
+    # a week without shifts gets its row, so there is something to lock
+    assert lock_weekly_hours(staff.id, date(2025, 3, 10)) == 0
+    assert db.session.get(WeeklyHours, (staff.id, 2025, 11)) is not None
+
+
+def test_rebuild_and_bulk_seed_agree(app):
+    app.config["WEEKLY_HOURS_CAP"] = None
+    seed_bench_data(users=5, weeks=3, shifts_per_week=4, seed=7)
+    seeded = {(w.user_id, w.iso_year, w.iso_week): w.scheduled_hours for w in WeeklyHours.query}
+    assert rebuild_weekly_hours() == len(seeded) == 15
+    assert {(w.user_id, w.iso_year, w.iso_week): w.scheduled_hours for w in WeeklyHours.query} == seeded
@@ -13,14 +13,19 @@ from App.controllers import (
     get_attendance_for_user,
     get_attendance_for_shift,
     attendance_to_json,
+    get_attendance_fields,
+    parse_fields,
+    ATTENDANCE_FIELDS,
+    is_admin_token,
 )
+from App.idempotency import idempotent
 
 attendance_views = Blueprint("attendance_views", __name__, url_prefix="/api/attendance")
 
 # --- helpers ---
 
 def _admin_required():
-    if not current_user or not getattr(current_user, "isAdmin", False):
+    if not is_admin_token():
         return jsonify(error="Admins only"), 403
     return None
 
@@ -30,13 +35,22 @@ def _admin_required():
 @jwt_required()
 def list_attendance():
     """
-    GET /api/attendance?user_id=<id>&shift_id=<id>
+    GET /api/attendance?user_id=<id>&shift_id=<id>&fields=id,time_in
     - If user_id given -> list that user's attendance records
     - If shift_id given -> list all attendance on that shift
     - If both missing -> 400
+    - fields (optional) -> only these keys, and only their columns are queried
     """
     user_id = request.args.get("user_id", type=int)
     shift_id = request.args.get("shift_id", type=int)
+    try:
+        fields = parse_fields(request.args.get("fields"), ATTENDANCE_FIELDS)
+    except ValueError as e:
+        return jsonify(error=str(e)), 400
+
+    if fields and (user_id or shift_id):
+        scope = {"user_id": user_id} if user_id else {"shift_id": shift_id}
+        return jsonify(get_attendance_fields(fields, **scope)), 200
 
     if user_id:
         items = get_attendance_for_user(user_id)
@@ -77,6 +91,7 @@ def ensure_attendance():
 
 
 @attendance_views.route("/clock-in", methods=["POST"])
+@idempotent
 @jwt_required()
 def clock_in():
     """
@@ -97,6 +112,7 @@ def clock_in():
 
 
 @attendance_views.route("/clock-out", methods=["POST"])
+@idempotent
 @jwt_required()
 def clock_out():
     """
@@ -1,15 +1,17 @@
 from flask import Blueprint, render_template, jsonify, request, flash, send_from_directory, flash, redirect, url_for
 from sqlalchemy.exc import IntegrityError
-from flask_jwt_extended import JWTManager,jwt_required, current_user, unset_jwt_cookies, set_access_cookies, create_access_token
+from flask_jwt_extended import JWTManager,jwt_required, current_user, unset_jwt_cookies, set_access_cookies, create_access_token, decode_token
 
-from App.controllers.user import get_all_users
+from App.controllers.user import get_all_users, get_users_page
 
 from.index import index_views
 from App.models import User
 
 from App.controllers import (
     login,
-    create_user
+    create_user,
+    create_user_token,
+    is_admin_token
 )
 
 auth_views = Blueprint('auth_views', __name__, template_folder='../templates')
@@ -23,8 +25,12 @@ def admin_login_page():
 
 @auth_views.route('/users', methods=['GET'])
 def get_user_page():
-    users = get_all_users()
-    return render_template('users.html', users=users)
+    pagination = get_users_page(
+        page=request.args.get('page', 1, type=int),
+        per_page=request.args.get('per_page', 50, type=int),
+        q=request.args.get('q'),
+    )
+    return render_template('users.html', users=pagination.items, pagination=pagination)
 
 @auth_views.route('/identify', methods=['GET'])
 @jwt_required()
@@ -40,9 +46,8 @@ def login_action():
         flash('Invalid username or password given'), 401
         response = redirect(url_for('index_views.login_page'))
     else:
-        user = User.query.filter_by(username=data['username']).first()
         flash('Login Successful')
-        if user and user.isAdmin:
+        if decode_token(token).get('is_admin'):
             response = redirect(url_for('index_views.admin_page'))
         else:
             response = redirect(url_for('index_views.home_page'))
@@ -74,7 +79,7 @@ def signup_action():
 
         user = create_user(username=username, password=password)
         response = redirect(url_for('index_views.home_page'))
-        token = create_access_token(identity=user.username)
+        token = create_user_token(user)
         set_access_cookies(response, token)
     except IntegrityError:
         flash('Username already exists')
@@ -85,7 +90,7 @@ def signup_action():
 @index_views.route("/admin", methods=['GET'])
 @jwt_required()
 def admin_page():
-    if not current_user.isAdmin:
+    if not is_admin_token():
         flash("Access denied: Admins only!")
         return redirect(url_for('index_views.home_page'))
     return render_template("admin/index.html")
@@ -1,5 +1,7 @@
 from flask import Blueprint, redirect, render_template, request, send_from_directory, jsonify, url_for
-from App.controllers import create_user, initialize
+from App.controllers import create_user, initialize, get_outbox_stats, get_latest_job_runs, admin_required
+from App.database import get_pool_stats
+from App.roster_cache import get_roster_cache
 
 index_views = Blueprint('index_views', __name__, template_folder='../templates')
 
@@ -27,3 +29,24 @@ def contact_page():
 @index_views.route('/health', methods=['GET'])
 def health_check():
     return jsonify({'status': 'healthy'})
+
+@index_views.route('/health/pool', methods=['GET'])
+@admin_required()
+def pool_health():
+    return jsonify(get_pool_stats())
+
+@index_views.route('/health/outbox', methods=['GET'])
+@admin_required()
+def outbox_health():
+    return jsonify(get_outbox_stats())
+
+@index_views.route('/health/roster-cache', methods=['GET'])
+@admin_required()
+def roster_cache_health():
+    cache = get_roster_cache()
+    return jsonify(cache.footprint() if cache else {'enabled': False})
+
+@index_views.route('/health/maintenance', methods=['GET'])
+@admin_required()
+def maintenance_health():
+    return jsonify(get_latest_job_runs())
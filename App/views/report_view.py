@@ -1,10 +1,10 @@
 from flask import Blueprint, render_template, request, send_file, redirect, url_for, flash
+from flask_login import login_required
 from App.controllers.report_controller import generate_weekly_report, get_all_reports, get_report_by_id
+from App.idempotency import idempotent
 from datetime import datetime, timedelta
 import io
 import csv
-from reportlab.lib.pagesizes import letter
-from reportlab.pdfgen import canvas
 
 report_views = Blueprint('report_views', __name__, template_folder='../templates')
 
@@ -17,6 +17,8 @@ def view_reports():
 
 
 @report_views.route('/reports/generate', methods=['POST'])
+@idempotent
+@login_required
 def generate_report():
     # Example: auto-generate for the past week
     end_date = datetime.utcnow().date()
@@ -49,6 +51,10 @@ def download_report(report_id):
             download_name=f'report_{report.id}.csv'
         )
     elif fmt == 'pdf':
+        # reportlab is heavy and only needed here
+        from reportlab.lib.pagesizes import letter
+        from reportlab.pdfgen import canvas
+
         output = io.BytesIO()
         pdf = canvas.Canvas(output, pagesize=letter)
         pdf.drawString(100, 750, f"Weekly Report: {report.start_date} - {report.end_date}")
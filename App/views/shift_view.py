@@ -1,7 +1,8 @@
 from flask import Blueprint, render_template, request, jsonify, redirect, url_for, flash
 from flask_login import login_required, current_user
 from datetime import datetime, date, time as dtime
-from App.controllers import schedule_shift, get_roster
+from App.controllers import schedule_shift_with_check, update_shift, get_roster, get_user_options, parse_fields, SHIFT_FIELDS
+from App.controllers import delete_shift as ctrl_delete_shift, WeeklyHoursExceeded
 from App.models import Shift, User
 from App.database import db
 
@@ -32,7 +33,7 @@ def view_shifts():
         query = query.filter(Shift.work_date <= datetime.strptime(end_date, '%Y-%m-%d').date())
     
     shifts = query.order_by(Shift.work_date.desc(), Shift.start_time.desc()).all()
-    users = User.query.all() if hasattr(current_user, 'is_admin') and current_user.is_admin else None
+    users = get_user_options(q=request.args.get('q'), limit=None) if hasattr(current_user, 'is_admin') and current_user.is_admin else None
     
     return render_template('shifts.html', shifts=shifts, users=users)
 
@@ -64,7 +65,7 @@ def view_roster():
 def create_shift():
     """Create a new shift."""
     if request.method == 'GET':
-        users = User.query.all() if hasattr(current_user, 'is_admin') and current_user.is_admin else None
+        users = get_user_options(q=request.args.get('q'), limit=None) if hasattr(current_user, 'is_admin') and current_user.is_admin else None
         return render_template('create_shift.html', users=users)
     
     # POST request
@@ -83,7 +84,7 @@ def create_shift():
         location = request.form.get('location')
         
         # Use the controller's schedule_shift function
-        shift = schedule_shift(
+        shift, check = schedule_shift_with_check(
             user_id=user_id or current_user.id,
             work_date=work_date,
             start=start_time,
@@ -93,8 +94,14 @@ def create_shift():
         )
         
         flash(f'Shift scheduled successfully for {work_date}', 'success')
+        if check and check['over']:
+            flash(f"{check['hours_after']}h scheduled that week, over the "
+                  f"{check['cap']}h cap.", 'warning')
         return redirect(url_for('shift_views.view_shifts'))
         
+    except WeeklyHoursExceeded as e:
+        flash(str(e), 'error')
+        return redirect(url_for('shift_views.create_shift'))
     except ValueError as e:
         flash(f'Invalid date or time format: {str(e)}', 'error')
         return redirect(url_for('shift_views.create_shift'))
@@ -133,16 +140,22 @@ def edit_shift(shift_id):
     
     # POST request
     try:
-        shift.work_date = datetime.strptime(request.form['work_date'], '%Y-%m-%d').date()
-        shift.start_time = datetime.strptime(request.form['start_time'], '%H:%M').time()
-        shift.end_time = datetime.strptime(request.form['end_time'], '%H:%M').time()
-        shift.role = request.form.get('role')
-        shift.location = request.form.get('location')
-        
-        db.session.commit()
+        shift, check = update_shift(shift.id, {
+            'work_date': datetime.strptime(request.form['work_date'], '%Y-%m-%d').date(),
+            'start_time': datetime.strptime(request.form['start_time'], '%H:%M').time(),
+            'end_time': datetime.strptime(request.form['end_time'], '%H:%M').time(),
+            'role': request.form.get('role'),
+            'location': request.form.get('location'),
+        })
         flash('Shift updated successfully', 'success')
+        if check and check['over']:
+            flash(f"{check['hours_after']}h scheduled that week, over the "
+                  f"{check['cap']}h cap.", 'warning')
         return redirect(url_for('shift_views.view_shift', shift_id=shift.id))
         
+    except WeeklyHoursExceeded as e:
+        flash(str(e), 'error')
+        return redirect(url_for('shift_views.edit_shift', shift_id=shift_id))
     except ValueError as e:
         flash(f'Invalid date or time format: {str(e)}', 'error')
         return redirect(url_for('shift_views.edit_shift', shift_id=shift_id))
@@ -164,8 +177,7 @@ def delete_shift(shift_id):
         return redirect(url_for('shift_views.view_shifts'))
     
     try:
-        db.session.delete(shift)
-        db.session.commit()
+        ctrl_delete_shift(shift.id)
         flash('Shift deleted successfully', 'success')
     except Exception as e:
         db.session.rollback()
@@ -188,17 +200,15 @@ def get_shifts_json():
     
     start_date = datetime.strptime(start_date_str, '%Y-%m-%d').date()
     end_date = datetime.strptime(end_date_str, '%Y-%m-%d').date()
+    try:
+        fields = parse_fields(request.args.get('fields'), SHIFT_FIELDS)
+    except ValueError as e:
+        return jsonify({'error': str(e)}), 400
     
-    # Use controller's get_roster function
-    roster = get_roster(start_date, end_date)
-    
-    # Filter by user if specified
-    if user_id:
-        user = User.query.get(user_id)
-        if user:
-            roster = [r for r in roster if r.get('username') == user.username]
-    elif hasattr(current_user, 'is_admin') and not current_user.is_admin:
-        roster = [r for r in roster if r.get('username') == current_user.username]
+    # Filter by user if specified (in SQL, so it works whatever fields are asked for)
+    if not user_id and hasattr(current_user, 'is_admin') and not current_user.is_admin:
+        user_id = current_user.id
+    roster = get_roster(start_date, end_date, fields=fields, user_id=user_id)
     
     return jsonify({'shifts': roster})
 
@@ -220,7 +230,7 @@ def create_shift_json():
         end_time = datetime.strptime(data['end_time'], '%H:%M').time()
         
         # Use controller's schedule_shift function
-        shift = schedule_shift(
+        shift, check = schedule_shift_with_check(
             user_id=user_id,
             work_date=work_date,
             start=start_time,
@@ -229,8 +239,13 @@ def create_shift_json():
             location=data.get('location')
         )
         
-        return jsonify(shift.get_json()), 201
+        body = shift.get_json()
+        if check and check['over']:
+            body['weekly_hours_warning'] = check
+        return jsonify(body), 201
         
+    except WeeklyHoursExceeded as e:
+        return jsonify({'error': str(e), 'weekly_hours': e.check}), 409
     except KeyError as e:
         return jsonify({'error': f'Missing required field: {str(e)}'}), 400
     except ValueError as e:
@@ -251,20 +266,26 @@ def update_shift_json(shift_id):
     data = request.get_json()
     
     try:
+        changes = {}
         if 'work_date' in data:
-            shift.work_date = datetime.strptime(data['work_date'], '%Y-%m-%d').date()
+            changes['work_date'] = datetime.strptime(data['work_date'], '%Y-%m-%d').date()
         if 'start_time' in data:
-            shift.start_time = datetime.strptime(data['start_time'], '%H:%M').time()
+            changes['start_time'] = datetime.strptime(data['start_time'], '%H:%M').time()
         if 'end_time' in data:
-            shift.end_time = datetime.strptime(data['end_time'], '%H:%M').time()
+            changes['end_time'] = datetime.strptime(data['end_time'], '%H:%M').time()
         if 'role' in data:
-            shift.role = data['role']
+            changes['role'] = data['role']
         if 'location' in data:
-            shift.location = data['location']
+            changes['location'] = data['location']
         
-        db.session.commit()
-        return jsonify(shift.get_json())
+        shift, check = update_shift(shift.id, changes)
+        body = shift.get_json()
+        if check and check['over']:
+            body['weekly_hours_warning'] = check
+        return jsonify(body)
         
+    except WeeklyHoursExceeded as e:
+        return jsonify({'error': str(e), 'weekly_hours': e.check}), 409
     except ValueError as e:
         db.session.rollback()
         return jsonify({'error': f'Invalid date/time format: {str(e)}'}), 400
@@ -283,8 +304,7 @@ def delete_shift_json(shift_id):
         return jsonify({'error': 'Unauthorized'}), 403
     
     try:
-        db.session.delete(shift)
-        db.session.commit()
+        ctrl_delete_shift(shift.id)
         return jsonify({'message': 'Shift deleted successfully'}), 200
     except Exception as e:
         db.session.rollback()
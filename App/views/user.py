@@ -1,14 +1,18 @@
 from flask import Blueprint, render_template, jsonify, request, send_from_directory, flash, redirect, url_for
 from flask_jwt_extended import jwt_required, get_jwt_identity
-from App.controllers.user import create_user, get_all_users, get_all_users_json,jwt_required
+from App.controllers.user import create_user, get_all_users, get_all_users_json, get_users_page, get_user_options
 
 user_views = Blueprint('user_views', __name__, template_folder='../templates')
 
 @user_views.route('/users', methods=['GET'])
 @jwt_required()
 def get_user_page():
-    users = get_all_users()
-    return render_template('users.html', users=users)
+    pagination = get_users_page(
+        page=request.args.get('page', 1, type=int),
+        per_page=request.args.get('per_page', 50, type=int),
+        q=request.args.get('q'),
+    )
+    return render_template('users.html', users=pagination.items, pagination=pagination)
 
 @user_views.route('/users', methods=['POST'])
 @jwt_required()
@@ -29,8 +33,27 @@ def create_user_action():
 @user_views.route('/api/users', methods=['GET'])
 @jwt_required()
 def get_users_action():
-    users = get_all_users_json()
-    return jsonify(users)
+    """
+    GET /api/users?page=1&per_page=50&q=<username prefix>
+    Body stays a plain list; paging info goes in X-Total-Count / X-Page / X-Per-Page.
+    """
+    pagination = get_users_page(
+        page=request.args.get('page', 1, type=int),
+        per_page=request.args.get('per_page', 50, type=int),
+        q=request.args.get('q'),
+    )
+    response = jsonify([user.get_json() for user in pagination.items])
+    response.headers['X-Total-Count'] = str(pagination.total)
+    response.headers['X-Page'] = str(pagination.page)
+    response.headers['X-Per-Page'] = str(pagination.per_page)
+    return response
+
+@user_views.route('/api/users/options', methods=['GET'])
+@jwt_required()
+def get_user_options_action():
+    """GET /api/users/options?q=<username prefix>&limit=50 -> [{id, username}] for dropdowns"""
+    options = get_user_options(q=request.args.get('q'), limit=request.args.get('limit', 50, type=int))
+    return jsonify(options)
 
 @user_views.route('/api/users', methods=['POST'])
 @jwt_required()
@@ -0,0 +1,85 @@
+"""
+Coverage heatmap for a large site over a month: the sweep-line in
+get_coverage against the per-slot COUNT queries it replaces (timed on a
+single day and scaled up, since a month of them takes minutes).
+
+    python benchmarks/coverage.py                    # 1500 staff, 5 weeks
+    python benchmarks/coverage.py --users 3000 --json
+"""
+import argparse
+import json
+import os
+import sys
+import tempfile
+import time
+from datetime import date, datetime, timedelta
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from sqlalchemy import func, select
+
+from App.main import create_app
+from App.database import db
+from App.models import Shift
+from App.controllers import seed_bench_data, get_coverage
+
+
+def per_slot_day(day, slot_minutes):
+    """The old way: one COUNT per location per slot."""
+    locations = db.session.scalars(select(Shift.location).where(Shift.work_date == day).distinct()).all()
+    grid = {}
+    for location in locations:
+        row = []
+        for slot in range(0, 24 * 60, slot_minutes):
+            slot_start = (datetime.min + timedelta(minutes=slot)).time()
+            slot_end = (datetime.min + timedelta(minutes=slot + slot_minutes - 1)).time()
+            row.append(db.session.scalar(select(func.count(Shift.id)).where(
+                Shift.work_date == day, Shift.location == location,
+                Shift.start_time <= slot_end, Shift.end_time > slot_start)))
+        grid[location] = row
+    return grid
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--users", type=int, default=1500)
+    parser.add_argument("--weeks", type=int, default=5)
+    parser.add_argument("--json", action="store_true")
+    args = parser.parse_args()
+
+    path = os.path.join(tempfile.mkdtemp(), "coverage.db")
+    create_app({"SQLALCHEMY_DATABASE_URI": f"sqlite:///{path}", "METRICS_ENABLED": False,
+                "WEEKLY_HOURS_CAP": None}, mode="cli")
+    db.create_all()
+    seeded = seed_bench_data(args.users, args.weeks, seed=args.users)
+    start = date.fromisoformat(seeded["start"])
+    end = start + timedelta(days=30)
+
+    started = time.perf_counter()
+    grid = get_coverage(start, end)
+    sweep_ms = (time.perf_counter() - started) * 1000.0
+
+    started = time.perf_counter()
+    per_slot_day(start, 15)
+    per_slot_day_ms = (time.perf_counter() - started) * 1000.0
+
+    results = {
+        "shifts": seeded["shifts"],
+        "days": 31,
+        "locations": len(grid["locations"]),
+        "cells": len(grid["locations"]) * len(grid["scheduled"][0]) * 2,
+        "sweep_month_ms": round(sweep_ms, 1),
+        "per_slot_one_day_ms": round(per_slot_day_ms, 1),
+        "per_slot_month_ms_estimate": round(per_slot_day_ms * 31, 1),
+    }
+    if args.json:
+        print(json.dumps(results, indent=2))
+        return
+    print(f"{results['shifts']} shifts, {results['locations']} locations, {results['cells']} cells over 31 days")
+    print(f"sweep-line, whole month     {results['sweep_month_ms']:>10.1f} ms")
+    print(f"per-slot queries, one day   {results['per_slot_one_day_ms']:>10.1f} ms "
+          f"(~{results['per_slot_month_ms_estimate'] / 1000:.1f} s for the month)")
+
+
+if __name__ == "__main__":
+    main()
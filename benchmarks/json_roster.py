@@ -0,0 +1,82 @@
+"""
+Before/after for the JSON roster payload: the same get_json rows through
+Flask's default provider and through FastJSONProvider, plus the wire size
+under gzip and brotli.
+
+    python benchmarks/json_roster.py                 # ~10k shifts
+    python benchmarks/json_roster.py --users 400 --weeks 4 --json
+"""
+import argparse
+import json
+import os
+import statistics
+import sys
+import tempfile
+import time
+from datetime import date, timedelta
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from flask.json.provider import DefaultJSONProvider
+from sqlalchemy.orm import joinedload
+
+from App.main import create_app
+from App.database import db
+from App.compression import compress, brotli
+from App.serialization import FastJSONProvider
+from App.models import Shift
+from App.controllers import seed_bench_data
+
+
+def timed(fn, reps):
+    timings = []
+    for _ in range(reps):
+        started = time.perf_counter()
+        body = fn()
+        timings.append((time.perf_counter() - started) * 1000.0)
+    return round(statistics.median(timings), 2), body
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--users", type=int, default=500)
+    parser.add_argument("--weeks", type=int, default=4)
+    parser.add_argument("--reps", type=int, default=10)
+    parser.add_argument("--json", action="store_true")
+    args = parser.parse_args()
+
+    path = os.path.join(tempfile.mkdtemp(), "json_roster.db")
+    app = create_app({"SQLALCHEMY_DATABASE_URI": f"sqlite:///{path}", "METRICS_ENABLED": False}, mode="cli")
+    db.create_all()
+    seeded = seed_bench_data(args.users, args.weeks, seed=args.users)
+    start = date.fromisoformat(seeded["start"])
+    # same query as get_roster, keeping the ORM rows so row building is timed too
+    shifts = Shift.query.options(joinedload(Shift.user)).filter(
+        Shift.work_date.between(start, start + timedelta(weeks=args.weeks, days=-1))
+    ).order_by(Shift.work_date, Shift.start_time).all()
+
+    default_provider, fast_provider = DefaultJSONProvider(app), FastJSONProvider(app)
+    results = {"rows": len(shifts)}
+    with app.test_request_context():
+        results["before_ms"], before = timed(
+            lambda: default_provider.response([s.get_json() for s in shifts]).get_data(), args.reps)
+        results["after_ms"], after = timed(
+            lambda: fast_provider.response([s.get_json() for s in shifts]).get_data(), args.reps)
+
+    results["bytes"] = {"before": len(before), "after": len(after)}
+    results["gzip_bytes"] = len(compress(after, "gzip", app.config))
+    if brotli is not None:
+        results["br_bytes"] = len(compress(after, "br", app.config))
+    results["speedup"] = round(results["before_ms"] / results["after_ms"], 2) if results["after_ms"] else None
+
+    if args.json:
+        print(json.dumps(results, indent=2))
+        return
+    print(f"rows: {results['rows']}")
+    print(f"serialize  before {results['before_ms']:>8.2f} ms   after {results['after_ms']:>8.2f} ms   "
+          f"({results['speedup']}x)")
+    print(f"bytes      raw {len(after)}   gzip {results['gzip_bytes']}   br {results.get('br_bytes', '-')}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,227 @@
+"""
+HTTP load test against the real deployment shape: gunicorn + gunicorn_config.py
+serving wsgi:app on a local database seeded with `flask bench seed`.
+
+Traffic mixes (run together with --scenario mixed, the default):
+  clock_in_spike    every staff member with a shift today logs in and clocks in
+                    within --spike-seconds (the morning rush)
+  roster_polling    --managers dashboards poll this week's roster every --poll-interval
+  report_downloads  --report-users admins pull the weekly report back to back
+
+Reports throughput, p50/p95/p99 latency and error rate per endpoint. Worker
+settings accept comma lists, and each combination is booted and measured in
+turn, so worker count and class can be chosen from data:
+
+    python benchmarks/loadtest.py --workers 1,2,4,8 --worker-class gevent,sync
+    python benchmarks/loadtest.py --database-uri postgresql://localhost/shiftmate_load --json
+"""
+from gevent import monkey
+monkey.patch_all()
+
+import argparse
+import itertools
+import json
+import os
+import random
+import subprocess
+import sys
+import tempfile
+import time
+import urllib.error
+import urllib.request
+from collections import defaultdict
+from datetime import date, timedelta
+
+import gevent
+from gevent.pool import Pool
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+
+def percentile(samples, pct):
+    if not samples:
+        return None
+    ordered = sorted(samples)
+    return ordered[min(len(ordered) - 1, int(round(pct / 100.0 * (len(ordered) - 1))))]
+
+
+class Recorder:
+    def __init__(self):
+        self.latencies = defaultdict(list)
+        self.errors = defaultdict(int)
+
+    def request(self, label, url, body=None, token=None):
+        headers = {"Content-Type": "application/json"}
+        if token:
+            headers["Authorization"] = f"Bearer {token}"
+        data = json.dumps(body).encode() if body is not None else None
+        started = time.perf_counter()
+        payload = None
+        try:
+            with urllib.request.urlopen(urllib.request.Request(url, data=data, headers=headers), timeout=30) as resp:
+                raw = resp.read()
+                if resp.headers.get("Content-Type", "").startswith("application/json"):
+                    payload = json.loads(raw)
+        except (urllib.error.URLError, OSError, ValueError):
+            self.errors[label] += 1
+        self.latencies[label].append((time.perf_counter() - started) * 1000.0)
+        return payload
+
+    def summary(self, seconds):
+        rows = {}
+        for label in sorted(self.latencies):
+            samples = self.latencies[label]
+            rows[label] = {
+                "requests": len(samples),
+                "throughput_rps": round(len(samples) / seconds, 1),
+                "error_rate": round(self.errors[label] / len(samples), 4),
+                "p50_ms": round(percentile(samples, 50), 1),
+                "p95_ms": round(percentile(samples, 95), 1),
+                "p99_ms": round(percentile(samples, 99), 1),
+            }
+        return rows
+
+
+# ---------- environment ----------
+
+def flask_env(database_uri):
+    env = dict(os.environ)
+    env.update({
+        "FLASK_APP": "wsgi.py",
+        "FLASK_SQLALCHEMY_DATABASE_URI": database_uri,
+        "FLASK_DEBUG": "0",
+    })
+    return env
+
+def seed(database_uri, users, weeks):
+    env = flask_env(database_uri)
+    subprocess.run([sys.executable, "-m", "flask", "init"], cwd=ROOT, env=env, check=True, stdout=subprocess.DEVNULL)
+    subprocess.run(
+        [sys.executable, "-m", "flask", "bench", "seed", "--users", str(users), "--weeks", str(weeks)],
+        cwd=ROOT, env=env, check=True, stdout=subprocess.DEVNULL,
+    )
+
+def boot(database_uri, port, workers, worker_class):
+    cmd = [
+        sys.executable, "-m", "gunicorn", "-c", "gunicorn_config.py",
+        "--bind", f"127.0.0.1:{port}", "--workers", str(workers), "--worker-class", worker_class,
+        "--access-logfile", "/dev/null", "wsgi:app",
+    ]
+    server = subprocess.Popen(cmd, cwd=ROOT, env=flask_env(database_uri), stderr=subprocess.DEVNULL)
+    base = f"http://127.0.0.1:{port}"
+    deadline = time.time() + 30
+    while time.time() < deadline:
+        try:
+            urllib.request.urlopen(f"{base}/health", timeout=1).read()
+            return server, base
+        except OSError:
+            gevent.sleep(0.2)
+    server.terminate()
+    raise RuntimeError("gunicorn did not become healthy within 30s")
+
+
+# ---------- scenarios ----------
+
+def clock_in_spike(rec, base, todays_shifts, spike_seconds):
+    def staff(shift):
+        gevent.sleep(random.uniform(0, spike_seconds))
+        login = rec.request("POST /api/login", f"{base}/api/login", {"username": shift["username"], "password": "benchpass"})
+        if not login:
+            return
+        rec.request("POST /api/attendance/clock-in", f"{base}/api/attendance/clock-in",
+                    {"shift_id": shift["id"]}, token=login["access_token"])
+    Pool(len(todays_shifts) or 1).map(staff, todays_shifts)
+
+def roster_polling(rec, base, admin_token, managers, interval, until):
+    monday = date.today() - timedelta(days=date.today().weekday())
+    url = f"{base}/api/roster?start={monday}&end={monday + timedelta(days=6)}"
+    def manager(_):
+        gevent.sleep(random.uniform(0, interval))
+        while time.time() < until:
+            rec.request("GET /api/roster", url, token=admin_token)
+            gevent.sleep(interval)
+    Pool(managers).map(manager, range(managers))
+
+def report_downloads(rec, base, admin_token, report_users, until):
+    weeks = [date.today() - timedelta(days=date.today().weekday(), weeks=n) for n in range(4)]
+    def admin(_):
+        while time.time() < until:
+            rec.request("GET /api/admin/reports/weekly",
+                        f"{base}/api/admin/reports/weekly?week_start={random.choice(weeks)}", token=admin_token)
+            gevent.sleep(random.uniform(0.5, 2.0))
+    Pool(report_users).map(admin, range(report_users))
+
+
+def run_once(args, database_uri, workers, worker_class):
+    server, base = boot(database_uri, args.port, workers, worker_class)
+    try:
+        setup = Recorder()
+        admin = setup.request("login", f"{base}/api/login", {"username": "bench000000", "password": "benchpass"})
+        admin_token = admin["access_token"]
+        today = date.today().isoformat()
+        todays_shifts = setup.request("roster", f"{base}/api/roster?start={today}&end={today}", token=admin_token) or []
+
+        rec = Recorder()
+        started = time.time()
+        until = started + args.duration
+        jobs = []
+        if args.scenario in ("mixed", "clock_in_spike"):
+            jobs.append(gevent.spawn(clock_in_spike, rec, base, todays_shifts, args.spike_seconds))
+        if args.scenario in ("mixed", "roster_polling"):
+            jobs.append(gevent.spawn(roster_polling, rec, base, admin_token, args.managers, args.poll_interval, until))
+        if args.scenario in ("mixed", "report_downloads"):
+            jobs.append(gevent.spawn(report_downloads, rec, base, admin_token, args.report_users, until))
+        gevent.joinall(jobs, raise_error=True)
+        return rec.summary(time.time() - started)
+    finally:
+        server.terminate()
+        server.wait()
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--scenario", default="mixed",
+                        choices=["mixed", "clock_in_spike", "roster_polling", "report_downloads"])
+    parser.add_argument("--workers", default="4", help="comma list, e.g. 1,2,4")
+    parser.add_argument("--worker-class", default="gevent", help="comma list, e.g. gevent,sync")
+    parser.add_argument("--database-uri", default=None, help="defaults to a throwaway SQLite file")
+    parser.add_argument("--users", type=int, default=300)
+    parser.add_argument("--weeks", type=int, default=4)
+    parser.add_argument("--duration", type=float, default=30.0, help="seconds of polling/report traffic")
+    parser.add_argument("--spike-seconds", type=float, default=10.0)
+    parser.add_argument("--managers", type=int, default=20)
+    parser.add_argument("--poll-interval", type=float, default=2.0)
+    parser.add_argument("--report-users", type=int, default=5)
+    parser.add_argument("--port", type=int, default=8099)
+    parser.add_argument("--json", action="store_true", help="print machine-readable results")
+    args = parser.parse_args()
+
+    database_uri = args.database_uri or f"sqlite:///{os.path.join(tempfile.mkdtemp(), 'loadtest.db')}"
+    configs = list(itertools.product(
+        [int(w) for w in args.workers.split(",")],
+        args.worker_class.split(","),
+    ))
+
+    runs = []
+    for workers, worker_class in configs:
+        # reseed per run so every configuration sees the same unclocked morning
+        seed(database_uri, args.users, args.weeks)
+        runs.append({
+            "workers": workers,
+            "worker_class": worker_class,
+            "endpoints": run_once(args, database_uri, workers, worker_class),
+        })
+
+    if args.json:
+        print(json.dumps({"scenario": args.scenario, "users": args.users, "runs": runs}, indent=2))
+        return
+    for run in runs:
+        print(f"\n== workers={run['workers']} worker_class={run['worker_class']} scenario={args.scenario}")
+        print(f"{'endpoint':<32} {'reqs':>6} {'rps':>7} {'err%':>6} {'p50':>8} {'p95':>8} {'p99':>8}")
+        for label, row in run["endpoints"].items():
+            print(f"{label:<32} {row['requests']:>6} {row['throughput_rps']:>7} {row['error_rate'] * 100:>5.1f}% "
+                  f"{row['p50_ms']:>7.1f} {row['p95_ms']:>7.1f} {row['p99_ms']:>7.1f}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,132 @@
+"""
+Latency of an unrelated endpoint (/health) while a burst of logins hashes
+passwords on the same gevent worker.
+
+    python benchmarks/login_storm.py                  # hashing on the native thread pool
+    python benchmarks/login_storm.py --inline         # hashing on the event loop (old behaviour)
+    python benchmarks/login_storm.py --logins 400 --concurrency 50 --json
+"""
+from gevent import monkey
+monkey.patch_all()
+
+import argparse
+import json
+import os
+import sys
+import tempfile
+import time
+import urllib.request
+
+import gevent
+from gevent.event import Event
+from gevent.pool import Pool
+from gevent.pywsgi import WSGIServer
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from App.main import create_app, CLI_MODE
+from App.database import create_db
+from App.controllers import create_user
+from App.views import auth_views, index_views
+
+
+def percentile(samples, pct):
+    if not samples:
+        return None
+    ordered = sorted(samples)
+    index = min(len(ordered) - 1, int(round(pct / 100.0 * (len(ordered) - 1))))
+    return ordered[index]
+
+
+def timed_request(url, body=None):
+    data = json.dumps(body).encode() if body is not None else None
+    req = urllib.request.Request(url, data=data, headers={"Content-Type": "application/json"})
+    started = time.perf_counter()
+    try:
+        with urllib.request.urlopen(req) as resp:
+            resp.read()
+            ok = resp.status < 400
+    except Exception:
+        ok = False
+    return (time.perf_counter() - started) * 1000.0, ok
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--logins", type=int, default=200)
+    parser.add_argument("--concurrency", type=int, default=25)
+    parser.add_argument("--probe-interval", type=float, default=0.01, help="seconds between /health probes")
+    parser.add_argument("--workers", type=int, default=4, help="PASSWORD_HASH_WORKERS")
+    parser.add_argument("--method", default="scrypt", help="PASSWORD_HASH_METHOD")
+    parser.add_argument("--inline", action="store_true", help="hash on the event loop (PASSWORD_HASH_WORKERS=0)")
+    parser.add_argument("--json", action="store_true", help="print machine-readable results")
+    args = parser.parse_args()
+
+    db_path = os.path.join(tempfile.mkdtemp(), "login-storm.db")
+    # only the two routes under test: metrics, compression and the rest of the
+    # full app would add their own per-request cost to the numbers
+    app = create_app({
+        "TESTING": True,
+        "SQLALCHEMY_DATABASE_URI": f"sqlite:///{db_path}",
+        "PASSWORD_HASH_METHOD": args.method,
+        "PASSWORD_HASH_WORKERS": 0 if args.inline else args.workers,
+        "PASSWORD_HASH_MAX_PENDING": args.concurrency * 2,
+        "PASSWORD_HASH_QUEUE_TIMEOUT": 30,
+    }, mode=CLI_MODE)
+    app.register_blueprint(index_views)
+    app.register_blueprint(auth_views)
+    create_db()
+    create_user("storm", "stormpass")
+
+    server = WSGIServer(("127.0.0.1", 0), app, log=None)
+    server.start()
+    base = f"http://127.0.0.1:{server.server_port}"
+
+    # baseline with no logins in flight
+    idle = [timed_request(f"{base}/health")[0] for _ in range(50)]
+
+    login_latencies, login_errors = [], 0
+    storm_done = Event()
+
+    def one_login(_):
+        nonlocal login_errors
+        ms, ok = timed_request(f"{base}/api/login", {"username": "storm", "password": "stormpass"})
+        login_latencies.append(ms)
+        login_errors += 0 if ok else 1
+
+    def storm():
+        started = time.perf_counter()
+        Pool(args.concurrency).map(one_login, range(args.logins))
+        storm_done.set()
+        return time.perf_counter() - started
+
+    storm_greenlet = gevent.spawn(storm)
+    probes = []
+    while not storm_done.is_set():
+        probes.append(timed_request(f"{base}/health")[0])
+        gevent.sleep(args.probe_interval)
+    storm_seconds = storm_greenlet.get()
+    server.stop()
+
+    results = {
+        "mode": "inline" if args.inline else f"pool[{args.workers}]",
+        "method": args.method,
+        "logins": args.logins,
+        "concurrency": args.concurrency,
+        "login_throughput_per_s": round(args.logins / storm_seconds, 1),
+        "login_errors": login_errors,
+        "login_p99_ms": round(percentile(login_latencies, 99), 1),
+        "health_idle_p50_ms": round(percentile(idle, 50), 2),
+        "health_storm_p50_ms": round(percentile(probes, 50), 2),
+        "health_storm_p99_ms": round(percentile(probes, 99), 2),
+        "health_probes": len(probes),
+    }
+    if args.json:
+        print(json.dumps(results))
+    else:
+        for key, value in results.items():
+            print(f"{key:>26}: {value}")
+
+
+if __name__ == "__main__":
+    main()
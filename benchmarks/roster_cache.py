@@ -0,0 +1,93 @@
+"""
+get_roster for the current week from the database against the hot-window
+roster cache, plus what the cached window costs in memory next to the same
+shifts held as ORM objects.
+
+    python benchmarks/roster_cache.py                # 500 staff, 3 cached weeks
+    python benchmarks/roster_cache.py --users 2000 --json
+"""
+import argparse
+import json
+import os
+import statistics
+import sys
+import tempfile
+import time
+import tracemalloc
+from datetime import date, timedelta
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from flask import current_app
+from sqlalchemy.orm import joinedload
+
+from App.main import create_app
+from App.database import db
+from App.models import Shift
+from App.controllers import seed_bench_data, get_roster
+from App.roster_cache import get_roster_cache, init_roster_cache
+
+
+def timed(fn, reps):
+    timings = []
+    for _ in range(reps):
+        started = time.perf_counter()
+        fn()
+        timings.append((time.perf_counter() - started) * 1000.0)
+    return round(statistics.median(timings), 3)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--users", type=int, default=500)
+    parser.add_argument("--reps", type=int, default=20)
+    parser.add_argument("--json", action="store_true")
+    args = parser.parse_args()
+
+    path = os.path.join(tempfile.mkdtemp(), "roster_cache.db")
+    app = create_app({"SQLALCHEMY_DATABASE_URI": f"sqlite:///{path}", "METRICS_ENABLED": False,
+                      "ROSTER_CACHE_REFRESH_SECONDS": 3600}, mode="cli")
+    db.create_all()
+    monday = date.today() - timedelta(days=date.today().weekday())
+    seed_bench_data(args.users, 3, start=monday, seed=args.users)
+    init_roster_cache(app)
+    cache = get_roster_cache()
+    week = (monday, monday + timedelta(days=6))
+
+    cache.refresh(force=True)
+    cached_ms = timed(lambda: get_roster(*week), args.reps)
+    cached_user_ms = timed(lambda: get_roster(*week, user_id=args.users // 2), args.reps)
+    del current_app.extensions["roster_cache"]
+    db_ms = timed(lambda: get_roster(*week), args.reps)
+    db_user_ms = timed(lambda: get_roster(*week, user_id=args.users // 2), args.reps)
+
+    db.session.remove()
+    tracemalloc.start()
+    shifts = Shift.query.options(joinedload(Shift.user)).filter(
+        Shift.work_date.between(monday, monday + timedelta(days=20))).all()
+    orm_bytes = tracemalloc.get_traced_memory()[0]
+    tracemalloc.stop()
+
+    footprint = cache.footprint()
+    results = {
+        "shifts_in_window": footprint["shifts"],
+        "week_ms": {"database": db_ms, "cache": cached_ms},
+        "user_week_ms": {"database": db_user_ms, "cache": cached_user_ms},
+        "memory_bytes": {"cache": footprint["total_bytes"], "orm_objects": orm_bytes},
+        "bytes_per_shift": {
+            "cache": round(footprint["total_bytes"] / max(len(shifts), 1), 1),
+            "orm_objects": round(orm_bytes / max(len(shifts), 1), 1),
+        },
+    }
+    if args.json:
+        print(json.dumps(results, indent=2))
+        return
+    print(f"shifts in window: {results['shifts_in_window']}")
+    print(f"week roster     db {db_ms:>8.3f} ms   cache {cached_ms:>8.3f} ms")
+    print(f"one user's week db {db_user_ms:>8.3f} ms   cache {cached_user_ms:>8.3f} ms")
+    print(f"memory          orm {orm_bytes:>10} B   cache {footprint['total_bytes']:>10} B   "
+          f"({results['bytes_per_shift']['orm_objects']} vs {results['bytes_per_shift']['cache']} B/shift)")
+
+
+if __name__ == "__main__":
+    main()
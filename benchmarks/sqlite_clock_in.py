@@ -0,0 +1,168 @@
+"""
+Sustained clock-in/clock-out throughput on a single SQLite file, shaped like
+the small-site deployment: --workers processes (gunicorn workers), each
+monkey-patched by gevent and running --greenlets concurrent staff.
+
+Every cycle is clock_in + clock_out + a reset of the row, so the run can go on
+for --duration seconds. Each mode gets a freshly seeded database:
+
+  concurrent  SQLITE_CONCURRENT on: WAL, pragmas, serialized writer, retry_on_busy
+  baseline    SQLITE_CONCURRENT off: rollback journal, driver defaults
+
+    python benchmarks/sqlite_clock_in.py
+    python benchmarks/sqlite_clock_in.py --workers 4 --greenlets 50 --duration 20 --json
+"""
+import argparse
+import json
+import os
+import subprocess
+import sys
+import tempfile
+import time
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+
+MODES = {"concurrent": True, "baseline": False}
+
+
+def percentile(samples, pct):
+    if not samples:
+        return None
+    ordered = sorted(samples)
+    return ordered[min(len(ordered) - 1, int(round(pct / 100.0 * (len(ordered) - 1))))]
+
+
+def make_app(database_uri, concurrent):
+    from App.main import create_app
+    return create_app({
+        "SQLALCHEMY_DATABASE_URI": database_uri,
+        "SQLITE_CONCURRENT": concurrent,
+        "METRICS_ENABLED": False,
+    }, mode="cli")
+
+
+def seed(database_uri, users, weeks):
+    from App.database import db
+    from App.controllers import seed_bench_data
+    make_app(database_uri, True)
+    db.create_all()
+    # attendance_rate=0 leaves every row unclocked
+    seed_bench_data(users, weeks, seed=users, attendance_rate=0)
+
+
+def worker(args):
+    """Runs in a child process: one gevent-patched 'gunicorn worker'."""
+    from gevent import monkey
+    monkey.patch_all()
+    import gevent
+    from gevent.pool import Pool
+    from sqlalchemy.exc import OperationalError
+
+    from App.database import db, get_pool_stats
+    from App.models import Attendance
+    from App.controllers import clock_in, clock_out
+
+    app = make_app(args.database_uri, MODES[args.mode])
+    with app.app_context():
+        rows = [
+            (a.id, a.user_id, a.shift_id)
+            for a in Attendance.query.order_by(Attendance.id).all()[args.worker_index::args.workers]
+        ]
+    latencies, errors = [], {}
+    until = time.time() + args.duration
+
+    def staff(slot):
+        mine = rows[slot::args.greenlets]
+        i = 0
+        while mine and time.time() < until:
+            attendance_id, user_id, shift_id = mine[i % len(mine)]
+            i += 1
+            with app.app_context():
+                started = time.perf_counter()
+                try:
+                    clock_in(user_id, shift_id)
+                    clock_out(user_id, shift_id)
+                    Attendance.query.filter_by(id=attendance_id).update({"time_in": None, "time_out": None})
+                    db.session.commit()
+                    latencies.append((time.perf_counter() - started) * 1000.0)
+                except OperationalError as exc:
+                    db.session.rollback()
+                    key = str(exc.orig)[:60]
+                    errors[key] = errors.get(key, 0) + 1
+                    gevent.sleep(0)
+
+    Pool(args.greenlets).map(staff, range(args.greenlets))
+    print(json.dumps({
+        "cycles": len(latencies),
+        "latencies": latencies,
+        "errors": errors,
+        "writer": get_pool_stats(app).get("sqlite_writer"),
+    }))
+
+
+def run_mode(args, mode):
+    database_uri = f"sqlite:///{os.path.join(tempfile.mkdtemp(), 'clock_in.db')}"
+    seed(database_uri, args.users, args.weeks)
+    cmd = [sys.executable, os.path.abspath(__file__), "--worker", "--mode", mode, "--database-uri", database_uri,
+           "--workers", str(args.workers), "--greenlets", str(args.greenlets), "--duration", str(args.duration)]
+    started = time.time()
+    procs = [subprocess.Popen(cmd + ["--worker-index", str(i)], cwd=ROOT, stdout=subprocess.PIPE, text=True)
+             for i in range(args.workers)]
+    reports = [json.loads(proc.communicate()[0].strip().splitlines()[-1]) for proc in procs]
+    elapsed = time.time() - started
+
+    latencies = [ms for report in reports for ms in report["latencies"]]
+    errors = {}
+    for report in reports:
+        for key, count in report["errors"].items():
+            errors[key] = errors.get(key, 0) + count
+    cycles = sum(report["cycles"] for report in reports)
+    return {
+        "mode": mode,
+        "cycles": cycles,
+        "writes_per_s": round(cycles * 3 / elapsed, 1),
+        "p50_ms": round(percentile(latencies, 50) or 0, 1),
+        "p99_ms": round(percentile(latencies, 99) or 0, 1),
+        "errors": sum(errors.values()),
+        "error_kinds": errors,
+        "busy_retries": sum((report["writer"] or {}).get("busy_retries", 0) for report in reports),
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--modes", default="concurrent,baseline")
+    parser.add_argument("--workers", type=int, default=4)
+    parser.add_argument("--greenlets", type=int, default=25)
+    parser.add_argument("--duration", type=float, default=10.0)
+    parser.add_argument("--users", type=int, default=100)
+    parser.add_argument("--weeks", type=int, default=1)
+    parser.add_argument("--json", action="store_true")
+    # child-process arguments
+    parser.add_argument("--worker", action="store_true", help=argparse.SUPPRESS)
+    parser.add_argument("--worker-index", type=int, default=0, help=argparse.SUPPRESS)
+    parser.add_argument("--mode", default="concurrent", help=argparse.SUPPRESS)
+    parser.add_argument("--database-uri", help=argparse.SUPPRESS)
+    args = parser.parse_args()
+
+    if args.worker:
+        worker(args)
+        return
+
+    results = [run_mode(args, mode) for mode in args.modes.split(",")]
+    if args.json:
+        print(json.dumps(results, indent=2))
+        return
+    print(f"{args.workers} workers x {args.greenlets} greenlets, {args.duration}s; "
+          "one cycle = clock_in + clock_out + reset")
+    print(f"{'mode':<12} {'cycles':>7} {'writes/s':>9} {'p50':>8} {'p99':>8} {'errors':>7} {'retries':>8}")
+    for row in results:
+        print(f"{row['mode']:<12} {row['cycles']:>7} {row['writes_per_s']:>9} {row['p50_ms']:>7.1f} "
+              f"{row['p99_ms']:>7.1f} {row['errors']:>7} {row['busy_retries']:>8}")
+        for kind, count in row["error_kinds"].items():
+            print(f"    {count:>6}  {kind}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,83 @@
+"""
+Cold start profile for `import wsgi` in each app mode.
+
+Every run is a fresh interpreter (python -X importtime), so the numbers are
+what a `flask user create` or a gunicorn worker boot actually pays.
+
+    python benchmarks/startup.py                      # both modes, top imports
+    python benchmarks/startup.py --max-cli-seconds 1.0   # exit 1 on regression (CI)
+"""
+import argparse
+import json
+import os
+import statistics
+import subprocess
+import sys
+import time
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+
+def cold_start(mode):
+    env = dict(os.environ, SHIFTMATE_APP_MODE=mode)
+    started = time.perf_counter()
+    proc = subprocess.run(
+        [sys.executable, "-X", "importtime", "-c", "import wsgi"],
+        cwd=ROOT, env=env, capture_output=True, text=True,
+    )
+    elapsed = time.perf_counter() - started
+    if proc.returncode != 0:
+        raise RuntimeError(f"{mode} start failed:\n{proc.stderr[-2000:]}")
+    return elapsed, proc.stderr
+
+
+def top_imports(importtime_log, limit):
+    """Top-level packages by cumulative import time (microseconds)."""
+    totals = {}
+    for line in importtime_log.splitlines():
+        if not line.startswith("import time:") or "|" not in line:
+            continue
+        _, cumulative, name = (part.strip() for part in line[len("import time:"):].split("|"))
+        if not cumulative.isdigit():
+            continue
+        package = name.split(".")[0]
+        totals[package] = max(totals.get(package, 0), int(cumulative))
+    return sorted(totals.items(), key=lambda item: item[1], reverse=True)[:limit]
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--modes", default="cli,full")
+    parser.add_argument("--runs", type=int, default=5)
+    parser.add_argument("--top", type=int, default=12)
+    parser.add_argument("--max-cli-seconds", type=float, default=None, help="fail if the cli median exceeds this")
+    parser.add_argument("--json", action="store_true")
+    args = parser.parse_args()
+
+    results = {}
+    for mode in args.modes.split(","):
+        timings, log = [], ""
+        for _ in range(args.runs):
+            elapsed, log = cold_start(mode)
+            timings.append(elapsed)
+        results[mode] = {
+            "median_s": round(statistics.median(timings), 3),
+            "min_s": round(min(timings), 3),
+            "top_imports_ms": {name: round(us / 1000.0, 1) for name, us in top_imports(log, args.top)},
+        }
+
+    if args.json:
+        print(json.dumps(results, indent=2))
+    else:
+        for mode, result in results.items():
+            print(f"\n== {mode}: median {result['median_s']}s (min {result['min_s']}s)")
+            for name, ms in result["top_imports_ms"].items():
+                print(f"  {ms:>8.1f} ms  {name}")
+
+    if args.max_cli_seconds is not None and "cli" in results and results["cli"]["median_s"] > args.max_cli_seconds:
+        print(f"\ncli cold start {results['cli']['median_s']}s exceeds {args.max_cli_seconds}s", file=sys.stderr)
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,176 @@
+"""
+Benchmarks for the core hot paths at several data scales.
+
+Each scale reseeds the database with `seed_bench_data` (same generator as
+`flask bench seed`) and times controllers and JSON endpoints, recording
+statement counts alongside latencies. Results are written as JSON so two runs
+can be compared:
+
+    python benchmarks/suite.py --scales 50,200,1000 --weeks 8
+    python benchmarks/suite.py --compare benchmarks/results/bench-<before>.json
+    python benchmarks/suite.py --database-uri postgresql://localhost/shiftmate_bench
+"""
+import argparse
+import json
+import os
+import platform
+import statistics
+import subprocess
+import sys
+import tempfile
+import time
+from datetime import date, datetime, timedelta
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from App.main import create_app
+from App.database import db
+from App.models import Attendance
+from App.query_inspector import QueryCounter
+from App.controllers import (
+    seed_bench_data,
+    get_roster,
+    weekly_report,
+    schedule_week,
+    clock_in,
+    clock_out,
+    login,
+)
+
+RESULTS_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), "results")
+
+
+def measure(name, fn, reps, scale):
+    """Run fn(rep) `reps` times, each in a fresh session like a new request."""
+    timings, queries = [], []
+    for rep in range(reps):
+        db.session.remove()
+        with QueryCounter() as counter:
+            started = time.perf_counter()
+            fn(rep)
+            timings.append((time.perf_counter() - started) * 1000.0)
+        queries.append(counter.count)
+    timings.sort()
+    return {
+        "scale": scale,
+        "name": name,
+        "reps": reps,
+        "min_ms": round(timings[0], 3),
+        "median_ms": round(statistics.median(timings), 3),
+        "p95_ms": round(timings[min(len(timings) - 1, int(0.95 * len(timings)))], 3),
+        "queries": max(queries),
+    }
+
+
+def run_scale(client, users, weeks, reps):
+    db.drop_all()
+    db.create_all()
+    seeded = seed_bench_data(users, weeks, seed=users)
+    first_week = date.fromisoformat(seeded["start"])
+    mid_week = first_week + timedelta(weeks=weeks // 2)
+    week_end = mid_week + timedelta(days=6)
+    future_week = first_week + timedelta(weeks=weeks + 1)
+
+    admin_token = login("bench000000", "benchpass")
+    auth = {"Authorization": f"Bearer {admin_token}"}
+    open_shifts = [
+        (a.user_id, a.shift_id)
+        for a in Attendance.query.filter(Attendance.time_in.is_(None)).limit(reps).all()
+    ]
+
+    def check(response):
+        assert response.status_code == 200, (response.status_code, response.get_data(as_text=True)[:200])
+
+    results = [
+        measure("get_roster.week", lambda _: get_roster(mid_week, week_end), reps, users),
+        measure("get_roster.week.fields", lambda _: get_roster(mid_week, week_end, fields=["id", "start", "end"]),
+                reps, users),
+        measure("weekly_report", lambda _: weekly_report(mid_week), reps, users),
+        measure(
+            "schedule_week",
+            lambda rep: schedule_week(rep + 1, future_week, {i: ("09:00", "17:00") for i in range(5)}),
+            min(reps, users), users,
+        ),
+        measure("clock_in", lambda rep: clock_in(*open_shifts[rep % len(open_shifts)]), len(open_shifts), users),
+        measure("clock_out", lambda rep: clock_out(*open_shifts[rep % len(open_shifts)]), len(open_shifts), users),
+        measure("login", lambda _: login("bench000001", "benchpass"), max(3, reps // 5), users),
+        measure(
+            "GET /api/roster",
+            lambda _: check(client.get(f"/api/roster?start={mid_week}&end={week_end}", headers=auth)),
+            reps, users,
+        ),
+        measure(
+            "GET /api/admin/reports/weekly",
+            lambda _: check(client.get(f"/api/admin/reports/weekly?week_start={mid_week}", headers=auth)),
+            reps, users,
+        ),
+        measure("GET /api/users", lambda _: check(client.get("/api/users", headers=auth)), reps, users),
+    ]
+    return seeded, results
+
+
+def compare(current, previous_path):
+    with open(previous_path) as f:
+        previous = {(r["scale"], r["name"]): r for r in json.load(f)["results"]}
+    print(f"\n{'scale':>6} {'benchmark':<32} {'before':>10} {'after':>10} {'change':>8}")
+    for r in current:
+        before = previous.get((r["scale"], r["name"]))
+        if not before:
+            continue
+        change = (r["median_ms"] - before["median_ms"]) / before["median_ms"] * 100 if before["median_ms"] else 0.0
+        print(f"{r['scale']:>6} {r['name']:<32} {before['median_ms']:>9.2f}ms {r['median_ms']:>9.2f}ms {change:>+7.1f}%")
+
+
+def git_revision():
+    try:
+        return subprocess.check_output(["git", "rev-parse", "--short", "HEAD"], text=True).strip()
+    except Exception:
+        return None
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--scales", default="50,200,1000", help="comma separated user counts")
+    parser.add_argument("--weeks", type=int, default=8)
+    parser.add_argument("--reps", type=int, default=20)
+    parser.add_argument("--database-uri", default=None, help="defaults to a throwaway SQLite file")
+    parser.add_argument("--output", default=None, help="results file (default benchmarks/results/bench-<time>.json)")
+    parser.add_argument("--compare", default=None, help="previous results file to diff against")
+    args = parser.parse_args()
+
+    uri = args.database_uri or f"sqlite:///{os.path.join(tempfile.mkdtemp(), 'bench.db')}"
+    app = create_app({"TESTING": True, "SQLALCHEMY_DATABASE_URI": uri, "METRICS_ENABLED": False})
+    client = app.test_client()
+
+    results, seeds = [], []
+    for users in (int(s) for s in args.scales.split(",")):
+        seeded, scale_results = run_scale(client, users, args.weeks, args.reps)
+        seeds.append(seeded)
+        results.extend(scale_results)
+        for r in scale_results:
+            print(f"{users:>6} {r['name']:<32} median {r['median_ms']:>9.2f}ms  p95 {r['p95_ms']:>9.2f}ms  queries {r['queries']}")
+
+    payload = {
+        "meta": {
+            "timestamp": datetime.now().isoformat(timespec="seconds"),
+            "git": git_revision(),
+            "python": platform.python_version(),
+            "database": db.engine.dialect.name,
+            "weeks": args.weeks,
+            "reps": args.reps,
+            "seeded": seeds,
+        },
+        "results": results,
+    }
+    output = args.output or os.path.join(RESULTS_DIR, f"bench-{datetime.now():%Y%m%d-%H%M%S}.json")
+    os.makedirs(os.path.dirname(os.path.abspath(output)), exist_ok=True)
+    with open(output, "w") as f:
+        json.dump(payload, f, indent=2)
+    print(f"\nwrote {output}")
+
+    if args.compare:
+        compare(results, args.compare)
+
+
+if __name__ == "__main__":
+    main()
@@ -1,19 +1,54 @@
 # gunicorn_config.py
 import multiprocessing
+import os
 
 # The socket to bind.
 # "0.0.0.0" to bind to all interfaces. 8000 is the port number.
 bind = "0.0.0.0:8080"
 
 # The number of worker processes for handling requests.
-workers = 4
+# Size these with benchmarks/loadtest.py rather than guessing.
+workers = int(os.environ.get('GUNICORN_WORKERS', 4))
 
 # Use the 'gevent' worker type for async performance.
-worker_class = 'gevent'
+worker_class = os.environ.get('GUNICORN_WORKER_CLASS', 'gevent')
+
+# Concurrent greenlets per gevent worker.
+worker_connections = int(os.environ.get('GUNICORN_WORKER_CONNECTIONS', 1000))
+
+# Import the app once in the master and fork it into workers.
+# Workers drop the inherited DB connections right after fork (App.database.init_db).
+preload_app = os.environ.get('GUNICORN_PRELOAD', 'false').lower() == 'true'
+
+# Shared store for /metrics across workers (App/metrics.py); must exist before workers start.
+if os.environ.get('PROMETHEUS_MULTIPROC_DIR'):
+    os.makedirs(os.environ['PROMETHEUS_MULTIPROC_DIR'], exist_ok=True)
 
 # Log level
 loglevel = 'info'
 
 # Where to log to
 accesslog = '-'  # '-' means log to stdout
-errorlog = '-'  # '-' means log to stderr
\ No newline at end of file
+errorlog = '-'  # '-' means log to stderr
+
+def post_worker_init(worker):
+    # gevent patches the worker after a preloaded app was imported,
+    # so hook psycopg2 into the gevent hub here as well.
+    from App.database import make_psycopg2_green
+    make_psycopg2_green()
+    # MAINTENANCE_SCHEDULER=in-process: the scheduler thread belongs to workers, not the master
+    from App.maintenance import start_maintenance
+    start_maintenance(worker.wsgi)
+
+def on_starting(server):
+    # stale files from a previous run would be summed into the new totals
+    multiproc_dir = os.environ.get('PROMETHEUS_MULTIPROC_DIR')
+    if multiproc_dir:
+        for name in os.listdir(multiproc_dir):
+            if name.endswith('.db'):
+                os.remove(os.path.join(multiproc_dir, name))
+
+def child_exit(server, worker):
+    if os.environ.get('PROMETHEUS_MULTIPROC_DIR'):
+        from prometheus_client import multiprocess
+        multiprocess.mark_process_dead(worker.pid)
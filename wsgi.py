@@ -1,14 +1,35 @@
-import click, pytest, sys, json
+import click, os, sys, json
 from flask.cli import with_appcontext, AppGroup
 from datetime import datetime, date, time as dtime, timedelta
 from App.database import db, get_migrate
 from App.models import User, Shift, Attendance
 from App.main import create_app
+from App.serialization import json_default
 from App.controllers import ( create_user, get_all_users_json, get_all_users, initialize )
-from App.controllers import schedule_shift, schedule_week, get_roster, clock_in, clock_out, weekly_report
+from App.controllers import schedule_shift_with_check, schedule_week, get_roster, clock_in, clock_out, weekly_report
+from App.controllers import seed_bench_data, get_outbox_stats, rebuild_weekly_hours, WeeklyHoursExceeded
+from App.controllers import backfill_reports, REPORT_BREAKDOWNS, get_job_runs, get_coverage, clone_shifts
+from App.controllers import delete_shifts_in_range
 
-app = create_app()
-migrate = get_migrate(app)
+# Commands that serve or inspect HTTP need the full app.
+WEB_COMMANDS = {"run", "routes", "shell"}
+
+def _app_mode():
+    """
+    `flask <group> <command>` only needs config, db and controllers, so skip the
+    web stack for it; gunicorn and `flask run` get the full app.
+    SHIFTMATE_APP_MODE=full|cli overrides the guess.
+    """
+    if os.environ.get("SHIFTMATE_APP_MODE"):
+        return os.environ["SHIFTMATE_APP_MODE"]
+    argv = sys.argv
+    is_flask_cli = os.path.basename(argv[0]) in ("flask", "flask.exe") or argv[0].endswith(os.path.join("flask", "__main__.py"))
+    return "cli" if is_flask_cli and not WEB_COMMANDS & set(argv[1:]) else "full"
+
+APP_MODE = _app_mode()
+app = create_app(mode=APP_MODE)
+# alembic is slow to import; plain CLI commands only need it for `flask db ...`
+migrate = get_migrate(app) if APP_MODE == "full" or "db" in sys.argv[1:] else None
 
 # This command creates and initializes the database
 @app.cli.command("init", help="Creates and initializes the database")
@@ -23,6 +44,9 @@ test = AppGroup('test', help='Testing commands')
 shift_cli = AppGroup('shift', help='Shift scheduling and roster commands')
 att_cli = AppGroup('att', help='Attendance (clock in/out) commands')
 report_cli = AppGroup('report', help='Reporting commands')
+bench_cli = AppGroup('bench', help='Synthetic data for benchmarks')
+outbox_cli = AppGroup('outbox', help='Deliver shift/attendance events to payroll and BI')
+maintenance_cli = AppGroup('maintenance', help='Scheduled upkeep jobs (rollups, purges, cache warmup)')
 
 '''
 User Commands
@@ -55,6 +79,7 @@ Test Commands
 @test.command("user", help="Run User tests")
 @click.argument("type", default="all")
 def user_tests_command(type):
+    import pytest
     if type == "unit":
         sys.exit(pytest.main(["-k", "UserUnitTests"]))
     elif type == "int":
@@ -94,7 +119,7 @@ def print_report(week_start):
     print(rep)
 
 def _print_json(data):
-    print(json.dumps(data, indent=2, default=str))
+    print(json.dumps(data, indent=2, default=json_default))
 
 def _to_time(s):
     return dtime.fromisoformat(s)
@@ -134,16 +159,22 @@ def _find_shift_id(username, work_date, start_str=None):
 def shift_add(username, work_date, start, end, role, location):
     u = _find_user(username)
     if not u: return
-    s = schedule_shift(
-        user_id=u.id,
-        work_date=date.fromisoformat(work_date),
-        start=_to_time(start),
-        end=_to_time(end),
-        role=role,
-        location=location
-    )
+    try:
+        s, check = schedule_shift_with_check(
+            user_id=u.id,
+            work_date=date.fromisoformat(work_date),
+            start=_to_time(start),
+            end=_to_time(end),
+            role=role,
+            location=location
+        )
+    except WeeklyHoursExceeded as e:
+        print(f"Rejected: {e}")
+        return
     print("Created shift:")
     _print_json(s.get_json())
+    if check and check['over']:
+        print(f"Warning: {check['hours_after']}h scheduled that week (cap {check['cap']}h)")
 
 @shift_cli.command("roster", help="Show combined roster for a date range (all staff)")
 @click.argument("start")  # YYYY-MM-DD
@@ -177,6 +208,52 @@ def shift_find(username, work_date):
     else:
         _print_json(payload)
 
+# flask shift clone 2025-03-03 2025-03-09 2025-03-10 --copies 4 --location airport
+@shift_cli.command("clone", help="Copy the shifts in a date range forward, skipping ones that already exist")
+@click.argument("source_start")
+@click.argument("source_end")
+@click.argument("target_start")
+@click.option("--copies", default=1, show_default=True, help="back-to-back copies of the source range")
+@click.option("--location", default=None)
+@click.option("--role", default=None)
+def shift_clone(source_start, source_end, target_start, copies, location, role):
+    try:
+        result = clone_shifts(date.fromisoformat(source_start), date.fromisoformat(source_end),
+                              date.fromisoformat(target_start), copies=copies, location=location, role=role)
+    except WeeklyHoursExceeded as e:
+        print(f"Rejected, nothing copied: {e}")
+        return
+    _print_json(result)
+
+# flask shift delete-range 2025-03-01 2025-03-31 --location airport --dry-run
+@shift_cli.command("delete-range", help="Delete the shifts in a date range and their attendance")
+@click.argument("start")
+@click.argument("end")
+@click.option("--user", "username", default=None, help="only this user's shifts")
+@click.option("--location", default=None)
+@click.option("--dry-run", is_flag=True, help="only count what would be deleted")
+@click.option("--yes", is_flag=True, help="don't ask for confirmation")
+def shift_delete_range(start, end, username, location, dry_run, yes):
+    user_id = None
+    if username:
+        u = _find_user(username)
+        if not u: return
+        user_id = u.id
+    args = dict(start=date.fromisoformat(start), end=date.fromisoformat(end), user_id=user_id, location=location)
+    counts = delete_shifts_in_range(**args, dry_run=True)
+    if dry_run or not counts["shifts"]:
+        _print_json(counts)
+        return
+    if not yes:
+        click.confirm(f"Delete {counts['shifts']} shifts and {counts['attendance']} attendance records "
+                      f"({counts['clocked_in']} with clock-ins)?", abort=True)
+    _print_json(delete_shifts_in_range(**args))
+
+@shift_cli.command("rebuild-hours", help="Recompute the weekly hours counters from the shifts table")
+def shift_rebuild_hours():
+    weeks = rebuild_weekly_hours()
+    print(f"Rebuilt weekly hours for {weeks} user-weeks.")
+
 app.cli.add_command(shift_cli)
 
 # ---- ATTENDANCE COMMANDS ----
@@ -234,4 +311,170 @@ app.cli.add_command(att_cli)
 def report_week(week_start):
     rep = weekly_report(date.fromisoformat(week_start))
     _print_json(rep)
-app.cli.add_command(report_cli)
\ No newline at end of file
+
+# flask report backfill --from 2023-01-02 --to 2024-12-29 --by location --workers 8
+@report_cli.command("backfill", help="Store weekly Report rows for a date range, in parallel; safe to re-run")
+@click.option("--from", "start", required=True, help="YYYY-MM-DD; rounded down to its Monday")
+@click.option("--to", "end", required=True, help="YYYY-MM-DD")
+@click.option("--by", type=click.Choice(REPORT_BREAKDOWNS), default=None, help="also store one report per location")
+@click.option("--workers", default=None, type=int, help="worker processes (default: CPU count; 0 runs inline)")
+@click.option("--chunk-weeks", default=4, show_default=True)
+@click.option("--force", is_flag=True, help="ignore the checkpoint and overwrite existing reports")
+def report_backfill(start, end, by, workers, chunk_weeks, force):
+    started = datetime.now()
+    def progress(weeks, count):
+        print(f"  {weeks[0]} .. {weeks[-1]}: {count} reports")
+    result = backfill_reports(
+        date.fromisoformat(start), date.fromisoformat(end), by=by,
+        workers=workers, chunk_weeks=chunk_weeks, force=force, progress=progress,
+    )
+    result["seconds"] = round((datetime.now() - started).total_seconds(), 2)
+    _print_json(result)
+
+# flask report coverage 2025-03-03 2025-03-09 --location airport --slot 30 --grid
+@report_cli.command("coverage", help="Scheduled vs clocked-in headcount per location per time slot")
+@click.argument("start")
+@click.argument("end")
+@click.option("--location", default=None)
+@click.option("--slot", "slot_minutes", default=15, show_default=True, help="minutes per slot")
+@click.option("--grid", is_flag=True, help="print a day x slot table of actual/scheduled per location")
+def report_coverage(start, end, location, slot_minutes, grid):
+    coverage = get_coverage(date.fromisoformat(start), date.fromisoformat(end),
+                            slot_minutes=slot_minutes, location=location)
+    if not grid:
+        _print_json(coverage)
+        return
+    per_day = coverage["slots_per_day"]
+    for name, scheduled, actual in zip(coverage["locations"], coverage["scheduled"], coverage["actual"]):
+        print(f"== {name or '(no location)'} ==")
+        for offset in range(0, len(scheduled), per_day):
+            day = coverage["start"] + timedelta(days=offset // per_day)
+            cells = " ".join(f"{a}/{s}" if s or a else "." for a, s in
+                             zip(actual[offset:offset + per_day], scheduled[offset:offset + per_day]))
+            print(f"{day:%a %d %b}  {cells}")
+app.cli.add_command(report_cli)
+
+# ---- BENCHMARK COMMANDS ----
+# flask bench seed --users 500 --weeks 8
+@bench_cli.command("seed", help="Fill users, shifts and attendance with reproducible synthetic data")
+@click.option("--users", default=100, show_default=True)
+@click.option("--weeks", default=4, show_default=True)
+@click.option("--start", default=None, help="Monday to start from (YYYY-MM-DD); default centres the range on today")
+@click.option("--seed", default=42, show_default=True)
+@click.option("--shifts-per-week", default=5, show_default=True)
+def bench_seed(users, weeks, start, seed, shifts_per_week):
+    started = datetime.now()
+    result = seed_bench_data(
+        users, weeks,
+        start=date.fromisoformat(start) if start else None,
+        seed=seed,
+        shifts_per_week=shifts_per_week,
+    )
+    result["seconds"] = round((datetime.now() - started).total_seconds(), 2)
+    _print_json(result)
+app.cli.add_command(bench_cli)
+
+# ---- OUTBOX COMMANDS ----
+# flask outbox dispatch --sinks http://localhost:9000/events --metrics-port 9101
+@outbox_cli.command("dispatch", help="Drain the outbox to the configured sinks (runs until stopped)")
+@click.option("--sinks", default=None, help="comma separated; defaults to OUTBOX_SINKS")
+@click.option("--batch-size", default=None, type=int)
+@click.option("--once", is_flag=True, help="deliver a single batch and exit")
+@click.option("--metrics-port", default=None, type=int, help="serve Prometheus metrics on this port")
+def outbox_dispatch(sinks, batch_size, once, metrics_port):
+    import signal
+    from App.outbox import OutboxDispatcher, build_sinks
+    sink_list = build_sinks(sinks or app.config.get("OUTBOX_SINKS"))
+    if not sink_list:
+        raise click.UsageError("no sinks: pass --sinks or set OUTBOX_SINKS")
+    dispatcher = OutboxDispatcher(app, sink_list, batch_size=batch_size)
+    if once:
+        print(f"delivered {dispatcher.run_once()} events")
+        return
+    if metrics_port:
+        from prometheus_client import start_http_server
+        start_http_server(metrics_port)
+    signal.signal(signal.SIGTERM, lambda *_: dispatcher.stop())
+    print(f"dispatching to {', '.join(map(str, sink_list))}")
+    try:
+        dispatcher.run()
+    except KeyboardInterrupt:
+        dispatcher.stop()
+
+@outbox_cli.command("stats", help="Pending/dead event counts and delivery lag")
+def outbox_stats():
+    _print_json(get_outbox_stats())
+
+@outbox_cli.command("receive", help="Local HTTP stand-in for a payroll/BI endpoint")
+@click.option("--port", default=9000, show_default=True)
+@click.option("--out", default=None, help="append received events to this JSON-lines file")
+@click.option("--fail-rate", default=0.0, show_default=True, help="fraction of batches answered with 503")
+def outbox_receive(port, out, fail_rate):
+    import random
+    from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+    class Receiver(BaseHTTPRequestHandler):
+        def do_POST(self):
+            events = json.loads(self.rfile.read(int(self.headers.get("Content-Length", 0))))["events"]
+            if random.random() < fail_rate:
+                self.send_response(503)
+                self.end_headers()
+                return
+            if out:
+                with open(out, "a") as fh:
+                    fh.writelines(json.dumps(event) + "\n" for event in events)
+            print(f"received {len(events)} events, last id {events[-1]['id'] if events else '-'}")
+            self.send_response(204)
+            self.end_headers()
+
+        def log_message(self, *args):
+            pass
+
+    print(f"listening on http://127.0.0.1:{port}/events")
+    ThreadingHTTPServer(("127.0.0.1", port), Receiver).serve_forever()
+app.cli.add_command(outbox_cli)
+
+# ---- MAINTENANCE COMMANDS ----
+# flask maintenance run      (sidecar next to the web workers)
+@maintenance_cli.command("run", help="Run the maintenance scheduler until stopped")
+def maintenance_run():
+    import signal
+    from App.maintenance import MaintenanceScheduler
+    scheduler = MaintenanceScheduler(app)
+    signal.signal(signal.SIGTERM, lambda *_: scheduler.stop())
+    for name, slot in scheduler.next_runs().items():
+        print(f"  {name:<24} next {slot:%Y-%m-%d %H:%M}")
+    try:
+        scheduler.run()
+    except KeyboardInterrupt:
+        scheduler.stop()
+
+@maintenance_cli.command("list", help="Configured jobs and when they next run")
+def maintenance_list():
+    from App.maintenance import load_jobs
+    now = datetime.now()
+    _print_json([
+        {"job": job.name, "schedule": str(job.schedule), "leader": job.leader,
+         "next_run": job.schedule.next_after(now)}
+        for job in load_jobs(app.config)
+    ])
+
+@maintenance_cli.command("run-job", help="Run one job now (recorded in the history like a scheduled run)")
+@click.argument("name")
+def maintenance_run_job(name):
+    from App.maintenance import load_jobs, run_job
+    job = next((job for job in load_jobs(app.config) if job.name == name), None)
+    if job is None:
+        raise click.UsageError(f"no job named {name!r}; see `flask maintenance list`")
+    run = run_job(job, datetime.now())
+    if run is None:
+        print(f"{name} ran (not recorded: leader=False)" if not job.leader else f"{name} is already running for this slot")
+        return
+    _print_json(run.get_json())
+
+@maintenance_cli.command("history", help="Recent job runs, newest first")
+@click.option("--job", default=None)
+@click.option("--limit", default=20, show_default=True)
+def maintenance_history(job, limit):
+    _print_json(get_job_runs(job, limit))
+app.cli.add_command(maintenance_cli)